@@ -0,0 +1,69 @@
+"""add due dates and fines
+
+Revision ID: 2f7c4e1d9a63
+Revises: 9b3d2f6a8c15
+Create Date: 2026-10-19 13:41:05.217634
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2f7c4e1d9a63'
+down_revision: Union[str, None] = '9b3d2f6a8c15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('borrowed_books', sa.Column('due_date', sa.DateTime(timezone=True), nullable=True))
+    # Срок для уже выданных книг - стандартные 14 дней от даты выдачи
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute("UPDATE borrowed_books SET due_date = datetime(borrow_date, '+14 days')")
+    else:
+        op.execute("UPDATE borrowed_books SET due_date = borrow_date + interval '14 days'")
+    op.create_index(
+        'ix_borrowed_books_active_due_date', 'borrowed_books', ['due_date'], unique=False,
+        postgresql_where=sa.text('return_date IS NULL'),
+        sqlite_where=sa.text('return_date IS NULL'),
+    )
+
+    op.create_table('fines',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('borrowed_book_id', sa.Integer(), nullable=False),
+    sa.Column('reader_id', sa.Integer(), nullable=False),
+    sa.Column('days_overdue', sa.Integer(), nullable=False),
+    sa.Column('amount', sa.Float(), nullable=False),
+    sa.Column('paid', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('paid_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['borrowed_book_id'], ['borrowed_books.id'], ),
+    sa.ForeignKeyConstraint(['reader_id'], ['readers.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('borrowed_book_id')
+    )
+    op.create_index(op.f('ix_fines_id'), 'fines', ['id'], unique=False)
+    op.create_index('ix_fines_reader_id', 'fines', ['reader_id', 'id'], unique=False)
+    op.create_index('ix_fines_created_at', 'fines', ['created_at'], unique=False)
+
+    op.create_table('job_states',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('watermark', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('job_states')
+    op.drop_index('ix_fines_created_at', table_name='fines')
+    op.drop_index('ix_fines_reader_id', table_name='fines')
+    op.drop_index(op.f('ix_fines_id'), table_name='fines')
+    op.drop_table('fines')
+    op.drop_index('ix_borrowed_books_active_due_date', table_name='borrowed_books')
+    op.drop_column('borrowed_books', 'due_date')
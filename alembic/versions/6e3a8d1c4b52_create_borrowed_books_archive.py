@@ -0,0 +1,41 @@
+"""create borrowed books archive
+
+Revision ID: 6e3a8d1c4b52
+Revises: d5f0b2a7e914
+Create Date: 2026-10-19 16:21:07.318842
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6e3a8d1c4b52'
+down_revision: Union[str, None] = 'd5f0b2a7e914'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('borrowed_books_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('book_id', sa.Integer(), nullable=False),
+    sa.Column('reader_id', sa.Integer(), nullable=False),
+    sa.Column('borrow_date', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('due_date', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('return_date', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['book_id'], ['books.id'], ),
+    sa.ForeignKeyConstraint(['reader_id'], ['readers.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_borrowed_books_archive_reader_id', 'borrowed_books_archive', ['reader_id', 'borrow_date'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_borrowed_books_archive_reader_id', table_name='borrowed_books_archive')
+    op.drop_table('borrowed_books_archive')
@@ -0,0 +1,47 @@
+"""create holds table
+
+Revision ID: 9b3d2f6a8c15
+Revises: e41b6f0c9a27
+Create Date: 2026-10-19 13:02:17.448120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b3d2f6a8c15'
+down_revision: Union[str, None] = 'e41b6f0c9a27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('holds',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('book_id', sa.Integer(), nullable=False),
+    sa.Column('reader_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('ready_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['book_id'], ['books.id'], ),
+    sa.ForeignKeyConstraint(['reader_id'], ['readers.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_holds_id'), 'holds', ['id'], unique=False)
+    op.create_index('ix_holds_queue', 'holds', ['book_id', 'status', 'id'], unique=False)
+    op.create_index('ix_holds_status_expires_at', 'holds', ['status', 'expires_at'], unique=False)
+    op.create_index('ix_holds_reader_id', 'holds', ['reader_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_holds_reader_id', table_name='holds')
+    op.drop_index('ix_holds_status_expires_at', table_name='holds')
+    op.drop_index('ix_holds_queue', table_name='holds')
+    op.drop_index(op.f('ix_holds_id'), table_name='holds')
+    op.drop_table('holds')
@@ -0,0 +1,56 @@
+"""create audit outbox and log
+
+Revision ID: 9e4a2c6b8d13
+Revises: 5f1c8b3e7a40
+Create Date: 2026-10-19 23:05:17.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e4a2c6b8d13'
+down_revision: Union[str, None] = '5f1c8b3e7a40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('audit_outbox',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('event_type', sa.String(), nullable=False),
+    sa.Column('entity', sa.String(), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sqlite_autoincrement=True
+    )
+    op.create_index(op.f('ix_audit_outbox_id'), 'audit_outbox', ['id'], unique=False)
+    op.create_table('audit_log',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('outbox_id', sa.Integer(), nullable=False),
+    sa.Column('event_type', sa.String(), nullable=False),
+    sa.Column('entity', sa.String(), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('occurred_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('recorded_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('outbox_id')
+    )
+    op.create_index(op.f('ix_audit_log_id'), 'audit_log', ['id'], unique=False)
+    op.create_index('ix_audit_log_entity', 'audit_log', ['entity', 'entity_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_audit_log_entity', table_name='audit_log')
+    op.drop_index(op.f('ix_audit_log_id'), table_name='audit_log')
+    op.drop_table('audit_log')
+    op.drop_index(op.f('ix_audit_outbox_id'), table_name='audit_outbox')
+    op.drop_table('audit_outbox')
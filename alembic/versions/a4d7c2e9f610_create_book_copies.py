@@ -0,0 +1,109 @@
+"""create book copies
+
+Revision ID: a4d7c2e9f610
+Revises: 6e3a8d1c4b52
+Create Date: 2026-10-19 17:02:44.905113
+
+"""
+import uuid
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4d7c2e9f610'
+down_revision: Union[str, None] = '6e3a8d1c4b52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    book_copies = op.create_table('book_copies',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('book_id', sa.Integer(), nullable=False),
+    sa.Column('barcode', sa.String(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('branch', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['book_id'], ['books.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_book_copies_id'), 'book_copies', ['id'], unique=False)
+    op.create_index(op.f('ix_book_copies_barcode'), 'book_copies', ['barcode'], unique=True)
+    op.create_index('ix_book_copies_claim', 'book_copies', ['book_id', 'status', 'id'], unique=False)
+    op.add_column('borrowed_books', sa.Column('copy_id', sa.Integer(), nullable=True))
+    op.add_column('borrowed_books_archive', sa.Column('copy_id', sa.Integer(), nullable=True))
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        op.create_foreign_key(
+            'borrowed_books_copy_id_fkey', 'borrowed_books', 'book_copies', ['copy_id'], ['id']
+        )
+
+    # Экземпляры из текущих остатков: quantity свободных, по одному
+    # на каждую активную выдачу и на каждую готовую бронь
+    now = datetime.utcnow()
+
+    def copies(book_id, count, status):
+        return [
+            {
+                'book_id': book_id,
+                'barcode': f"{book_id}-{uuid.uuid4().hex[:10].upper()}",
+                'status': status,
+                'branch': 'main',
+                'created_at': now,
+            }
+            for _ in range(count)
+        ]
+
+    rows = []
+    for book_id, quantity in bind.execute(sa.text("SELECT id, quantity FROM books WHERE quantity > 0")):
+        rows.extend(copies(book_id, quantity, 'available'))
+        if len(rows) >= 10000:
+            op.bulk_insert(book_copies, rows)
+            rows = []
+    for book_id, count in bind.execute(sa.text(
+        "SELECT book_id, COUNT(*) FROM holds WHERE status = 'ready' GROUP BY book_id"
+    )):
+        rows.extend(copies(book_id, count, 'on_hold'))
+    if rows:
+        op.bulk_insert(book_copies, rows)
+
+    loans = bind.execute(sa.text(
+        "SELECT id, book_id FROM borrowed_books WHERE return_date IS NULL ORDER BY id"
+    )).all()
+    for start in range(0, len(loans), 10000):
+        chunk = loans[start:start + 10000]
+        barcodes = {loan_id: f"{book_id}-{uuid.uuid4().hex[:10].upper()}" for loan_id, book_id in chunk}
+        op.bulk_insert(book_copies, [
+            {
+                'book_id': book_id,
+                'barcode': barcodes[loan_id],
+                'status': 'borrowed',
+                'branch': 'main',
+                'created_at': now,
+            }
+            for loan_id, book_id in chunk
+        ])
+        bind.execute(
+            sa.text(
+                "UPDATE borrowed_books SET copy_id = "
+                "(SELECT id FROM book_copies WHERE barcode = :barcode) WHERE id = :loan_id"
+            ),
+            [{'barcode': barcode, 'loan_id': loan_id} for loan_id, barcode in barcodes.items()],
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'sqlite':
+        op.drop_constraint('borrowed_books_copy_id_fkey', 'borrowed_books', type_='foreignkey')
+    op.drop_column('borrowed_books_archive', 'copy_id')
+    op.drop_column('borrowed_books', 'copy_id')
+    op.drop_index('ix_book_copies_claim', table_name='book_copies')
+    op.drop_index(op.f('ix_book_copies_barcode'), table_name='book_copies')
+    op.drop_index(op.f('ix_book_copies_id'), table_name='book_copies')
+    op.drop_table('book_copies')
@@ -0,0 +1,39 @@
+"""add book listing indexes
+
+Revision ID: ad800daf53d4
+Revises: 3bf425089566
+Create Date: 2026-10-19 10:12:41.305118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ad800daf53d4'
+down_revision: Union[str, None] = '3bf425089566'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_books_author_title', 'books', ['author', 'title'], unique=False)
+    op.create_index('ix_books_publication_year', 'books', ['publication_year'], unique=False)
+    op.create_index(
+        'ix_books_available_title',
+        'books',
+        ['title'],
+        unique=False,
+        postgresql_where=sa.text('quantity > 0'),
+        sqlite_where=sa.text('quantity > 0'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_books_available_title', table_name='books')
+    op.drop_index('ix_books_publication_year', table_name='books')
+    op.drop_index('ix_books_author_title', table_name='books')
@@ -0,0 +1,28 @@
+"""add branch_id to changes
+
+Revision ID: b7d3e9a4c261
+Revises: 9e4a2c6b8d13
+Create Date: 2026-10-20 10:14:32.518730
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d3e9a4c261'
+down_revision: Union[str, None] = '9e4a2c6b8d13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('changes', sa.Column('branch_id', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('changes', 'branch_id')
@@ -0,0 +1,35 @@
+"""create api key nonces
+
+Revision ID: c2f8a5d1e937
+Revises: b7d3e9a4c261
+Create Date: 2026-10-20 11:02:48.206915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2f8a5d1e937'
+down_revision: Union[str, None] = 'b7d3e9a4c261'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('api_key_nonces',
+    sa.Column('key_id', sa.String(), nullable=False),
+    sa.Column('nonce', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('key_id', 'nonce')
+    )
+    op.create_index('ix_api_key_nonces_created_at', 'api_key_nonces', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_api_key_nonces_created_at', table_name='api_key_nonces')
+    op.drop_table('api_key_nonces')
@@ -0,0 +1,44 @@
+"""create circulation rollups
+
+Revision ID: c8a1e5f3b720
+Revises: 2f7c4e1d9a63
+Create Date: 2026-10-19 14:18:42.906311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8a1e5f3b720'
+down_revision: Union[str, None] = '2f7c4e1d9a63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('book_circulation_daily',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('book_id', sa.Integer(), nullable=False),
+    sa.Column('borrows', sa.Integer(), nullable=False),
+    sa.Column('returns', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['book_id'], ['books.id'], ),
+    sa.PrimaryKeyConstraint('day', 'book_id')
+    )
+    op.create_table('reader_circulation_daily',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('reader_id', sa.Integer(), nullable=False),
+    sa.Column('borrows', sa.Integer(), nullable=False),
+    sa.Column('returns', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['reader_id'], ['readers.id'], ),
+    sa.PrimaryKeyConstraint('day', 'reader_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('reader_circulation_daily')
+    op.drop_table('book_circulation_daily')
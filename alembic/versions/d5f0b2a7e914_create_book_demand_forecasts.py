@@ -0,0 +1,41 @@
+"""create book demand forecasts
+
+Revision ID: d5f0b2a7e914
+Revises: c8a1e5f3b720
+Create Date: 2026-10-19 15:03:51.662094
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5f0b2a7e914'
+down_revision: Union[str, None] = 'c8a1e5f3b720'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('book_demand_forecasts',
+    sa.Column('book_id', sa.Integer(), nullable=False),
+    sa.Column('computed_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('daily_demand', sa.Float(), nullable=False),
+    sa.Column('avg_loan_days', sa.Float(), nullable=False),
+    sa.Column('stockout_days', sa.Integer(), nullable=False),
+    sa.Column('current_copies', sa.Integer(), nullable=False),
+    sa.Column('recommended_copies', sa.Integer(), nullable=False),
+    sa.Column('copies_delta', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['book_id'], ['books.id'], ),
+    sa.PrimaryKeyConstraint('book_id')
+    )
+    op.create_index('ix_book_demand_forecasts_copies_delta', 'book_demand_forecasts', ['copies_delta'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_book_demand_forecasts_copies_delta', table_name='book_demand_forecasts')
+    op.drop_table('book_demand_forecasts')
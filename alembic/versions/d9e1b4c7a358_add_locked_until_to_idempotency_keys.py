@@ -0,0 +1,28 @@
+"""add locked_until to idempotency keys
+
+Revision ID: d9e1b4c7a358
+Revises: c2f8a5d1e937
+Create Date: 2026-10-20 11:41:09.637204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9e1b4c7a358'
+down_revision: Union[str, None] = 'c2f8a5d1e937'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('idempotency_keys', sa.Column('locked_until', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('idempotency_keys', 'locked_until')
@@ -0,0 +1,48 @@
+"""create changes table
+
+Revision ID: e41b6f0c9a27
+Revises: ad800daf53d4
+Create Date: 2026-10-19 12:26:54.910382
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e41b6f0c9a27'
+down_revision: Union[str, None] = 'ad800daf53d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('changes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('entity', sa.String(), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('operation', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_changes_id'), 'changes', ['id'], unique=False)
+    op.create_index('ix_changes_entity_id', 'changes', ['entity', 'id'], unique=False)
+
+    # Начальное состояние попадает в ленту, чтобы since=0 давал полную синхронизацию.
+    for entity, table in (
+        ('book', 'books'), ('reader', 'readers'), ('borrowed_book', 'borrowed_books'),
+    ):
+        op.execute(
+            f"INSERT INTO changes (entity, entity_id, operation, created_at) "
+            f"SELECT '{entity}', id, 'upsert', CURRENT_TIMESTAMP FROM {table} ORDER BY id"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_changes_entity_id', table_name='changes')
+    op.drop_index(op.f('ix_changes_id'), table_name='changes')
+    op.drop_table('changes')
@@ -0,0 +1,103 @@
+"""create branches
+
+Revision ID: f3b9e6a1d284
+Revises: a4d7c2e9f610
+Create Date: 2026-10-19 17:48:12.554019
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b9e6a1d284'
+down_revision: Union[str, None] = 'a4d7c2e9f610'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    branches = op.create_table('branches',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('code', sa.String(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_branches_id'), 'branches', ['id'], unique=False)
+    op.create_index(op.f('ix_branches_code'), 'branches', ['code'], unique=True)
+
+    # Филиалы из строкового поля book_copies.branch, "main" - основной
+    bind = op.get_bind()
+    codes = {code for code, in bind.execute(sa.text("SELECT DISTINCT branch FROM book_copies"))}
+    codes.add('main')
+    now = datetime.utcnow()
+    op.bulk_insert(branches, [
+        {'code': code, 'name': 'Основной филиал' if code == 'main' else code, 'created_at': now}
+        for code in sorted(codes)
+    ])
+
+    op.add_column('book_copies', sa.Column('branch_id', sa.Integer(), nullable=True))
+    op.execute(
+        "UPDATE book_copies SET branch_id = "
+        "(SELECT id FROM branches WHERE branches.code = book_copies.branch)"
+    )
+    with op.batch_alter_table('book_copies') as batch_op:
+        batch_op.alter_column('branch_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.drop_column('branch')
+        batch_op.create_foreign_key('book_copies_branch_id_fkey', 'branches', ['branch_id'], ['id'])
+    op.create_index(
+        'ix_book_copies_branch_claim', 'book_copies', ['branch_id', 'book_id', 'status', 'id'], unique=False
+    )
+
+    main_branch = "(SELECT id FROM branches WHERE code = 'main')"
+    for table in ('borrowed_books', 'borrowed_books_archive'):
+        op.add_column(table, sa.Column('branch_id', sa.Integer(), nullable=True))
+        op.execute(
+            f"UPDATE {table} SET branch_id = COALESCE("
+            f"(SELECT branch_id FROM book_copies WHERE book_copies.id = {table}.copy_id), {main_branch})"
+        )
+    if bind.dialect.name != 'sqlite':
+        op.create_foreign_key(
+            'borrowed_books_branch_id_fkey', 'borrowed_books', 'branches', ['branch_id'], ['id']
+        )
+    op.create_index('ix_borrowed_books_branch_id', 'borrowed_books', ['branch_id', 'id'], unique=False)
+    op.create_index(
+        'ix_borrowed_books_branch_active_reader', 'borrowed_books', ['branch_id', 'reader_id'], unique=False,
+        postgresql_where=sa.text('return_date IS NULL'),
+        sqlite_where=sa.text('return_date IS NULL'),
+    )
+    op.create_index(
+        'ix_borrowed_books_archive_branch_id', 'borrowed_books_archive',
+        ['branch_id', 'reader_id', 'borrow_date'], unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_borrowed_books_archive_branch_id', table_name='borrowed_books_archive')
+    op.drop_index('ix_borrowed_books_branch_active_reader', table_name='borrowed_books')
+    op.drop_index('ix_borrowed_books_branch_id', table_name='borrowed_books')
+    if op.get_bind().dialect.name != 'sqlite':
+        op.drop_constraint('borrowed_books_branch_id_fkey', 'borrowed_books', type_='foreignkey')
+    op.drop_column('borrowed_books_archive', 'branch_id')
+    op.drop_column('borrowed_books', 'branch_id')
+
+    op.drop_index('ix_book_copies_branch_claim', table_name='book_copies')
+    op.add_column('book_copies', sa.Column('branch', sa.String(), nullable=True))
+    op.execute(
+        "UPDATE book_copies SET branch = "
+        "(SELECT code FROM branches WHERE branches.id = book_copies.branch_id)"
+    )
+    with op.batch_alter_table('book_copies') as batch_op:
+        batch_op.drop_constraint('book_copies_branch_id_fkey', type_='foreignkey')
+        batch_op.drop_column('branch_id')
+        batch_op.alter_column('branch', existing_type=sa.String(), nullable=False)
+
+    op.drop_index(op.f('ix_branches_code'), table_name='branches')
+    op.drop_index(op.f('ix_branches_id'), table_name='branches')
+    op.drop_table('branches')
@@ -0,0 +1,135 @@
+import struct
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Type
+
+import cbor2
+import msgpack
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+MSGPACK = "application/msgpack"
+CBOR = "application/cbor"
+JSON = "application/json"
+
+_MEDIA_TYPES = {
+    "application/msgpack": MSGPACK,
+    "application/x-msgpack": MSGPACK,
+    "application/vnd.msgpack": MSGPACK,
+    "application/cbor": CBOR,
+    "application/json": JSON,
+    "*/*": JSON,
+    "application/*": JSON,
+}
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """Формат ответа по заголовку Accept; при равном q выигрывает JSON."""
+    if not accept:
+        return JSON
+    weights: Dict[str, float] = {}
+    for part in accept.split(","):
+        media_type, *params = [piece.strip() for piece in part.split(";")]
+        target = _MEDIA_TYPES.get(media_type.lower())
+        if target is None:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[target] = max(weights.get(target, 0.0), q)
+    json_q = weights.get(JSON, 0.0)
+    best = max((MSGPACK, CBOR), key=lambda media_type: weights.get(media_type, 0.0))
+    return best if weights.get(best, 0.0) > json_q else JSON
+
+
+def _plain(value: Any) -> Any:
+    # Те же представления, что и в JSON-ответах
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def _cbor_head(major: int, length: int) -> bytes:
+    if length < 24:
+        return bytes((major << 5 | length,))
+    if length < 0x100:
+        return struct.pack(">BB", major << 5 | 24, length)
+    if length < 0x10000:
+        return struct.pack(">BH", major << 5 | 25, length)
+    if length < 0x100000000:
+        return struct.pack(">BI", major << 5 | 26, length)
+    return struct.pack(">BQ", major << 5 | 27, length)
+
+
+def _getter(rows: Sequence[Any]) -> Callable[[Any, str], Any]:
+    if rows and isinstance(rows[0], dict):
+        return dict.get
+    return getattr
+
+
+def encode_rows(rows: Sequence[Any], fields: Sequence[str], media_type: str) -> bytes:
+    """Кодирует список строк как массив объектов с полями ``fields``.
+
+    Заголовки массива и объектов и ключи кодируются один раз, затем
+    значения каждой строки дописываются напрямую из атрибутов ORM, без
+    промежуточного словаря на строку.
+    """
+    get = _getter(rows)
+    parts: List[bytes] = []
+    if media_type == MSGPACK:
+        packer = msgpack.Packer()
+        parts.append(packer.pack_array_header(len(rows)))
+        head = packer.pack_map_header(len(fields))
+        keys = [packer.pack(field) for field in fields]
+        pack = packer.pack
+        for row in rows:
+            parts.append(head)
+            for key, field in zip(keys, fields):
+                parts.append(key)
+                parts.append(pack(_plain(get(row, field))))
+    elif media_type == CBOR:
+        parts.append(_cbor_head(4, len(rows)))
+        head = _cbor_head(5, len(fields))
+        keys = [cbor2.dumps(field) for field in fields]
+        dumps = cbor2.dumps
+        for row in rows:
+            parts.append(head)
+            for key, field in zip(keys, fields):
+                parts.append(key)
+                parts.append(dumps(_plain(get(row, field))))
+    else:
+        raise ValueError(f"Неподдерживаемый формат: {media_type}")
+    return b"".join(parts)
+
+
+def list_response(
+    request: Request,
+    response: Response,
+    rows: Sequence[Any],
+    schema: Type[BaseModel],
+    fields: Optional[Iterable[str]] = None,
+) -> Any:
+    """Список в формате из Accept: JSON как раньше, либо MessagePack/CBOR.
+
+    Набор и порядок полей берутся из той же схемы, что и для JSON.
+    """
+    media_type = negotiate(request.headers.get("accept"))
+    if media_type == JSON:
+        response.headers["Vary"] = "Accept"
+        return rows
+    names = tuple(fields) if fields is not None else tuple(schema.model_fields)
+    return Response(
+        content=encode_rows(rows, names, media_type),
+        media_type=media_type,
+        headers={**response.headers, "Vary": "Accept"},
+    )
@@ -0,0 +1,122 @@
+import hashlib
+import json
+from typing import Callable, Optional
+
+from fastapi import Depends, Header, HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.routing import APIRoute
+
+from app.crud.crud_idempotency import (
+    claim_idempotency_key, complete_idempotency_key, release_idempotency_key,
+)
+from app.database.base import SessionLocal
+from app.models.user import User
+from app.security.dependencies import get_current_active_user
+
+
+class IdempotencyReplay(Exception):
+    def __init__(self, response: Response) -> None:
+        self.response = response
+
+
+def _with_session(fn: Callable, *args, **kwargs):
+    db = SessionLocal()
+    try:
+        return fn(db, *args, **kwargs)
+    finally:
+        db.close()
+
+
+async def idempotency_guard(
+    request: Request,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+    current_user: User = Depends(get_current_active_user),
+) -> None:
+    """Проверяет Idempotency-Key у POST-запросов.
+
+    Новый ключ занимается до выполнения запроса. Повтор с тем же ключом
+    и тем же запросом получает сохраненный ответ без выполнения логики,
+    с другим запросом - 422, а пока первый запрос не завершен - 409.
+    """
+    if request.method != "POST" or idempotency_key is None:
+        return
+    
+    fingerprint = hashlib.sha256()
+    for part in (request.method.encode(), request.url.path.encode(), request.url.query.encode()):
+        fingerprint.update(part + b"\n")
+    fingerprint.update(await request.body())
+    
+    db_key, created = await run_in_threadpool(
+        _with_session, claim_idempotency_key,
+        user_id=current_user.id, key=idempotency_key, fingerprint=fingerprint.hexdigest(),
+    )
+    if created:
+        request.state.idempotency_key_id = db_key.id
+        return
+    if db_key.fingerprint != fingerprint.hexdigest():
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key уже использован с другим запросом",
+        )
+    if db_key.status_code is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Запрос с этим Idempotency-Key еще выполняется",
+        )
+    raise IdempotencyReplay(Response(
+        content=db_key.response_body,
+        status_code=db_key.status_code,
+        media_type=db_key.media_type,
+        headers={"Idempotent-Replayed": "true"},
+    ))
+
+
+class IdempotentRoute(APIRoute):
+    """Маршрут, сохраняющий ответ под ключом, занятым ``idempotency_guard``.
+
+    Сохраняются и успешные ответы, и HTTP-ошибки бизнес-логики; при
+    необработанном исключении ключ освобождается.
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def idempotent_handler(request: Request) -> Response:
+            try:
+                response = await handler(request)
+            except IdempotencyReplay as replay:
+                return replay.response
+            except HTTPException as exc:
+                await _complete(
+                    request, exc.status_code,
+                    json.dumps({"detail": exc.detail}, ensure_ascii=False).encode(),
+                    "application/json",
+                )
+                raise
+            except Exception:
+                await _release(request)
+                raise
+            
+            body = getattr(response, "body", None)
+            if body is None:
+                await _release(request)
+            else:
+                await _complete(request, response.status_code, body, response.media_type)
+            return response
+
+        return idempotent_handler
+
+
+async def _complete(request: Request, status_code: int, body: bytes, media_type: Optional[str]) -> None:
+    key_id = getattr(request.state, "idempotency_key_id", None)
+    if key_id is not None:
+        await run_in_threadpool(
+            _with_session, complete_idempotency_key,
+            key_id=key_id, status_code=status_code, body=body, media_type=media_type,
+        )
+
+
+async def _release(request: Request) -> None:
+    key_id = getattr(request.state, "idempotency_key_id", None)
+    if key_id is not None:
+        await run_in_threadpool(_with_session, release_idempotency_key, key_id=key_id)
@@ -0,0 +1,98 @@
+from datetime import date, datetime, timedelta
+from typing import Any, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.crud import crud_analytics
+from app.database.base import SessionLocal, get_db
+from app.models.user import User
+from app.schemas.analytics import CirculationDay, DemandForecast, ReaderActivity, TopBook
+from app.security.dependencies import get_current_active_user
+from app.services.demand import iter_demand_csv
+
+router = APIRouter()
+
+MAX_PERIOD_DAYS = 366
+
+
+def _last_days(days: int):
+    date_to = datetime.utcnow().date()
+    return date_to - timedelta(days=days - 1), date_to
+
+
+@router.get("/top-books", response_model=List[TopBook])
+def get_top_books(
+    days: int = Query(30, ge=1, le=MAX_PERIOD_DAYS),
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    date_from, date_to = _last_days(days)
+    return crud_analytics.get_top_books(db, date_from=date_from, date_to=date_to, limit=limit)
+
+
+@router.get("/readers", response_model=ReaderActivity)
+def get_reader_activity(
+    days: int = Query(30, ge=1, le=MAX_PERIOD_DAYS),
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    date_from, date_to = _last_days(days)
+    return crud_analytics.get_reader_activity(db, date_from=date_from, date_to=date_to, limit=limit)
+
+
+@router.get("/circulation", response_model=List[CirculationDay])
+def get_circulation(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    date_to = date_to or datetime.utcnow().date()
+    date_from = date_from or date_to - timedelta(days=29)
+    if date_from > date_to:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Начало периода должно быть раньше конца",
+        )
+    if (date_to - date_from).days >= MAX_PERIOD_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Период не может быть длиннее {MAX_PERIOD_DAYS} дней",
+        )
+    
+    return crud_analytics.get_circulation(db, date_from=date_from, date_to=date_to)
+
+
+@router.get("/demand", response_model=List[DemandForecast])
+def get_demand(
+    order: str = Query("shortage", pattern="^(shortage|surplus)$"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    return crud_analytics.get_demand_forecasts(db, order=order, skip=skip, limit=limit)
+
+
+@router.get("/demand.csv")
+def get_demand_csv(
+    order: str = Query("shortage", pattern="^(shortage|surplus)$"),
+    current_user: User = Depends(get_current_active_user)
+) -> StreamingResponse:
+    def rows():
+        # Отдельная сессия: зависимости закрываются до начала отправки ответа
+        db = SessionLocal()
+        try:
+            yield from iter_demand_csv(crud_analytics.iter_demand_forecasts(db, order=order))
+        finally:
+            db.close()
+    
+    return StreamingResponse(
+        rows(),
+        media_type="text/csv",
+        headers={"Content-Disposition": 'attachment; filename="demand.csv"'},
+    )
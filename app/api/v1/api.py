@@ -1,10 +1,25 @@
 from fastapi import APIRouter
 
-from app.api.v1 import auth, books, readers, borrowed_books
+from app.api.v1 import (
+    analytics, api_keys, audit, auth, batch, books, branches, readers, borrowed_books, catalog, changes, copies, events,
+    fines, holds, metrics
+)
 
 api_router = APIRouter()
 
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
+api_router.include_router(api_keys.router, prefix="/api-keys", tags=["api-keys"])
 api_router.include_router(books.router, prefix="/books", tags=["books"])
 api_router.include_router(readers.router, prefix="/readers", tags=["readers"])
-api_router.include_router(borrowed_books.router, prefix="/borrowed-books", tags=["borrowed-books"])
\ No newline at end of file
+api_router.include_router(borrowed_books.router, prefix="/borrowed-books", tags=["borrowed-books"])
+api_router.include_router(branches.router, prefix="/branches", tags=["branches"])
+api_router.include_router(copies.router, prefix="/copies", tags=["copies"])
+api_router.include_router(holds.router, prefix="/holds", tags=["holds"])
+api_router.include_router(fines.router, prefix="/fines", tags=["fines"])
+api_router.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
+api_router.include_router(catalog.router, prefix="/catalog", tags=["catalog"])
+api_router.include_router(changes.router, prefix="/changes", tags=["changes"])
+api_router.include_router(events.router, prefix="/events", tags=["events"])
+api_router.include_router(batch.router, prefix="/batch", tags=["batch"])
+api_router.include_router(audit.router, prefix="/audit", tags=["audit"])
+api_router.include_router(metrics.router, prefix="/metrics", tags=["metrics"])
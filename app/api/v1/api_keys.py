@@ -0,0 +1,61 @@
+from typing import Any, List
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.orm import Session
+
+from app.crud import crud_api_key
+from app.database.base import get_db
+from app.models.user import User
+from app.schemas.api_key import ApiKey, ApiKeyCreate, ApiKeyCreated
+from app.security.api_keys import api_key_cache, signing_secret
+from app.security.dependencies import get_current_active_user
+
+router = APIRouter()
+
+
+@router.post("/", response_model=ApiKeyCreated, status_code=status.HTTP_201_CREATED)
+def create_api_key(
+    api_key_in: ApiKeyCreate,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    # Иначе ключ с узкими правами мог бы выпустить себе ключ с "*"
+    if request.scope.get("api_key_scopes") is not None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Выпускать API-ключи можно только после входа по паролю",
+        )
+    db_api_key, api_key = crud_api_key.create_api_key(
+        db, user_id=current_user.id, api_key=api_key_in
+    )
+    return {
+        **ApiKey.model_validate(db_api_key, from_attributes=True).model_dump(),
+        "api_key": api_key,
+        "signing_secret": signing_secret(db_api_key.key_id),
+    }
+
+
+@router.get("/", response_model=List[ApiKey])
+def read_api_keys(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    return crud_api_key.get_api_keys(db, user_id=current_user.id)
+
+
+@router.delete("/{api_key_id}", response_model=ApiKey)
+def revoke_api_key(
+    api_key_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    db_api_key = crud_api_key.get_api_key(db, api_key_id=api_key_id)
+    if db_api_key is None or db_api_key.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="API-ключ не найден",
+        )
+    db_api_key = crud_api_key.revoke_api_key(db, db_api_key=db_api_key)
+    api_key_cache.discard(db_api_key.key_id)
+    return db_api_key
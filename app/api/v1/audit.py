@@ -0,0 +1,43 @@
+import json
+from typing import Any, List, Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.crud import crud_audit
+from app.database.base import get_db
+from app.models.user import User
+from app.schemas.audit import AuditEntry
+from app.security.dependencies import get_current_active_user
+
+router = APIRouter()
+
+
+@router.get("/", response_model=List[AuditEntry])
+def read_audit_log(
+    entity: Optional[str] = None,
+    entity_id: Optional[int] = None,
+    since: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    """Журнал выдач, возвратов и изменений фонда по возрастанию id.
+
+    События попадают сюда с задержкой фонового переноса из outbox.
+    """
+    entries = crud_audit.get_audit_log(
+        db, entity=entity, entity_id=entity_id, since=since, limit=limit
+    )
+    return [
+        {
+            "id": entry.id,
+            "event_type": entry.event_type,
+            "entity": entry.entity,
+            "entity_id": entry.entity_id,
+            "payload": json.loads(entry.payload),
+            "occurred_at": entry.occurred_at,
+            "recorded_at": entry.recorded_at,
+        }
+        for entry in entries
+    ]
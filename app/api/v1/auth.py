@@ -1,21 +1,37 @@
-from datetime import timedelta
-from typing import Any
+from datetime import datetime
+from typing import Any, Dict, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
-from app.core.config import settings
-from app.crud.crud_user import authenticate_user, create_user, get_user_by_email
+from app.crud import crud_refresh_token
+from app.crud.crud_user import authenticate_user, create_user, get_user_by_email, get_user_by_id
 from app.database.base import get_db
-from app.schemas.auth import Login
+from app.models.user import User as UserModel
+from app.schemas.auth import Login, RefreshRequest
 from app.schemas.token import Token
 from app.schemas.user import User, UserCreate
-from app.security.jwt import create_access_token
+from app.security.dependencies import optional_oauth2_scheme
+from app.security.jwt import create_user_access_token, decode_token
+from app.services.revocation import revocation_list
 
 router = APIRouter()
 
 
+def _issue_tokens(db: Session, user: UserModel) -> Dict[str, Any]:
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Пользователь неактивен",
+        )
+    return {
+        "access_token": create_user_access_token(user),
+        "token_type": "bearer",
+        "refresh_token": crud_refresh_token.create_refresh_token(db, user_id=user.id),
+    }
+
+
 @router.post("/register", response_model=User, status_code=status.HTTP_201_CREATED)
 def register_user(user_in: UserCreate, db: Session = Depends(get_db)) -> Any:
     user = get_user_by_email(db, email=user_in.email)
@@ -39,11 +55,7 @@ def login_for_access_token(
             detail="Неверный email или пароль",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        subject=user.id, expires_delta=access_token_expires
-    )
-    return {"access_token": access_token, "token_type": "bearer"}
+    return _issue_tokens(db, user)
 
 
 @router.post("/login/oauth", response_model=Token)
@@ -57,8 +69,60 @@ def login_oauth(
             detail="Неверный email или пароль",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        subject=user.id, expires_delta=access_token_expires
+    return _issue_tokens(db, user)
+
+
+@router.post("/refresh", response_model=Token)
+def refresh_tokens(refresh_in: RefreshRequest, db: Session = Depends(get_db)) -> Any:
+    invalid_token = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Недействительный refresh-токен",
+        headers={"WWW-Authenticate": "Bearer"},
     )
-    return {"access_token": access_token, "token_type": "bearer"} 
\ No newline at end of file
+    db_token = crud_refresh_token.get_refresh_token(db, token=refresh_in.refresh_token)
+    if db_token is None:
+        raise invalid_token
+    
+    # Повторное использование отозванного токена - признак утечки
+    if db_token.revoked_at is not None:
+        crud_refresh_token.revoke_family(db, family=db_token.family)
+        raise invalid_token
+    
+    user = get_user_by_id(db, user_id=db_token.user_id)
+    if user is None or not user.is_active:
+        crud_refresh_token.revoke_family(db, family=db_token.family)
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Пользователь неактивен",
+        )
+    
+    refresh_token = crud_refresh_token.rotate_refresh_token(db, db_token=db_token)
+    if refresh_token is None:
+        crud_refresh_token.revoke_family(db, family=db_token.family)
+        raise invalid_token
+    
+    return {
+        "access_token": create_user_access_token(user),
+        "token_type": "bearer",
+        "refresh_token": refresh_token,
+    }
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(
+    refresh_in: Optional[RefreshRequest] = None,
+    token: Optional[str] = Depends(optional_oauth2_scheme),
+    db: Session = Depends(get_db),
+) -> Response:
+    """Отзывает переданный access-токен и цепочку refresh-токена."""
+    if token is not None:
+        token_data = decode_token(token)
+        if token_data is not None and token_data.jti is not None:
+            revocation_list.revoke(
+                db, jti=token_data.jti, expires_at=datetime.utcfromtimestamp(token_data.exp)
+            )
+    if refresh_in is not None:
+        db_token = crud_refresh_token.get_refresh_token(db, token=refresh_in.refresh_token)
+        if db_token is not None:
+            crud_refresh_token.revoke_family(db, family=db_token.family)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,159 @@
+import asyncio
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from sqlalchemy.orm import Session
+from starlette.exceptions import HTTPException
+
+from app.core.config import settings
+from app.database.base import get_db
+from app.middleware.rate_limit import take_token
+from app.models.user import User
+from app.schemas.batch import BatchItem, BatchRequest, BatchResponse
+from app.security.api_keys import scope_allows
+from app.security.dependencies import get_current_active_user
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+# Потоки событий не завершаются, вложенные пакеты не нужны, а вход
+# и обновление токенов пакету ни к чему: он уже аутентифицирован
+_FORBIDDEN_PREFIXES = ("/batch", "/events", "/auth")
+
+
+async def _dispatch(
+    request: Request,
+    item: BatchItem,
+    user: User,
+    db: Session,
+    api_key_scopes: Optional[Tuple[str, ...]] = None,
+) -> Dict[str, Any]:
+    """Выполняет подзапрос через роутер приложения, минуя middleware.
+
+    Пакет по API-ключу получает права ключа: подзапрос вне его scope
+    отклоняется с 403, как и прямой запрос. Каждый подзапрос списывает
+    токен из ведра лимитера своего класса и получает 429, если оно пусто.
+    """
+    path, _, query = item.path.partition("?")
+    if path.startswith(_FORBIDDEN_PREFIXES):
+        return {"status": 400, "body": {"detail": "Этот путь нельзя вызывать в пакете"}}
+    full_path = f"{settings.API_V1_STR}{path}"
+    if api_key_scopes is not None and not scope_allows(api_key_scopes, item.method, full_path):
+        return {"status": 403, "body": {"detail": "Недостаточно прав у API-ключа"}}
+    allowed, _ = await take_token(request.scope, item.method, full_path)
+    if not allowed:
+        return {"status": 429, "body": {"detail": "Слишком много запросов"}}
+    
+    body = json.dumps(item.body).encode() if item.body is not None else b""
+    # Ответ пакета - JSON, поэтому бинарные форматы подзапросам не отдаем
+    headers = [
+        (name.lower().encode(), value.encode())
+        for name, value in item.headers.items()
+        if name.lower() != "accept"
+    ]
+    headers += [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    scope = {
+        "type": "http",
+        "asgi": request.scope.get("asgi", {"version": "3.0"}),
+        "http_version": "1.1",
+        "method": item.method,
+        "scheme": request.scope.get("scheme", "http"),
+        "server": request.scope.get("server"),
+        "client": request.scope.get("client"),
+        "root_path": request.scope.get("root_path", ""),
+        "path": full_path,
+        "raw_path": full_path.encode(),
+        "query_string": query.encode(),
+        "headers": headers,
+        "app": request.app,
+        "batch_user": user,
+        "batch_db": db,
+    }
+    if api_key_scopes is not None:
+        scope["api_key_scopes"] = api_key_scopes
+    
+    received = False
+
+    async def receive() -> Dict[str, Any]:
+        nonlocal received
+        if received:
+            return {"type": "http.disconnect"}
+        received = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    status_code = 500
+    chunks: List[bytes] = []
+    content_type: Optional[str] = None
+
+    async def send(message: Dict[str, Any]) -> None:
+        nonlocal status_code, content_type
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+            for name, value in message.get("headers", []):
+                if name.lower() == b"content-type":
+                    content_type = value.decode()
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    try:
+        await request.app.router(scope, receive, send)
+    except HTTPException as exc:
+        return {"status": exc.status_code, "body": {"detail": exc.detail}}
+    except RequestValidationError as exc:
+        return {"status": 422, "body": {"detail": jsonable_encoder(exc.errors())}}
+    except Exception:
+        logger.exception("Ошибка подзапроса %s %s", item.method, item.path)
+        db.rollback()
+        return {"status": 500, "body": {"detail": "Внутренняя ошибка сервера"}}
+    
+    content = b"".join(chunks)
+    if not content:
+        return {"status": status_code, "body": None}
+    if content_type and content_type.startswith("application/json"):
+        return {"status": status_code, "body": json.loads(content)}
+    return {"status": status_code, "body": content.decode(errors="replace")}
+
+
+@router.post("/", response_model=BatchResponse)
+async def run_batch(
+    batch_in: BatchRequest,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    """Выполняет подзапросы по порядку с одной аутентификацией.
+
+    Запись идет последовательно в сессии пакета. Подряд идущие GET
+    выполняются параллельно (не больше ``BATCH_MAX_PARALLEL``), каждый в
+    своей сессии: одну сессию нельзя использовать из нескольких потоков.
+    """
+    scopes = request.scope.get("api_key_scopes")
+    bind = db.get_bind()
+    semaphore = asyncio.Semaphore(settings.BATCH_MAX_PARALLEL)
+
+    async def read(item: BatchItem) -> Dict[str, Any]:
+        async with semaphore:
+            read_db = Session(bind=bind, autoflush=False)
+            try:
+                return await _dispatch(request, item, current_user, read_db, scopes)
+            finally:
+                read_db.close()
+
+    responses: List[Dict[str, Any]] = []
+    reads: List[BatchItem] = []
+    for item in batch_in.requests + [None]:
+        if item is not None and item.method == "GET":
+            reads.append(item)
+            continue
+        if len(reads) == 1:
+            responses.append(await _dispatch(request, reads[0], current_user, db, scopes))
+        elif reads:
+            responses.extend(await asyncio.gather(*(read(read_item) for read_item in reads)))
+        reads = []
+        if item is not None:
+            responses.append(await _dispatch(request, item, current_user, db, scopes))
+    return {"responses": responses}
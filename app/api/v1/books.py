@@ -1,31 +1,140 @@
-from typing import Any, List
+import base64
+import binascii
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
 
-from app.crud import crud_book
+from app.api.formats import JSON, list_response, negotiate
+from app.api.idempotency import IdempotentRoute, idempotency_guard
+from app.core.config import settings
+from app.crud import crud_book, crud_branch
 from app.database.base import get_db
+from app.models.book import Book as BookModel
 from app.models.user import User
-from app.schemas.book import Book, BookCreate, BookUpdate
+from app.schemas.book import (
+    BOOK_FIELDS,
+    BOOK_LIST_DEFAULT_FIELDS,
+    BOOK_SORT_FIELDS,
+    Book,
+    BookCreate,
+    BookDuplicateCheck,
+    BookDuplicateQuery,
+    BookFields,
+    BookSuggestion,
+    BookUpdate,
+    SimilarBook,
+)
 from app.security.dependencies import get_current_active_user
+from app.services.autocomplete import autocomplete_index
+from app.services.duplicates import DuplicateIndex, duplicate_index, refresh_duplicate_index
+from app.services.recommendations import similar_books
+from app.services.single_flight import render_shared
 
-router = APIRouter()
+router = APIRouter(route_class=IdempotentRoute, dependencies=[Depends(idempotency_guard)])
 
 
-@router.get("/", response_model=List[Book])
+def _parse_fields(fields: Optional[str], default: Sequence[str]) -> Tuple[str, ...]:
+    if fields is None:
+        return tuple(default)
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = sorted(requested.difference(BOOK_FIELDS))
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Неизвестные поля: {', '.join(unknown)}",
+        )
+    return tuple(field for field in BOOK_FIELDS if field == "id" or field in requested)
+
+
+def _encode_cursor(sort: str, book: BookModel) -> str:
+    payload = json.dumps([sort, getattr(book, sort.lstrip("-")), book.id])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def _decode_cursor(cursor: str, sort: str) -> Tuple[Any, int]:
+    try:
+        cursor_sort, value, book_id = json.loads(base64.urlsafe_b64decode(cursor))
+    except (binascii.Error, ValueError, TypeError):
+        cursor_sort = None
+    if cursor_sort != sort:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Некорректный курсор",
+        )
+    return value, book_id
+
+
+def _describe_duplicates(db: Session, matches: List[Tuple[int, float]]) -> List[Dict[str, Any]]:
+    books = {
+        book.id: book
+        for book in crud_book.get_books_by_ids(
+            db, [book_id for book_id, _ in matches], fields=("id", "title", "author")
+        )
+    }
+    return [
+        {"id": book_id, "title": books[book_id].title, "author": books[book_id].author, "score": score}
+        for book_id, score in matches
+        if book_id in books
+    ]
+
+
+def _pick_fields(book: BookModel, fields: Sequence[str]) -> Dict[str, Any]:
+    return {field: getattr(book, field) for field in fields}
+
+
+@router.get(
+    "/", response_model=List[BookFields], response_model_exclude_unset=True
+)
 def read_books(
+    request: Request,
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
+    fields: Optional[str] = None,
+    author: Optional[str] = None,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    available_only: bool = False,
+    sort: str = "id",
+    cursor: Optional[str] = None,
+    branch_id: Optional[int] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ) -> Any:
-    books = crud_book.get_books(db, skip=skip, limit=limit)
-    return books
+    if sort.lstrip("-") not in BOOK_SORT_FIELDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Сортировка возможна по полям: {', '.join(BOOK_SORT_FIELDS)}",
+        )
+    selected = _parse_fields(fields, default=BOOK_LIST_DEFAULT_FIELDS)
+    after = _decode_cursor(cursor, sort) if cursor else None
+    books = crud_book.get_books(
+        db,
+        skip=skip,
+        limit=limit,
+        fields=selected,
+        author=author,
+        year_from=year_from,
+        year_to=year_to,
+        available_only=available_only,
+        sort=sort,
+        after=after,
+        branch_id=branch_id,
+    )
+    if books and len(books) == limit:
+        response.headers["X-Next-Cursor"] = _encode_cursor(sort, books[-1])
+    if negotiate(request.headers.get("accept")) == JSON:
+        response.headers["Vary"] = "Accept"
+        return [_pick_fields(book, selected) for book in books]
+    return list_response(request, response, books, BookFields, fields=selected)
 
 
 @router.post("/", response_model=Book, status_code=status.HTTP_201_CREATED)
 def create_book(
     book_in: BookCreate,
+    check_duplicates: bool = False,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ) -> Any:
@@ -36,23 +145,137 @@ def create_book(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Книга с таким ISBN уже существует",
             )
+    if book_in.branch_id is not None and not crud_branch.get_branch(db, branch_id=book_in.branch_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Филиал не найден",
+        )
+    if check_duplicates:
+        refresh_duplicate_index(db)
+        duplicates = duplicate_index.find(book_in.title, book_in.author)
+        if duplicates:
+            ids = ", ".join(str(book_id) for book_id, _ in duplicates)
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=(
+                    f"Похожие книги уже есть в каталоге (id: {ids}). "
+                    "Чтобы все равно добавить книгу, повторите запрос без check_duplicates"
+                ),
+            )
     book = crud_book.create_book(db, book=book_in)
     return book
 
 
-@router.get("/{book_id}", response_model=Book)
+@router.post("/duplicates", response_model=List[BookDuplicateCheck])
+def check_duplicates(
+    books_in: List[BookDuplicateQuery] = Body(..., max_length=1000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    refresh_duplicate_index(db)
+    # Дубликаты внутри самого пакета ищутся по временному индексу
+    batch_index = DuplicateIndex()
+    batch_index.load((position, book.title, book.author) for position, book in enumerate(books_in))
+    
+    result = []
+    for position, book in enumerate(books_in):
+        matches = duplicate_index.find(book.title, book.author)
+        batch_matches = batch_index.find(book.title, book.author, exclude=position, limit=len(books_in))
+        result.append({
+            "position": position,
+            "duplicates": _describe_duplicates(db, matches),
+            "batch_duplicates": sorted(other for other, _ in batch_matches),
+        })
+    return result
+
+
+@router.get("/autocomplete", response_model=List[BookSuggestion])
+def autocomplete_books(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=autocomplete_index.top_k),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    return [
+        {"text": text, "field": field, "book_id": book_id}
+        for text, field, book_id in autocomplete_index.suggest(q, limit=limit)
+    ]
+
+
+@router.get("/isbn/{isbn}", response_model=Book)
+def read_book_by_isbn(
+    isbn: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    def render() -> Optional[bytes]:
+        book = crud_book.get_book_by_isbn(db, isbn=isbn)
+        if book is None:
+            return None
+        return Book.model_validate(book, from_attributes=True).model_dump_json().encode()
+    
+    content = render_shared(db, "book_isbn_response", isbn, render)
+    if content is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Книга не найдена",
+        )
+    return Response(content=content, media_type="application/json")
+
+
+@router.get(
+    "/{book_id}", response_model=BookFields, response_model_exclude_unset=True
+)
 def read_book(
     book_id: int,
+    fields: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ) -> Any:
-    book = crud_book.get_book(db, book_id=book_id)
+    selected = _parse_fields(fields, default=BOOK_FIELDS)
+    
+    def render() -> Optional[bytes]:
+        book = crud_book.get_book(db, book_id=book_id, fields=selected)
+        if book is None:
+            return None
+        return BookFields(**_pick_fields(book, selected)).model_dump_json(exclude_unset=True).encode()
+    
+    # Одновременные запросы одной книги получают один и тот же готовый ответ
+    content = render_shared(db, "book_response", (book_id, selected), render)
+    if content is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Книга не найдена",
+        )
+    return Response(content=content, media_type="application/json")
+
+
+@router.get("/{book_id}/similar", response_model=List[SimilarBook])
+def read_similar_books(
+    book_id: int,
+    limit: int = Query(10, ge=1, le=settings.RECOMMENDATIONS_TOP_K),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    book = crud_book.get_book(db, book_id=book_id, fields=("id",))
     if book is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Книга не найдена",
         )
-    return book
+    
+    # Соседи берутся из заранее посчитанной сборки, таблица выдач не читается
+    similar = similar_books.similar(book_id, limit=limit)
+    books = {
+        book.id: book
+        for book in crud_book.get_books_by_ids(
+            db, [neighbor for neighbor, _ in similar], fields=("id", "title", "author")
+        )
+    }
+    return [
+        {"id": neighbor, "title": books[neighbor].title, "author": books[neighbor].author, "score": score}
+        for neighbor, score in similar
+        if neighbor in books
+    ]
 
 
 @router.put("/{book_id}", response_model=Book)
@@ -93,4 +316,10 @@ def delete_book(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Книга не найдена",
         )
-    crud_book.delete_book(db, db_book=book)
\ No newline at end of file
+    try:
+        crud_book.delete_book(db, db_book=book)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
\ No newline at end of file
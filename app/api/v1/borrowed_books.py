@@ -1,23 +1,25 @@
-from typing import Any, List
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
 
-from app.crud import crud_borrowed_book, crud_book, crud_reader
-from app.database.base import get_db
+from app.api.formats import list_response
+from app.api.idempotency import IdempotentRoute, idempotency_guard
+from app.crud import crud_borrowed_book, crud_book, crud_branch, crud_hold, crud_reader
+from app.database.base import get_branch_db
 from app.models.user import User
 from app.schemas.borrowed_book import (
     BorrowBookCreate, BorrowedBook, ReturnBook, BorrowedBookWithDetails
 )
 from app.security.dependencies import get_current_active_user
 
-router = APIRouter()
+router = APIRouter(route_class=IdempotentRoute, dependencies=[Depends(idempotency_guard)])
 
 
 @router.post("/borrow", response_model=BorrowedBook, status_code=status.HTTP_201_CREATED)
 def borrow_book(
     borrow_data: BorrowBookCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_branch_db),
     current_user: User = Depends(get_current_active_user)
 ) -> Any:
     book = crud_book.get_book(db, book_id=borrow_data.book_id)
@@ -34,7 +36,16 @@ def borrow_book(
             detail="Читатель не найден",
         )
     
-    if book.quantity <= 0:
+    if borrow_data.branch_id is not None and not crud_branch.get_branch(db, branch_id=borrow_data.branch_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Филиал не найден",
+        )
+    
+    ready_hold = crud_hold.get_ready_hold(
+        db, book_id=borrow_data.book_id, reader_id=borrow_data.reader_id
+    )
+    if book.quantity <= 0 and not ready_hold:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Нет доступных экземпляров книги",
@@ -58,14 +69,21 @@ def borrow_book(
             detail="Эта книга уже выдана этому читателю",
         )
     
-    borrowed_book = crud_borrowed_book.borrow_book(db, borrow_data=borrow_data)
+    try:
+        borrowed_book = crud_borrowed_book.borrow_book(db, borrow_data=borrow_data)
+    except ValueError as e:
+        # Последний экземпляр успели выдать параллельным запросом
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
     return borrowed_book
 
 
 @router.post("/return", response_model=BorrowedBook)
 def return_book(
     return_data: ReturnBook,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_branch_db),
     current_user: User = Depends(get_current_active_user)
 ) -> Any:
     borrow = crud_borrowed_book.get_borrowed_book(db, borrow_id=return_data.borrow_id)
@@ -87,8 +105,11 @@ def return_book(
 
 @router.get("/reader/{reader_id}", response_model=List[BorrowedBook])
 def get_active_borrowed_books_by_reader(
+    request: Request,
+    response: Response,
     reader_id: int,
-    db: Session = Depends(get_db),
+    branch_id: Optional[int] = None,
+    db: Session = Depends(get_branch_db),
     current_user: User = Depends(get_current_active_user)
 ) -> Any:
     reader = crud_reader.get_reader(db, reader_id=reader_id)
@@ -99,19 +120,46 @@ def get_active_borrowed_books_by_reader(
         )
     
     borrowed_books = crud_borrowed_book.get_active_borrowed_books_by_reader(
-        db, reader_id=reader_id
+        db, reader_id=reader_id, branch_id=branch_id
+    )
+    return list_response(request, response, borrowed_books, BorrowedBook)
+
+
+@router.get("/reader/{reader_id}/history", response_model=List[BorrowedBook])
+def get_reader_history(
+    request: Request,
+    response: Response,
+    reader_id: int,
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    branch_id: Optional[int] = None,
+    db: Session = Depends(get_branch_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    reader = crud_reader.get_reader(db, reader_id=reader_id)
+    if not reader:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Читатель не найден",
+        )
+    
+    history = crud_borrowed_book.get_reader_history(
+        db, reader_id=reader_id, skip=skip, limit=limit, branch_id=branch_id
     )
-    return borrowed_books
+    return list_response(request, response, history, BorrowedBook)
 
 
 @router.get("/", response_model=List[BorrowedBook])
 def get_all_borrowed_books(
+    request: Request,
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
-    db: Session = Depends(get_db),
+    branch_id: Optional[int] = None,
+    db: Session = Depends(get_branch_db),
     current_user: User = Depends(get_current_active_user)
 ) -> Any:
     borrowed_books = crud_borrowed_book.get_all_borrowed_books(
-        db, skip=skip, limit=limit
+        db, skip=skip, limit=limit, branch_id=branch_id
     )
-    return borrowed_books
\ No newline at end of file
+    return list_response(request, response, borrowed_books, BorrowedBook)
\ No newline at end of file
@@ -0,0 +1,35 @@
+from typing import Any, List
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.api.idempotency import IdempotentRoute, idempotency_guard
+from app.crud import crud_branch
+from app.database.base import get_db
+from app.models.user import User
+from app.schemas.branch import Branch, BranchCreate
+from app.security.dependencies import get_current_active_user
+
+router = APIRouter(route_class=IdempotentRoute, dependencies=[Depends(idempotency_guard)])
+
+
+@router.post("/", response_model=Branch, status_code=status.HTTP_201_CREATED)
+def create_branch(
+    branch_in: BranchCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    if crud_branch.get_branch_by_code(db, code=branch_in.code):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Филиал с таким кодом уже существует",
+        )
+    return crud_branch.create_branch(db, branch=branch_in)
+
+
+@router.get("/", response_model=List[Branch])
+def read_branches(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    return crud_branch.get_branches(db)
@@ -0,0 +1,66 @@
+import hashlib
+from typing import Any, Dict, List
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database.base import get_db
+from app.schemas.catalog import CatalogBook
+from app.services.catalog import catalog_snapshot
+
+router = APIRouter()
+
+
+def _cached_response(request: Request, content: Any) -> Response:
+    """Ответ с ETag от хеша тела.
+
+    Снимки каталога у воркеров обновляются независимо, поэтому ETag
+    строится по содержимому, а не по счетчику процесса: одинаковый ETag
+    у любого воркера означает одинаковое тело.
+    """
+    response = JSONResponse(content=content)
+    etag = f'"{hashlib.sha256(response.body).hexdigest()[:32]}"'
+    response.headers["Cache-Control"] = (
+        f"public, max-age={settings.CATALOG_MAX_AGE}, "
+        f"stale-while-revalidate={settings.CATALOG_STALE_WHILE_REVALIDATE}"
+    )
+    response.headers["ETag"] = etag
+    # Сжатие ослабляет ETag до W/"...", для If-None-Match это тот же тег
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={"Cache-Control": response.headers["Cache-Control"], "ETag": etag},
+        )
+    return response
+
+
+@router.get("/books", response_model=List[CatalogBook])
+def read_catalog(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    available_only: bool = False,
+    db: Session = Depends(get_db),
+) -> Any:
+    catalog_snapshot.refresh(db)
+    books = catalog_snapshot.page(skip=skip, limit=limit, available_only=available_only)
+    return _cached_response(request, books)
+
+
+@router.get("/books/{book_id}", response_model=CatalogBook)
+def read_catalog_book(
+    book_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+) -> Any:
+    catalog_snapshot.refresh(db)
+    book = catalog_snapshot.get(book_id)
+    if book is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Книга не найдена",
+        )
+    return _cached_response(request, book)
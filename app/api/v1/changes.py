@@ -0,0 +1,86 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from app.crud import crud_change
+from app.database.base import branch_sessions, get_db
+from app.models.change import Change
+from app.models.user import User
+from app.schemas.book import Book
+from app.schemas.borrowed_book import BorrowedBook
+from app.schemas.change import ChangeFeed
+from app.schemas.reader import Reader
+from app.security.dependencies import get_current_active_user
+from app.services.change_feed import change_watermark
+
+router = APIRouter()
+
+_ENTITY_SCHEMAS = {"book": Book, "reader": Reader, "borrowed_book": BorrowedBook}
+
+
+def _entity_data(
+    db: Session, changes: List[Change], branch_id: Optional[int] = None
+) -> Dict[Tuple[Optional[int], str, int], Dict[str, Any]]:
+    current = crud_change.get_changed_entities(db, changes)
+    return {
+        (branch_id, entity, entity_id): _ENTITY_SCHEMAS[entity].model_validate(
+            obj, from_attributes=True
+        ).model_dump()
+        for (entity, entity_id), obj in current.items()
+    }
+
+
+@router.get("/", response_model=ChangeFeed)
+def read_changes(
+    since: int = Query(0, ge=0),
+    limit: int = Query(500, ge=1, le=5000),
+    entities: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    selected = None
+    if entities:
+        selected = [entity.strip() for entity in entities.split(",") if entity.strip()]
+        unknown = sorted(set(selected).difference(crud_change.CHANGE_ENTITIES))
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Неизвестные сущности: {', '.join(unknown)}",
+            )
+    
+    # Дальше водяного знака еще могут появиться записи с меньшими id
+    until = change_watermark.advance(db)
+    changes = crud_change.get_changes(
+        db, since=since, limit=limit, entities=selected, until=until
+    )
+    data = _entity_data(db, [change for change in changes if change.branch_id is None])
+    # Выдачи и экземпляры из отдельных БД филиалов читаются из этих БД
+    for branch_id in {change.branch_id for change in changes if change.branch_id is not None}:
+        factory = branch_sessions.get(branch_id)
+        if factory is None:
+            continue
+        branch_db = factory()
+        try:
+            data.update(_entity_data(
+                branch_db, [change for change in changes if change.branch_id == branch_id], branch_id
+            ))
+        finally:
+            branch_db.close()
+    
+    entries = []
+    for change in changes:
+        entries.append({
+            "seq": change.id,
+            "entity": change.entity,
+            "entity_id": change.entity_id,
+            "operation": change.operation,
+            "branch_id": change.branch_id,
+            "data": data.get((change.branch_id, change.entity, change.entity_id)),
+        })
+    
+    return {
+        "changes": entries,
+        "next_since": changes[-1].id if changes else since,
+        "has_more": len(changes) == limit,
+    }
@@ -0,0 +1,73 @@
+from typing import Any, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.api.idempotency import IdempotentRoute, idempotency_guard
+from app.crud import crud_book, crud_branch, crud_copy
+from app.database.base import get_branch_db
+from app.models.user import User
+from app.schemas.copy import BookCopy, BookCopyCreate
+from app.security.dependencies import get_current_active_user
+
+router = APIRouter(route_class=IdempotentRoute, dependencies=[Depends(idempotency_guard)])
+
+
+@router.post("/", response_model=BookCopy, status_code=status.HTTP_201_CREATED)
+def add_copy(
+    copy_in: BookCopyCreate,
+    db: Session = Depends(get_branch_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    book = crud_book.get_book(db, book_id=copy_in.book_id)
+    if not book:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Книга не найдена",
+        )
+    
+    if copy_in.branch_id is not None and not crud_branch.get_branch(db, branch_id=copy_in.branch_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Филиал не найден",
+        )
+    
+    if crud_copy.get_copy_by_barcode(db, barcode=copy_in.barcode):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Экземпляр с таким штрихкодом уже существует",
+        )
+    
+    return crud_book.add_copy(db, db_book=book, copy_in=copy_in)
+
+
+@router.get("/book/{book_id}", response_model=List[BookCopy])
+def get_book_copies(
+    book_id: int,
+    branch_id: Optional[int] = None,
+    db: Session = Depends(get_branch_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    book = crud_book.get_book(db, book_id=book_id)
+    if not book:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Книга не найдена",
+        )
+    
+    return crud_copy.get_copies_by_book(db, book_id=book_id, branch_id=branch_id)
+
+
+@router.get("/{barcode}", response_model=BookCopy)
+def get_copy_by_barcode(
+    barcode: str,
+    db: Session = Depends(get_branch_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    db_copy = crud_copy.get_copy_by_barcode(db, barcode=barcode)
+    if not db_copy:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Экземпляр не найден",
+        )
+    return db_copy
@@ -0,0 +1,66 @@
+import json
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database.base import get_db
+from app.models.user import User
+from app.security.dependencies import get_current_active_user
+from app.services.availability import availability_hub
+
+router = APIRouter()
+
+
+def _parse_book_ids(book_ids: Optional[str]):
+    if not book_ids:
+        return None
+    try:
+        return frozenset(int(book_id) for book_id in book_ids.split(",") if book_id.strip())
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Некорректный список id книг",
+        )
+
+
+@router.get("/availability")
+async def stream_availability(
+    request: Request,
+    book_ids: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> StreamingResponse:
+    selected = _parse_book_ids(book_ids)
+    # Соединение с БД нужно только для авторизации, не держим его весь поток
+    db.close()
+    subscription = availability_hub.subscribe(selected)
+    
+    async def events():
+        try:
+            yield "retry: 3000\n\n"
+            while not subscription.dropped:
+                if await request.is_disconnected():
+                    break
+                batch = await subscription.next_batch(
+                    settings.EVENTS_KEEPALIVE_SECONDS, settings.EVENTS_COALESCE_SECONDS
+                )
+                if not batch:
+                    if not subscription.dropped:
+                        yield ": keepalive\n\n"
+                    continue
+                for book_id, quantity in batch.items():
+                    data = json.dumps({"book_id": book_id, "quantity": quantity})
+                    yield f"event: availability\ndata: {data}\n\n"
+            if subscription.dropped:
+                yield "event: dropped\ndata: {}\n\n"
+        finally:
+            availability_hub.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+from typing import Any, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.api.idempotency import IdempotentRoute, idempotency_guard
+from app.crud import crud_fine, crud_reader
+from app.database.base import get_db
+from app.models.user import User
+from app.schemas.fine import Fine, FineReport
+from app.security.dependencies import get_current_active_user
+
+router = APIRouter(route_class=IdempotentRoute, dependencies=[Depends(idempotency_guard)])
+
+
+@router.get("/reader/{reader_id}", response_model=List[Fine])
+def get_reader_fines(
+    reader_id: int,
+    unpaid_only: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    reader = crud_reader.get_reader(db, reader_id=reader_id)
+    if not reader:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Читатель не найден",
+        )
+    
+    return crud_fine.get_fines_by_reader(db, reader_id=reader_id, unpaid_only=unpaid_only)
+
+
+@router.post("/{fine_id}/pay", response_model=Fine)
+def pay_fine(
+    fine_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    fine = crud_fine.get_fine(db, fine_id=fine_id)
+    if not fine:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Штраф не найден",
+        )
+    
+    if fine.paid:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Штраф уже оплачен",
+        )
+    
+    if fine.borrowed_book.return_date is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Штраф можно оплатить только после возврата книги",
+        )
+    
+    return crud_fine.pay_fine(db, db_fine=fine)
+
+
+@router.get("/report", response_model=FineReport)
+def get_fines_report(
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    date_to = date_to or datetime.utcnow()
+    date_from = date_from or date_to - timedelta(days=30)
+    if date_from >= date_to:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Начало периода должно быть раньше конца",
+        )
+    
+    return crud_fine.get_fines_report(db, date_from=date_from, date_to=date_to)
@@ -0,0 +1,118 @@
+from typing import Any, List
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.api.idempotency import IdempotentRoute, idempotency_guard
+from app.crud import crud_book, crud_borrowed_book, crud_hold, crud_reader
+from app.database.base import get_db
+from app.models.user import User
+from app.schemas.hold import Hold, HoldCreate
+from app.security.dependencies import get_current_active_user
+
+router = APIRouter(route_class=IdempotentRoute, dependencies=[Depends(idempotency_guard)])
+
+
+@router.post("/", response_model=Hold, status_code=status.HTTP_201_CREATED)
+def create_hold(
+    hold_in: HoldCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    book = crud_book.get_book(db, book_id=hold_in.book_id)
+    if not book:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Книга не найдена",
+        )
+    
+    reader = crud_reader.get_reader(db, reader_id=hold_in.reader_id)
+    if not reader:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Читатель не найден",
+        )
+    
+    if book.quantity > 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Есть доступные экземпляры книги, бронь не нужна",
+        )
+    
+    if crud_hold.get_active_hold(db, book_id=hold_in.book_id, reader_id=hold_in.reader_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Читатель уже стоит в очереди на эту книгу",
+        )
+    
+    existing_borrow = crud_borrowed_book.get_borrowed_book_by_book_and_reader(
+        db, book_id=hold_in.book_id, reader_id=hold_in.reader_id
+    )
+    if existing_borrow:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Эта книга уже выдана этому читателю",
+        )
+    
+    return crud_hold.create_hold(db, hold_in=hold_in)
+
+
+@router.get("/book/{book_id}", response_model=List[Hold])
+def get_book_queue(
+    book_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    book = crud_book.get_book(db, book_id=book_id)
+    if not book:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Книга не найдена",
+        )
+    
+    return crud_hold.get_book_queue(db, book_id=book_id)
+
+
+@router.get("/reader/{reader_id}", response_model=List[Hold])
+def get_reader_holds(
+    reader_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    reader = crud_reader.get_reader(db, reader_id=reader_id)
+    if not reader:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Читатель не найден",
+        )
+    
+    return crud_hold.get_active_holds_by_reader(db, reader_id=reader_id)
+
+
+@router.post("/{hold_id}/cancel", response_model=Hold)
+def cancel_hold(
+    hold_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    hold = crud_hold.get_hold(db, hold_id=hold_id)
+    if not hold:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Бронь не найдена",
+        )
+    
+    if hold.status not in crud_hold.ACTIVE_STATUSES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Бронь уже не активна",
+        )
+    
+    try:
+        return crud_hold.cancel_hold(db, db_hold=hold)
+    except ValueError as e:
+        # Бронь успели отменить или снять по сроку параллельно
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
@@ -0,0 +1,21 @@
+from typing import Any
+
+from fastapi import APIRouter, Depends
+
+from app.models.user import User
+from app.security.dependencies import get_current_active_user
+from app.services.audit import audit_dispatcher
+from app.services.change_feed import change_watermark
+from app.services.single_flight import flights
+
+router = APIRouter()
+
+
+@router.get("/")
+def read_metrics(current_user: User = Depends(get_current_active_user)) -> Any:
+    """Счетчики текущего воркера: схлопнутые чтения, отставание журнала аудита и пропуски ленты изменений."""
+    return {
+        "single_flight": {name: flight.stats() for name, flight in flights.items()},
+        "audit": audit_dispatcher.stats(),
+        "changes": change_watermark.stats(),
+    }
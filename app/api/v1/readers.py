@@ -1,26 +1,31 @@
-from typing import Any, List
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 
+from app.api.formats import list_response
+from app.api.idempotency import IdempotentRoute, idempotency_guard
 from app.crud import crud_reader
 from app.database.base import get_db
 from app.models.user import User
 from app.schemas.reader import Reader, ReaderCreate, ReaderUpdate
 from app.security.dependencies import get_current_active_user
+from app.services.single_flight import render_shared
 
-router = APIRouter()
+router = APIRouter(route_class=IdempotentRoute, dependencies=[Depends(idempotency_guard)])
 
 
 @router.get("/", response_model=List[Reader])
 def read_readers(
+    request: Request,
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ) -> Any:
     readers = crud_reader.get_readers(db, skip=skip, limit=limit)
-    return readers
+    return list_response(request, response, readers, Reader)
 
 
 @router.post("/", response_model=Reader, status_code=status.HTTP_201_CREATED)
@@ -45,13 +50,19 @@ def read_reader(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ) -> Any:
-    reader = crud_reader.get_reader(db, reader_id=reader_id)
-    if reader is None:
+    def render() -> Optional[bytes]:
+        reader = crud_reader.get_reader(db, reader_id=reader_id)
+        if reader is None:
+            return None
+        return Reader.model_validate(reader, from_attributes=True).model_dump_json().encode()
+    
+    content = render_shared(db, "reader_response", reader_id, render)
+    if content is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Читатель не найден",
         )
-    return reader
+    return Response(content=content, media_type="application/json")
 
 
 @router.put("/{reader_id}", response_model=Reader)
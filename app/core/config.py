@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Dict, Optional, Tuple
 from pydantic import field_validator
 from pydantic_settings import BaseSettings
 
@@ -9,10 +9,108 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # database - пользователь читается из БД на каждом запросе,
+    # stateless - данные пользователя берутся из claims access-токена
+    AUTH_MODE: str = "database"
+    STATELESS_ACCESS_TOKEN_EXPIRE_MINUTES: int = 5
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    # Сколько проверенных токенов держать в памяти, 0 - без кеша
+    JWT_CACHE_SIZE: int = 10000
+    # API-ключи: сколько держать ключ в памяти и допустимое
+    # расхождение X-Timestamp у подписанных запросов
+    API_KEY_CACHE_SECONDS: float = 60
+    API_KEY_SIGNATURE_TOLERANCE_SECONDS: int = 300
+    # Список отозванных jti: догрузка из БД, чистка истекших,
+    # сколько ждать зафиксирования пропущенных id
+    REVOCATION_REFRESH_SECONDS: float = 1
+    REVOCATION_GC_SECONDS: float = 600
+    REVOCATION_GAP_SECONDS: float = 60
+    
+    # Лимиты по клиенту (пользователь, API-ключ или IP) и классу
+    # маршрута: запросов в минуту и размер всплеска
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"
+    RATE_LIMIT_REDIS_URL: str = "redis://localhost:6379/0"
+    RATE_LIMITS: Dict[str, Tuple[float, float]] = {
+        "auth": (20, 10),
+        "read": (600, 120),
+        "write": (120, 30),
+    }
+    # Сброс нагрузки: 503 на чтения при превышении порогов,
+    # на запись и вход - при двукратном превышении
+    LOAD_SHED_MAX_IN_FLIGHT: int = 64
+    LOAD_SHED_MAX_POOL_WAIT_MS: float = 200
+    POOL_WAIT_WINDOW_SECONDS: float = 5
     
     PROJECT_NAME: str = "Library API"
     DEBUG: bool = False
     API_V1_STR: str = "/api/v1"
+
+    # Сколько ждать запись ленты изменений с пропущенным id, прежде чем
+    # отдавать записи после нее. В PostgreSQL пропуск снимается раньше,
+    # как только завершились транзакции, которые могли его занять; это
+    # предел на случай долгих транзакций и других БД
+    CHANGES_GAP_SECONDS: float = 300
+
+    CATALOG_REFRESH_SECONDS: int = 5
+    # Как часто индексы дубликатов и автодополнения подтягивают чужие изменения
+    INDEX_REFRESH_SECONDS: int = 5
+    CATALOG_MAX_AGE: int = 60
+    CATALOG_STALE_WHILE_REVALIDATE: int = 300
+
+    EVENTS_BACKEND: str = "local"
+    EVENTS_COALESCE_SECONDS: float = 0.2
+    EVENTS_KEEPALIVE_SECONDS: float = 15
+    EVENTS_MAX_PENDING: int = 1000
+
+    HOLD_PICKUP_DAYS: int = 3
+    HOLD_EXPIRY_BATCH: int = 1000
+
+    LOAN_PERIOD_DAYS: int = 14
+    FINE_DAILY_RATE: float = 10.0
+    FINES_BACKFILL_CHUNK: int = 50000
+
+    RECOMMENDATIONS_DIR: str = "data/recommendations"
+    RECOMMENDATIONS_TOP_K: int = 20
+
+    DEMAND_WINDOW_DAYS: int = 90
+    DEMAND_HALF_LIFE_DAYS: float = 14
+    DEMAND_SERVICE_Z: float = 1.28
+
+    DUPLICATE_THRESHOLD: float = 0.7
+
+    # Пакетные запросы: подзапросов в пакете и одновременных чтений
+    BATCH_MAX_REQUESTS: int = 20
+    BATCH_MAX_PARALLEL: int = 8
+
+    # Сжатие ответов: меньше порога не сжимаем, от большого размера -
+    # самый быстрый уровень
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_LARGE_SIZE: int = 262144
+    GZIP_LEVEL: int = 6
+    BROTLI_QUALITY: int = 5
+
+    IDEMPOTENCY_TTL_HOURS: int = 24
+    # Сколько повтор ждет незавершенный запрос (например, упавшего воркера),
+    # прежде чем выполнить его заново
+    IDEMPOTENCY_LOCK_SECONDS: int = 60
+    IDEMPOTENCY_PURGE_BATCH: int = 1000
+
+    # Журнал аудита: outbox переносится фоновым потоком; AUDIT_LOG_FILE
+    # дополнительно включает запись в локальные файлы с ротацией
+    AUDIT_DISPATCH_SECONDS: float = 1
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_MAX_LAG_SECONDS: float = 30
+    AUDIT_LOG_FILE: Optional[str] = None
+    AUDIT_LOG_FILE_MAX_BYTES: int = 10 * 1024 * 1024
+    AUDIT_LOG_FILE_BACKUPS: int = 10
+
+    ARCHIVE_AFTER_DAYS: int = 365
+    ARCHIVE_BATCH: int = 5000
+
+    DEFAULT_BRANCH_CODE: str = "main"
+    # Отдельная БД для филиала: {"2": "postgresql://..."}
+    BRANCH_DATABASE_URLS: Dict[int, str] = {}
     
     @field_validator("DATABASE_URL", mode="before")
     def validate_database_url(cls, v: Optional[str]) -> str:
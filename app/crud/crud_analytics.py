@@ -0,0 +1,237 @@
+from datetime import date, timedelta
+from typing import Dict, List, Sequence
+
+from sqlalchemy import Date, delete, func, insert as sql_insert, select, union_all
+from sqlalchemy.orm import Session
+
+from app.models.book import Book
+from app.models.borrowed_book import BorrowedBook
+from app.models.borrowed_book_archive import ArchivedBorrowedBook
+from app.models.circulation import BookCirculationDaily, ReaderCirculationDaily
+from app.models.demand_forecast import BookDemandForecast
+from app.models.reader import Reader
+
+_ROLLUPS = (
+    (BookCirculationDaily, "book_id"),
+    (ReaderCirculationDaily, "reader_id"),
+)
+
+
+def _insert(db: Session):
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+def _increment(db: Session, model, key: str, values: Dict, column: str) -> None:
+    insert = _insert(db)
+    statement = insert(model).values(**values)
+    db.execute(statement.on_conflict_do_update(
+        index_elements=["day", key],
+        set_={column: getattr(model, column) + getattr(statement.excluded, column)},
+    ))
+
+
+def record_circulation(
+    db: Session, db_borrow: BorrowedBook, event: str, day: date
+) -> None:
+    """Учитывает выдачу или возврат в дневных агрегатах.
+
+    Вызывается внутри транзакции выдачи/возврата; коммит остается за
+    вызывающим кодом. event - "borrows" или "returns".
+    """
+    for model, key in _ROLLUPS:
+        values = {"day": day, key: getattr(db_borrow, key), "borrows": 0, "returns": 0}
+        values[event] = 1
+        _increment(db, model, key, values, event)
+
+
+def _loans():
+    columns = ("id", "book_id", "reader_id", "borrow_date", "return_date")
+    return union_all(
+        select(*(getattr(BorrowedBook, name) for name in columns)),
+        select(*(getattr(ArchivedBorrowedBook, name) for name in columns)),
+    ).subquery()
+
+
+def _first_day(db: Session, branch_dbs: Sequence[Session]):
+    """Самый ранний день, который может понадобиться пересчитать."""
+    days = [
+        db.query(func.min(model.day)).scalar() for model, _ in _ROLLUPS
+    ]
+    for source in (db, *branch_dbs):
+        for model in (BorrowedBook, ArchivedBorrowedBook):
+            first = source.query(func.min(model.borrow_date)).scalar()
+            days.append(first.date() if first is not None else None)
+    days = [day for day in days if day is not None]
+    return min(days) if days else None
+
+
+def _rebuild_days(
+    db: Session, date_from: date, date_to: date, branch_dbs: Sequence[Session]
+) -> None:
+    """Заменяет агрегаты за дни [date_from, date_to) одной транзакцией."""
+    for model, _ in _ROLLUPS:
+        db.execute(delete(model).where(model.day >= date_from, model.day < date_to))
+    
+    insert = _insert(db)
+    for source in (db, *branch_dbs):
+        loans = _loans()
+        for event, moment in (
+            ("borrows", loans.c.borrow_date), ("returns", loans.c.return_date)
+        ):
+            day = func.date(moment, type_=Date)
+            for model, key in _ROLLUPS:
+                key_column = loans.c[key]
+                query = select(day, key_column, func.count()).where(
+                    moment.is_not(None), day >= date_from, day < date_to
+                ).group_by(day, key_column)
+                if source is db:
+                    statement = insert(model).from_select(["day", key, event], query)
+                    rows = None
+                else:
+                    # Выдачи филиала агрегируются в его БД
+                    statement = insert(model)
+                    rows = [
+                        {"day": row_day, key: row_key, event: count}
+                        for row_day, row_key, count in source.execute(query)
+                    ]
+                    if not rows:
+                        continue
+                db.execute(
+                    statement.on_conflict_do_update(
+                        index_elements=["day", key],
+                        set_={event: getattr(model, event) + getattr(statement.excluded, event)},
+                    ),
+                    rows,
+                )
+    db.commit()
+
+
+def backfill_circulation(
+    db: Session, before: date, chunk_days: int = 30, branch_dbs: Sequence[Session] = ()
+) -> int:
+    """Пересобирает агрегаты за дни до before из истории выдач.
+
+    Дни обрабатываются диапазонами по ``chunk_days``: удаление старых
+    строк агрегатов и INSERT ... SELECT ... GROUP BY по выдачам, включая
+    архивные, идут одной транзакцией на диапазон, поэтому аналитика
+    никогда не видит пустой или наполовину пересчитанный день, а после
+    сбоя остаются старые агрегаты непройденных диапазонов. Выдачи из
+    отдельных БД филиалов (``branch_dbs``) агрегируются в своей БД и
+    прибавляются в той же транзакции. События начиная с before
+    учитываются на лету при выдаче и возврате. Возвращает число
+    обработанных выдач.
+    """
+    first_day = _first_day(db, branch_dbs)
+    if first_day is not None:
+        date_from = first_day
+        while date_from < before:
+            date_to = min(date_from + timedelta(days=chunk_days), before)
+            _rebuild_days(db, date_from, date_to, branch_dbs)
+            date_from = date_to
+    
+    total = 0
+    for source in (db, *branch_dbs):
+        total += source.execute(select(func.count()).select_from(_loans())).scalar()
+    return total
+
+
+def get_top_books(db: Session, date_from: date, date_to: date, limit: int = 10) -> List[Dict]:
+    borrows = func.sum(BookCirculationDaily.borrows).label("borrows")
+    top = db.query(BookCirculationDaily.book_id, borrows).filter(
+        BookCirculationDaily.day >= date_from,
+        BookCirculationDaily.day <= date_to,
+    ).group_by(BookCirculationDaily.book_id).order_by(
+        borrows.desc(), BookCirculationDaily.book_id
+    ).limit(limit).subquery()
+    
+    rows = db.query(Book.id, Book.title, Book.author, top.c.borrows).join(
+        top, top.c.book_id == Book.id
+    ).order_by(top.c.borrows.desc(), Book.id).all()
+    return [
+        {"book_id": row.id, "title": row.title, "author": row.author, "borrows": row.borrows}
+        for row in rows
+    ]
+
+
+def get_reader_activity(db: Session, date_from: date, date_to: date, limit: int = 10) -> Dict:
+    in_range = (
+        ReaderCirculationDaily.day >= date_from,
+        ReaderCirculationDaily.day <= date_to,
+    )
+    active_readers = db.query(
+        func.count(func.distinct(ReaderCirculationDaily.reader_id))
+    ).filter(*in_range).scalar()
+    
+    borrows = func.sum(ReaderCirculationDaily.borrows).label("borrows")
+    top = db.query(ReaderCirculationDaily.reader_id, borrows).filter(*in_range).group_by(
+        ReaderCirculationDaily.reader_id
+    ).order_by(borrows.desc(), ReaderCirculationDaily.reader_id).limit(limit).subquery()
+    
+    rows = db.query(Reader.id, Reader.name, top.c.borrows).join(
+        top, top.c.reader_id == Reader.id
+    ).order_by(top.c.borrows.desc(), Reader.id).all()
+    return {
+        "active_readers": active_readers,
+        "top_readers": [
+            {"reader_id": row.id, "name": row.name, "borrows": row.borrows} for row in rows
+        ],
+    }
+
+
+def get_circulation(db: Session, date_from: date, date_to: date) -> List[Dict]:
+    rows = db.query(
+        BookCirculationDaily.day,
+        func.sum(BookCirculationDaily.borrows),
+        func.sum(BookCirculationDaily.returns),
+    ).filter(
+        BookCirculationDaily.day >= date_from,
+        BookCirculationDaily.day <= date_to,
+    ).group_by(BookCirculationDaily.day).order_by(BookCirculationDaily.day).all()
+    return [{"day": day, "borrows": borrows, "returns": returns} for day, borrows, returns in rows]
+
+
+_FORECAST_COLUMNS = (
+    "book_id", "computed_at", "daily_demand", "avg_loan_days", "stockout_days",
+    "current_copies", "recommended_copies", "copies_delta",
+)
+
+
+def save_demand_forecasts(db: Session, rows: List[Dict]) -> None:
+    """Заменяет прогноз целиком одной транзакцией."""
+    db.execute(delete(BookDemandForecast))
+    if rows:
+        db.execute(
+            sql_insert(BookDemandForecast),
+            [{column: row[column] for column in _FORECAST_COLUMNS} for row in rows],
+        )
+    db.commit()
+
+
+def query_demand_forecasts(db: Session, order: str = "shortage"):
+    delta = BookDemandForecast.copies_delta
+    ordering = delta.desc() if order == "shortage" else delta.asc()
+    return db.query(
+        BookDemandForecast, Book.title, Book.author
+    ).join(Book, Book.id == BookDemandForecast.book_id).order_by(ordering, BookDemandForecast.book_id)
+
+
+def get_demand_forecasts(
+    db: Session, order: str = "shortage", skip: int = 0, limit: int = 50
+) -> List[Dict]:
+    rows = query_demand_forecasts(db, order=order).offset(skip).limit(limit).all()
+    return [_forecast_dict(forecast, title, author) for forecast, title, author in rows]
+
+
+def _forecast_dict(forecast: BookDemandForecast, title: str, author: str) -> Dict:
+    data = {column: getattr(forecast, column) for column in _FORECAST_COLUMNS}
+    data.update(title=title, author=author)
+    return data
+
+
+def iter_demand_forecasts(db: Session, order: str = "shortage", chunk_size: int = 10000):
+    for forecast, title, author in query_demand_forecasts(db, order=order).yield_per(chunk_size):
+        yield _forecast_dict(forecast, title, author)
@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload
+
+from app.models.api_key import ApiKey, ApiKeyNonce
+from app.schemas.api_key import ApiKeyCreate
+from app.security.api_keys import generate_api_key, hash_secret
+
+
+def get_api_key(db: Session, api_key_id: int) -> Optional[ApiKey]:
+    return db.query(ApiKey).filter(ApiKey.id == api_key_id).first()
+
+
+def get_api_key_by_key_id(db: Session, key_id: str) -> Optional[ApiKey]:
+    return (
+        db.query(ApiKey)
+        .options(joinedload(ApiKey.user))
+        .filter(ApiKey.key_id == key_id)
+        .first()
+    )
+
+
+def get_api_keys(db: Session, user_id: int) -> List[ApiKey]:
+    return db.query(ApiKey).filter(ApiKey.user_id == user_id).order_by(ApiKey.id).all()
+
+
+def create_api_key(db: Session, user_id: int, api_key: ApiKeyCreate) -> Tuple[ApiKey, str]:
+    """Создает ключ; полный ключ возвращается только здесь."""
+    key_id, secret, full_key = generate_api_key()
+    db_api_key = ApiKey(
+        key_id=key_id,
+        key_hash=hash_secret(secret),
+        name=api_key.name,
+        scopes=" ".join(api_key.scopes.split()),
+        user_id=user_id,
+    )
+    db.add(db_api_key)
+    db.commit()
+    db.refresh(db_api_key)
+    return db_api_key, full_key
+
+
+def revoke_api_key(db: Session, db_api_key: ApiKey) -> ApiKey:
+    if db_api_key.revoked_at is None:
+        db_api_key.revoked_at = datetime.utcnow()
+        db.commit()
+        db.refresh(db_api_key)
+    return db_api_key
+
+
+def use_nonce(db: Session, key_id: str, nonce: str, window_seconds: float) -> bool:
+    """Запоминает nonce подписанного запроса; False, если он уже был.
+
+    Уникальность держит первичный ключ, поэтому повтор отклоняется и в
+    другом воркере. Nonce старше окна допуска не нужны: запрос с таким
+    временем отклонится и так.
+    """
+    now = datetime.utcnow()
+    db.query(ApiKeyNonce).filter(
+        ApiKeyNonce.key_id == key_id,
+        ApiKeyNonce.created_at < now - timedelta(seconds=window_seconds),
+    ).delete(synchronize_session=False)
+    db.add(ApiKeyNonce(key_id=key_id, nonce=nonce, created_at=now))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return False
+    return True
@@ -0,0 +1,89 @@
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.audit import AuditLog, AuditOutbox
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def record_audit_event(
+    db: Session, event_type: str, entity: str, entity_id: int, **payload: Any
+) -> None:
+    """Добавляет событие в outbox; коммит остается за вызывающим кодом."""
+    db.add(AuditOutbox(
+        event_type=event_type,
+        entity=entity,
+        entity_id=entity_id,
+        payload=json.dumps(payload, default=_default, ensure_ascii=False, sort_keys=True),
+    ))
+
+
+def get_outbox_events(db: Session, limit: int = 500) -> List[AuditOutbox]:
+    """Пачка событий outbox под блокировкой до коммита переноса.
+
+    Как в ``claim_copies``: FOR UPDATE SKIP LOCKED, поэтому диспетчеры
+    разных воркеров берут разные пачки и не ждут друг друга.
+    """
+    return (
+        db.query(AuditOutbox)
+        .order_by(AuditOutbox.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+
+
+def get_outbox_stats(db: Session) -> Tuple[int, Optional[datetime]]:
+    """Число неперенесенных событий и время самого старого из них."""
+    return db.query(func.count(AuditOutbox.id), func.min(AuditOutbox.created_at)).one()
+
+
+def append_audit_log(db: Session, events: Sequence[AuditOutbox]) -> int:
+    """Переносит события в журнал и удаляет их из outbox одной транзакцией.
+
+    События, уже попавшие в журнал (повторная доставка после сбоя или из
+    другого воркера), пропускаются.
+    """
+    ids = [event.id for event in events]
+    existing = {
+        outbox_id for outbox_id, in
+        db.query(AuditLog.outbox_id).filter(AuditLog.outbox_id.in_(ids))
+    }
+    db.add_all([
+        AuditLog(
+            outbox_id=event.id,
+            event_type=event.event_type,
+            entity=event.entity,
+            entity_id=event.entity_id,
+            payload=event.payload,
+            occurred_at=event.created_at,
+        )
+        for event in events
+        if event.id not in existing
+    ])
+    db.query(AuditOutbox).filter(AuditOutbox.id.in_(ids)).delete(synchronize_session=False)
+    db.commit()
+    return len(ids) - len(existing)
+
+
+def get_audit_log(
+    db: Session,
+    entity: Optional[str] = None,
+    entity_id: Optional[int] = None,
+    since: int = 0,
+    limit: int = 100,
+) -> List[AuditLog]:
+    query = db.query(AuditLog).filter(AuditLog.id > since)
+    if entity is not None:
+        query = query.filter(AuditLog.entity == entity)
+    if entity_id is not None:
+        query = query.filter(AuditLog.entity_id == entity_id)
+    return query.order_by(AuditLog.id).limit(limit).all()
@@ -1,43 +1,261 @@
-from typing import List, Optional
+from typing import Any, List, Optional, Sequence, Tuple
 
-from sqlalchemy.orm import Session
+from sqlalchemy import exists, literal_column, tuple_
+from sqlalchemy.orm import Query, Session, load_only
 
+from app.crud.crud_branch import get_default_branch_id
+from app.crud.crud_audit import record_audit_event
+from app.crud.crud_change import record_change
+from app.crud.crud_copy import add_copies, claim_copies
+from app.crud.crud_hold import ACTIVE_STATUSES, promote_holds
+from app.database.base import is_branch_session
 from app.models.book import Book
+from app.models.book_copy import BookCopy
+from app.models.borrowed_book import BorrowedBook
+from app.models.hold import Hold
 from app.schemas.book import BookCreate, BookUpdate
+from app.schemas.copy import BookCopyCreate
+from app.services.audit import audit_dispatcher
+from app.services.autocomplete import autocomplete_index
+from app.services.availability import availability_hub
+from app.services.catalog import catalog_snapshot
+from app.services.duplicates import duplicate_index
 
 
-def get_book(db: Session, book_id: int) -> Optional[Book]:
-    return db.query(Book).filter(Book.id == book_id).first()
+def _query_books(db: Session, fields: Optional[Sequence[str]] = None) -> Query:
+    query = db.query(Book)
+    if fields:
+        query = query.options(load_only(*(getattr(Book, field) for field in fields)))
+    return query
+
+
+def get_book(
+    db: Session, book_id: int, fields: Optional[Sequence[str]] = None
+) -> Optional[Book]:
+    return _query_books(db, fields).filter(Book.id == book_id).first()
+
+
+def get_books_by_ids(
+    db: Session, book_ids: Sequence[int], fields: Optional[Sequence[str]] = None
+) -> List[Book]:
+    if not book_ids:
+        return []
+    return _query_books(db, fields).filter(Book.id.in_(book_ids)).all()
 
 
 def get_book_by_isbn(db: Session, isbn: str) -> Optional[Book]:
     return db.query(Book).filter(Book.isbn == isbn).first()
 
 
-def get_books(db: Session, skip: int = 0, limit: int = 100) -> List[Book]:
-    return db.query(Book).offset(skip).limit(limit).all()
+def query_books(
+    db: Session,
+    fields: Optional[Sequence[str]] = None,
+    author: Optional[str] = None,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    available_only: bool = False,
+    sort: str = "id",
+    after: Optional[Tuple[Any, int]] = None,
+    branch_id: Optional[int] = None,
+) -> Query:
+    descending = sort.startswith("-")
+    sort_field = sort.lstrip("-")
+    sort_column = getattr(Book, sort_field)
+    if fields and sort_field not in fields:
+        fields = (*fields, sort_field)
+
+    query = _query_books(db, fields)
+    if author is not None:
+        query = query.filter(Book.author == author)
+    if year_from is not None:
+        query = query.filter(Book.publication_year >= year_from)
+    if year_to is not None:
+        query = query.filter(Book.publication_year <= year_to)
+    if branch_id is not None:
+        # Фонд филиала: книги, у которых там есть (свободные) экземпляры
+        in_branch = exists().where(
+            BookCopy.branch_id == branch_id,
+            BookCopy.book_id == Book.id,
+            BookCopy.status == "available" if available_only else BookCopy.status != "withdrawn",
+        )
+        query = query.filter(in_branch)
+    elif available_only:
+        # Литерал, а не параметр: иначе SQLite не сопоставит условие
+        # с частичным индексом ix_books_available_title.
+        query = query.filter(Book.quantity > literal_column("0"))
+
+    if sort_field == "id":
+        if after is not None:
+            query = query.filter(Book.id < after[1] if descending else Book.id > after[1])
+        return query.order_by(Book.id.desc() if descending else Book.id)
+
+    if after is not None:
+        key = tuple_(sort_column, Book.id)
+        bound = tuple_(*after)
+        query = query.filter(key < bound if descending else key > bound)
+    if descending:
+        return query.order_by(sort_column.desc(), Book.id.desc())
+    return query.order_by(sort_column, Book.id)
+
+
+def get_books(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    fields: Optional[Sequence[str]] = None,
+    author: Optional[str] = None,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    available_only: bool = False,
+    sort: str = "id",
+    after: Optional[Tuple[Any, int]] = None,
+    branch_id: Optional[int] = None,
+) -> List[Book]:
+    query = query_books(
+        db,
+        fields=fields,
+        author=author,
+        year_from=year_from,
+        year_to=year_to,
+        available_only=available_only,
+        sort=sort,
+        after=after,
+        branch_id=branch_id,
+    )
+    return query.offset(skip).limit(limit).all()
 
 
 def create_book(db: Session, book: BookCreate) -> Book:
-    db_book = Book(**book.dict())
+    db_book = Book(**book.dict(exclude={"branch_id"}))
     db.add(db_book)
+    db.flush()
+    branch_id = book.branch_id or get_default_branch_id(db)
+    add_copies(db, db_book.id, db_book.quantity, branch_id=branch_id)
+    record_change(db, "book", db_book.id)
+    record_audit_event(
+        db, "book_create", "book", db_book.id,
+        title=db_book.title,
+        author=db_book.author,
+        isbn=db_book.isbn,
+        quantity=db_book.quantity,
+        branch_id=branch_id,
+    )
     db.commit()
+    audit_dispatcher.notify()
     db.refresh(db_book)
+    autocomplete_index.add_book(db_book.id, db_book.title, db_book.author)
+    duplicate_index.add_book(db_book.id, db_book.title, db_book.author)
+    catalog_snapshot.upsert(db_book)
     return db_book
 
 
 def update_book(db: Session, db_book: Book, book_in: BookUpdate) -> Book:
     update_data = book_in.dict(exclude_unset=True)
+    if "quantity" in update_data:
+        db.refresh(db_book, with_for_update=True)
+    previous = {field: getattr(db_book, field) for field in update_data}
     
     for field, value in update_data.items():
-        setattr(db_book, field, value)
+        if field != "quantity":
+            setattr(db_book, field, value)
     
     db.add(db_book)
+    if "quantity" in update_data:
+        _set_available_copies(db, db_book, update_data["quantity"])
+        promote_holds(db, db_book)
+    record_change(db, "book", db_book.id)
+    record_audit_event(
+        db, "book_update", "book", db_book.id,
+        changes={
+            field: [previous[field], getattr(db_book, field)] for field in update_data
+        },
+    )
     db.commit()
+    audit_dispatcher.notify()
     db.refresh(db_book)
+    if "title" in update_data or "author" in update_data:
+        autocomplete_index.update_book(db_book.id, db_book.title, db_book.author)
+        duplicate_index.add_book(db_book.id, db_book.title, db_book.author)
+    catalog_snapshot.upsert(db_book)
+    if "quantity" in update_data:
+        availability_hub.publish(db_book.id, db_book.quantity)
     return db_book
 
 
+def _set_available_copies(db: Session, db_book: Book, quantity: int) -> None:
+    """Доводит число свободных экземпляров до quantity.
+
+    Недостающие экземпляры заводятся в основном филиале со
+    сгенерированным штрихкодом, лишние свободные списываются (статус
+    withdrawn).
+    """
+    delta = quantity - db_book.quantity
+    if delta > 0:
+        add_copies(db, db_book.id, delta, branch_id=get_default_branch_id(db))
+    elif delta < 0:
+        withdrawn = claim_copies(db, db_book.id, "available", "withdrawn", -delta)
+        quantity = db_book.quantity - len(withdrawn)
+    db_book.quantity = quantity
+
+
+def add_copy(db: Session, db_book: Book, copy_in: BookCopyCreate) -> BookCopy:
+    db_copy = BookCopy(
+        book_id=db_book.id,
+        barcode=copy_in.barcode,
+        branch_id=copy_in.branch_id or get_default_branch_id(db),
+        status="available",
+    )
+    db.add(db_copy)
+    db.refresh(db_book, with_for_update=True)
+    db_book.quantity += 1
+    db.add(db_book)
+    promote_holds(db, db_book)
+    record_change(db, "book", db_book.id)
+    db.flush()
+    record_audit_event(
+        db, "copy_add", "book", db_book.id,
+        copy_id=db_copy.id,
+        barcode=db_copy.barcode,
+        branch_id=db_copy.branch_id,
+    )
+    db.commit()
+    audit_dispatcher.notify()
+    db.refresh(db_copy)
+    if not is_branch_session(db):
+        catalog_snapshot.upsert(db_book)
+        availability_hub.publish(db_book.id, db_book.quantity)
+    return db_copy
+
+
 def delete_book(db: Session, db_book: Book) -> None:
+    """Удаляет книгу; с активными бронями или выдачами - ValueError.
+
+    Строка книги блокируется, чтобы бронь не появилась между проверкой и
+    удалением; завершенные брони удаляются вместе с книгой.
+    """
+    book_id = db_book.id
+    db.refresh(db_book, with_for_update=True)
+    active_hold = db.query(exists().where(
+        Hold.book_id == book_id, Hold.status.in_(ACTIVE_STATUSES)
+    )).scalar()
+    active_loan = db.query(exists().where(
+        BorrowedBook.book_id == book_id, BorrowedBook.return_date.is_(None)
+    )).scalar()
+    if active_hold or active_loan:
+        db.rollback()
+        raise ValueError("Нельзя удалить книгу с активными бронями или выдачами")
+    db.query(Hold).filter(Hold.book_id == book_id).delete(synchronize_session=False)
+    record_audit_event(
+        db, "book_delete", "book", book_id,
+        title=db_book.title,
+        author=db_book.author,
+        isbn=db_book.isbn,
+        quantity=db_book.quantity,
+    )
     db.delete(db_book)
-    db.commit()
\ No newline at end of file
+    record_change(db, "book", book_id, "delete")
+    db.commit()
+    audit_dispatcher.notify()
+    autocomplete_index.remove_book(book_id)
+    duplicate_index.remove_book(book_id)
+    catalog_snapshot.remove(book_id)
\ No newline at end of file
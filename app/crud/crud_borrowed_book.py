@@ -1,24 +1,46 @@
-from typing import List, Optional
-from datetime import datetime
-from sqlalchemy import and_, or_
+from typing import List, Optional, Tuple
+from datetime import date, datetime, timedelta
+from sqlalchemy import and_, delete, exists, insert, or_, select, union_all, update
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
+from app.crud.crud_analytics import record_circulation
+from app.crud.crud_branch import get_default_branch_id
+from app.crud.crud_audit import record_audit_event
+from app.crud.crud_change import record_change
+from app.crud.crud_copy import add_copies, claim_copies
+from app.crud.crud_fine import settle_fine
+from app.crud.crud_hold import get_ready_hold, promote_holds
+from app.database.base import branch_of, is_branch_session, main_session, other_databases
+from app.database.functions import days_between
 from app.models.borrowed_book import BorrowedBook
+from app.models.borrowed_book_archive import ArchivedBorrowedBook
 from app.models.book import Book
+from app.models.book_copy import BookCopy
+from app.models.fine import Fine
 from app.schemas.borrowed_book import BorrowBookCreate
+from app.services.audit import audit_dispatcher
+from app.services.autocomplete import autocomplete_index
+from app.services.availability import availability_hub
+from app.services.catalog import catalog_snapshot
 
 
 def get_borrowed_book(db: Session, borrow_id: int) -> Optional[BorrowedBook]:
     return db.query(BorrowedBook).filter(BorrowedBook.id == borrow_id).first()
 
 
-def get_active_borrowed_books_by_reader(db: Session, reader_id: int) -> List[BorrowedBook]:
-    return db.query(BorrowedBook).filter(
+def get_active_borrowed_books_by_reader(
+    db: Session, reader_id: int, branch_id: Optional[int] = None
+) -> List[BorrowedBook]:
+    query = db.query(BorrowedBook).filter(
         and_(
             BorrowedBook.reader_id == reader_id,
             BorrowedBook.return_date.is_(None)
         )
-    ).all()
+    )
+    if branch_id is not None:
+        query = query.filter(BorrowedBook.branch_id == branch_id)
+    return query.all()
 
 
 def get_borrowed_book_by_book_and_reader(
@@ -33,7 +55,7 @@ def get_borrowed_book_by_book_and_reader(
     ).first()
 
 
-def count_active_borrowed_books_by_reader(db: Session, reader_id: int) -> int:
+def _count_active(db: Session, reader_id: int) -> int:
     return db.query(BorrowedBook).filter(
         and_(
             BorrowedBook.reader_id == reader_id,
@@ -42,10 +64,40 @@ def count_active_borrowed_books_by_reader(db: Session, reader_id: int) -> int:
     ).count()
 
 
+def count_active_borrowed_books_by_reader(db: Session, reader_id: int) -> int:
+    """Активные выдачи читателя во всех БД: лимит общий для филиалов."""
+    count = _count_active(db, reader_id)
+    for factory in other_databases(db):
+        other_db = factory()
+        try:
+            count += _count_active(other_db, reader_id)
+        finally:
+            other_db.close()
+    return count
+
+
+def _commit_with_feed(db: Session, db_borrow: BorrowedBook, event: str, day: date) -> None:
+    """Фиксирует выдачу или возврат вместе с агрегатами и лентой изменений.
+
+    Агрегаты и лента читаются только из основной БД, поэтому для БД
+    филиала они пишутся в основную сразу после коммита филиала; запись
+    ленты помечается ``branch_id``, по которому потребитель найдет выдачу.
+    """
+    with main_session(db) as main_db:
+        branch_id = branch_of(db)
+        record_circulation(main_db, db_borrow, event, day)
+        record_change(main_db, "borrowed_book", db_borrow.id, branch_id=branch_id)
+        record_change(main_db, "book", db_borrow.book_id, branch_id=branch_id)
+        db.commit()
+        if main_db is not db:
+            main_db.commit()
+
+
 def borrow_book(db: Session, borrow_data: BorrowBookCreate) -> BorrowedBook:
     db_book = db.query(Book).filter(Book.id == borrow_data.book_id).first()
-    if db_book.quantity <= 0:
-        raise ValueError("Нет доступных экземпляров книги")
+    ready_hold = get_ready_hold(
+        db, book_id=borrow_data.book_id, reader_id=borrow_data.reader_id
+    )
     
     active_books_count = count_active_borrowed_books_by_reader(
         db, reader_id=borrow_data.reader_id
@@ -53,18 +105,59 @@ def borrow_book(db: Session, borrow_data: BorrowBookCreate) -> BorrowedBook:
     if active_books_count >= 3:
         raise ValueError("Читатель уже взял максимальное количество книг (3)")
     
+    # Экземпляр под готовую бронь уже отложен и вычтен из quantity
+    copy_ids = claim_copies(
+        db,
+        borrow_data.book_id,
+        "on_hold" if ready_hold else "available",
+        "borrowed",
+        branch_id=borrow_data.branch_id,
+    )
+    if not copy_ids:
+        if borrow_data.branch_id is not None:
+            raise ValueError("Нет доступных экземпляров книги в этом филиале")
+        raise ValueError("Нет доступных экземпляров книги")
+    branch_id = borrow_data.branch_id
+    if branch_id is None:
+        branch_id = db.query(BookCopy.branch_id).filter(BookCopy.id == copy_ids[0]).scalar()
+    
+    borrow_date = datetime.utcnow()
     db_borrow = BorrowedBook(
         book_id=borrow_data.book_id,
         reader_id=borrow_data.reader_id,
-        borrow_date=datetime.utcnow()
+        copy_id=copy_ids[0],
+        branch_id=branch_id,
+        borrow_date=borrow_date,
+        due_date=borrow_date + timedelta(days=settings.LOAN_PERIOD_DAYS)
     )
     db.add(db_borrow)
+    if ready_hold:
+        ready_hold.status = "fulfilled"
+        db.add(ready_hold)
     
-    db_book.quantity -= 1
-    db.add(db_book)
-    
-    db.commit()
+    db.flush()
+    record_audit_event(
+        db, "borrow", "borrowed_book", db_borrow.id,
+        book_id=db_borrow.book_id,
+        reader_id=db_borrow.reader_id,
+        copy_id=db_borrow.copy_id,
+        branch_id=db_borrow.branch_id,
+        hold_id=ready_hold.id if ready_hold else None,
+        due_date=db_borrow.due_date,
+    )
+    if not ready_hold:
+        # Счетчик меняется последним и без чтения: строка книги
+        # блокируется только до коммита
+        db_book.quantity = Book.quantity - 1
+        db.add(db_book)
+    _commit_with_feed(db, db_borrow, "borrows", borrow_date.date())
+    audit_dispatcher.notify()
     db.refresh(db_borrow)
+    # Снимки и индексы в памяти описывают основную БД
+    if not is_branch_session(db):
+        autocomplete_index.bump(db_borrow.book_id)
+        catalog_snapshot.upsert(db_book)
+        availability_hub.publish(db_book.id, db_book.quantity)
     return db_borrow
 
 
@@ -74,15 +167,121 @@ def return_book(db: Session, db_borrow: BorrowedBook) -> BorrowedBook:
     
     db_borrow.return_date = datetime.utcnow()
     db.add(db_borrow)
+    settle_fine(db, db_borrow)
     
-    db_book = db.query(Book).filter(Book.id == db_borrow.book_id).first()
+    if db_borrow.copy_id is not None:
+        db.execute(
+            update(BookCopy)
+            .where(BookCopy.id == db_borrow.copy_id)
+            .values(status="available")
+            .execution_options(synchronize_session=False)
+        )
+    else:
+        # Выдача, оформленная до учета экземпляров
+        add_copies(
+            db, db_borrow.book_id, 1, branch_id=db_borrow.branch_id or get_default_branch_id(db)
+        )
+    
+    db_book = db.query(Book).filter(Book.id == db_borrow.book_id).with_for_update().first()
     db_book.quantity += 1
     db.add(db_book)
+    promote_holds(db, db_book)
     
-    db.commit()
+    record_audit_event(
+        db, "return", "borrowed_book", db_borrow.id,
+        book_id=db_borrow.book_id,
+        reader_id=db_borrow.reader_id,
+        copy_id=db_borrow.copy_id,
+        branch_id=db_borrow.branch_id,
+        returned_at=db_borrow.return_date,
+    )
+    _commit_with_feed(db, db_borrow, "returns", db_borrow.return_date.date())
+    audit_dispatcher.notify()
     db.refresh(db_borrow)
+    if not is_branch_session(db):
+        catalog_snapshot.upsert(db_book)
+        availability_hub.publish(db_book.id, db_book.quantity)
     return db_borrow
 
 
-def get_all_borrowed_books(db: Session, skip: int = 0, limit: int = 100) -> List[BorrowedBook]:
-    return db.query(BorrowedBook).offset(skip).limit(limit).all()
\ No newline at end of file
+def get_all_borrowed_books(
+    db: Session, skip: int = 0, limit: int = 100, branch_id: Optional[int] = None
+) -> List[BorrowedBook]:
+    query = db.query(BorrowedBook)
+    if branch_id is not None:
+        query = query.filter(BorrowedBook.branch_id == branch_id)
+    return query.offset(skip).limit(limit).all()
+
+
+_LOAN_COLUMNS = (
+    "id", "book_id", "reader_id", "copy_id", "branch_id", "borrow_date", "due_date", "return_date"
+)
+
+
+def get_reader_history(
+    db: Session,
+    reader_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    branch_id: Optional[int] = None,
+) -> List[Tuple]:
+    """Все выдачи читателя, включая архивные, от новых к старым."""
+    hot = select(*(getattr(BorrowedBook, name) for name in _LOAN_COLUMNS)).where(
+        BorrowedBook.reader_id == reader_id
+    )
+    archived = select(*(getattr(ArchivedBorrowedBook, name) for name in _LOAN_COLUMNS)).where(
+        ArchivedBorrowedBook.reader_id == reader_id
+    )
+    if branch_id is not None:
+        hot = hot.where(BorrowedBook.branch_id == branch_id)
+        archived = archived.where(ArchivedBorrowedBook.branch_id == branch_id)
+    history = union_all(hot, archived).subquery()
+    return db.execute(
+        select(history)
+        .order_by(history.c.borrow_date.desc(), history.c.id.desc())
+        .offset(skip)
+        .limit(limit)
+    ).all()
+
+
+def archive_loans(
+    db: Session, before: datetime, batch_size: int, after_id: int = 0
+) -> Tuple[int, Optional[int]]:
+    """Переносит одну порцию возвращенных до before выдач в архив.
+
+    Выдачи просматриваются по возрастанию id начиная с after_id, каждая
+    порция - отдельная короткая транзакция. Выдачи со штрафом (и
+    возвращенные с просрочкой) остаются в borrowed_books: на них ссылается
+    таблица fines. Возвращает число перенесенных выдач и id, с которого
+    продолжать, либо None, если подходящих выдач больше нет.
+    """
+    ids = [
+        borrow_id for borrow_id, in db.query(BorrowedBook.id)
+        .filter(
+            BorrowedBook.id > after_id,
+            BorrowedBook.return_date.isnot(None),
+            BorrowedBook.return_date < before,
+            or_(
+                BorrowedBook.due_date.is_(None),
+                days_between(BorrowedBook.return_date, BorrowedBook.due_date) < 1,
+            ),
+            ~exists().where(Fine.borrowed_book_id == BorrowedBook.id),
+        )
+        .order_by(BorrowedBook.id)
+        .limit(batch_size)
+    ]
+    if not ids:
+        return 0, None
+    
+    columns = [getattr(BorrowedBook, name) for name in _LOAN_COLUMNS]
+    db.execute(
+        insert(ArchivedBorrowedBook).from_select(
+            list(_LOAN_COLUMNS), select(*columns).where(BorrowedBook.id.in_(ids))
+        )
+    )
+    db.execute(delete(BorrowedBook).where(BorrowedBook.id.in_(ids)))
+    # Без этой записи прежние upsert этих выдач в ленте указывали бы в пустоту
+    for borrow_id in ids:
+        record_change(db, "borrowed_book", borrow_id, "archive")
+    db.commit()
+    return len(ids), ids[-1] if len(ids) == batch_size else None
@@ -0,0 +1,37 @@
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.branch import Branch
+from app.schemas.branch import BranchCreate
+
+
+def get_branch(db: Session, branch_id: int) -> Optional[Branch]:
+    return db.query(Branch).filter(Branch.id == branch_id).first()
+
+
+def get_branch_by_code(db: Session, code: str) -> Optional[Branch]:
+    return db.query(Branch).filter(Branch.code == code).first()
+
+
+def get_branches(db: Session) -> List[Branch]:
+    return db.query(Branch).order_by(Branch.id).all()
+
+
+def create_branch(db: Session, branch: BranchCreate) -> Branch:
+    db_branch = Branch(**branch.dict())
+    db.add(db_branch)
+    db.commit()
+    db.refresh(db_branch)
+    return db_branch
+
+
+def get_default_branch_id(db: Session) -> int:
+    """Филиал, куда попадают экземпляры без явно указанного филиала."""
+    db_branch = get_branch_by_code(db, settings.DEFAULT_BRANCH_CODE)
+    if db_branch is None:
+        db_branch = Branch(code=settings.DEFAULT_BRANCH_CODE, name="Основной филиал")
+        db.add(db_branch)
+        db.flush()
+    return db_branch.id
@@ -0,0 +1,82 @@
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import func, or_, text
+from sqlalchemy.orm import Session
+
+from app.models.book import Book
+from app.models.borrowed_book import BorrowedBook
+from app.models.change import Change
+from app.models.reader import Reader
+
+_ENTITY_MODELS = {"book": Book, "reader": Reader, "borrowed_book": BorrowedBook}
+CHANGE_ENTITIES = tuple(_ENTITY_MODELS)
+
+
+def record_change(
+    db: Session,
+    entity: str,
+    entity_id: int,
+    operation: str = "upsert",
+    branch_id: Optional[int] = None,
+) -> None:
+    db.add(Change(entity=entity, entity_id=entity_id, operation=operation, branch_id=branch_id))
+
+
+def get_changes(
+    db: Session,
+    since: int = 0,
+    limit: int = 500,
+    entities: Optional[Sequence[str]] = None,
+    until: Optional[int] = None,
+) -> List[Change]:
+    query = db.query(Change).filter(Change.id > since)
+    if until is not None:
+        query = query.filter(Change.id <= until)
+    if entities:
+        query = query.filter(Change.entity.in_(entities))
+    return query.order_by(Change.id).limit(limit).all()
+
+
+def get_last_change_id(db: Session) -> int:
+    return db.query(func.max(Change.id)).scalar() or 0
+
+
+def get_change_ids(db: Session, after_id: int = 0, ids: Iterable[int] = ()) -> List[int]:
+    """Номера записей больше ``after_id`` или из ``ids``."""
+    ids = list(ids)
+    condition = Change.id > after_id
+    if ids:
+        condition = or_(condition, Change.id.in_(ids))
+    return [row_id for row_id, in db.query(Change.id).filter(condition).order_by(Change.id)]
+
+
+def get_transaction_horizon(db: Session) -> Optional[Tuple[float, Optional[float]]]:
+    """Время БД и начало самой старой чужой открытой транзакции (epoch).
+
+    Есть только в PostgreSQL; для других БД возвращает ``None``.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+    now, oldest = db.execute(text(
+        "SELECT EXTRACT(EPOCH FROM clock_timestamp()), EXTRACT(EPOCH FROM min(xact_start)) "
+        "FROM pg_stat_activity "
+        "WHERE datname = current_database() AND pid <> pg_backend_pid() "
+        "AND xact_start IS NOT NULL"
+    )).one()
+    return float(now), float(oldest) if oldest is not None else None
+
+
+def get_changed_entities(
+    db: Session, changes: Sequence[Change]
+) -> Dict[Tuple[str, int], Any]:
+    ids: Dict[str, Set[int]] = {}
+    for change in changes:
+        if change.operation == "upsert":
+            ids.setdefault(change.entity, set()).add(change.entity_id)
+    
+    entities: Dict[Tuple[str, int], Any] = {}
+    for entity, entity_ids in ids.items():
+        model = _ENTITY_MODELS[entity]
+        for obj in db.query(model).filter(model.id.in_(entity_ids)):
+            entities[(entity, obj.id)] = obj
+    return entities
@@ -0,0 +1,87 @@
+import uuid
+from typing import List, Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.models.book_copy import BookCopy
+
+
+def generate_barcode(book_id: int) -> str:
+    """Штрихкод для экземпляра, заведенного без этикетки."""
+    return f"{book_id}-{uuid.uuid4().hex[:10].upper()}"
+
+
+def get_copy(db: Session, copy_id: int) -> Optional[BookCopy]:
+    return db.query(BookCopy).filter(BookCopy.id == copy_id).first()
+
+
+def get_copy_by_barcode(db: Session, barcode: str) -> Optional[BookCopy]:
+    return db.query(BookCopy).filter(BookCopy.barcode == barcode).first()
+
+
+def get_copies_by_book(
+    db: Session, book_id: int, branch_id: Optional[int] = None
+) -> List[BookCopy]:
+    query = db.query(BookCopy).filter(BookCopy.book_id == book_id)
+    if branch_id is not None:
+        query = query.filter(BookCopy.branch_id == branch_id)
+    return query.order_by(BookCopy.id).all()
+
+
+def add_copies(
+    db: Session, book_id: int, count: int, branch_id: int
+) -> List[BookCopy]:
+    copies = [
+        BookCopy(
+            book_id=book_id,
+            barcode=generate_barcode(book_id),
+            status="available",
+            branch_id=branch_id,
+        )
+        for _ in range(count)
+    ]
+    db.add_all(copies)
+    return copies
+
+
+def claim_copies(
+    db: Session,
+    book_id: int,
+    from_status: str,
+    to_status: str,
+    count: int = 1,
+    branch_id: Optional[int] = None,
+) -> List[int]:
+    """Переводит до count экземпляров книги из одного статуса в другой.
+
+    Кандидаты выбираются через FOR UPDATE SKIP LOCKED, поэтому параллельные
+    выдачи одной книги берут разные экземпляры и не ждут друг друга.
+    SQLite этого не поддерживает, поэтому каждый экземпляр забирается
+    условным UPDATE по старому статусу: если его уже забрали, берется
+    следующий. С branch_id экземпляры берутся только в этом филиале.
+    Коммит остается за вызывающим кодом.
+    """
+    claimed: List[int] = []
+    while len(claimed) < count:
+        query = db.query(BookCopy.id).filter(
+            BookCopy.book_id == book_id,
+            BookCopy.status == from_status,
+        )
+        if branch_id is not None:
+            query = query.filter(BookCopy.branch_id == branch_id)
+        candidates = query.order_by(BookCopy.id).limit(
+            count - len(claimed)
+        ).with_for_update(skip_locked=True).all()
+        if not candidates:
+            break
+        for copy_id, in candidates:
+            result = db.execute(
+                update(BookCopy)
+                .where(BookCopy.id == copy_id, BookCopy.status == from_status)
+                .values(status=to_status)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount:
+                claimed.append(copy_id)
+    return claimed
@@ -0,0 +1,192 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, bindparam, case, exists, false, func, insert, literal, or_, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.types import DateTime, Float
+
+from app.core.config import settings
+from app.database.functions import days_between
+from app.models.borrowed_book import BorrowedBook
+from app.models.fine import Fine
+from app.models.job_state import JobState
+
+JOB_NAME = "fines"
+
+
+def _naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def get_fine(db: Session, fine_id: int) -> Optional[Fine]:
+    return db.query(Fine).filter(Fine.id == fine_id).first()
+
+
+def get_fines_by_reader(
+    db: Session, reader_id: int, unpaid_only: bool = False
+) -> List[Fine]:
+    query = db.query(Fine).filter(Fine.reader_id == reader_id)
+    if unpaid_only:
+        query = query.filter(Fine.paid.is_(False))
+    return query.order_by(Fine.id).all()
+
+
+def pay_fine(db: Session, db_fine: Fine) -> Fine:
+    db_fine.paid = True
+    db_fine.paid_at = datetime.utcnow()
+    db.add(db_fine)
+    db.commit()
+    db.refresh(db_fine)
+    return db_fine
+
+
+def get_fines_report(db: Session, date_from: datetime, date_to: datetime) -> Dict:
+    paid_amount = func.sum(case((Fine.paid.is_(True), Fine.amount), else_=0))
+    row = db.query(
+        func.count(Fine.id),
+        func.coalesce(func.sum(Fine.amount), 0),
+        func.coalesce(paid_amount, 0),
+    ).filter(Fine.created_at >= date_from, Fine.created_at < date_to).one()
+    
+    fines_count, total_amount, paid = row
+    return {
+        "date_from": date_from,
+        "date_to": date_to,
+        "fines_count": fines_count,
+        "total_amount": float(total_amount),
+        "paid_amount": float(paid),
+        "unpaid_amount": float(total_amount) - float(paid),
+    }
+
+
+def settle_fine(db: Session, db_borrow: BorrowedBook) -> Optional[Fine]:
+    """Фиксирует итоговый штраф при возврате книги.
+
+    Вызывается внутри транзакции возврата; коммит остается за вызывающим кодом.
+    """
+    if db_borrow.due_date is None:
+        return None
+    
+    due_date = _naive_utc(db_borrow.due_date)
+    days_overdue = (db_borrow.return_date - due_date) // timedelta(days=1)
+    db_fine = db.query(Fine).filter(Fine.borrowed_book_id == db_borrow.id).first()
+    if days_overdue < 1 and db_fine is None:
+        return None
+    
+    if db_fine is None:
+        db_fine = Fine(
+            borrowed_book_id=db_borrow.id,
+            reader_id=db_borrow.reader_id,
+            created_at=db_borrow.return_date,
+        )
+    elif db_fine.paid:
+        return db_fine
+    
+    db_fine.days_overdue = days_overdue
+    db_fine.amount = days_overdue * settings.FINE_DAILY_RATE
+    db.add(db_fine)
+    return db_fine
+
+
+def _get_watermark(db: Session) -> Optional[datetime]:
+    state = db.query(JobState).filter(JobState.name == JOB_NAME).first()
+    return state.watermark if state else None
+
+
+def _set_watermark(db: Session, watermark: datetime) -> None:
+    state = db.query(JobState).filter(JobState.name == JOB_NAME).first()
+    if state is None:
+        state = JobState(name=JOB_NAME)
+    state.watermark = watermark
+    db.add(state)
+
+
+def _fine_columns(now, days):
+    return [
+        BorrowedBook.id,
+        BorrowedBook.reader_id,
+        days,
+        days * literal(settings.FINE_DAILY_RATE, Float),
+        false(),
+        now,
+    ]
+
+
+_FINE_INSERT_TARGETS = ["borrowed_book_id", "reader_id", "days_overdue", "amount", "paid", "created_at"]
+
+
+def _backfill(db: Session, now, cutoff: datetime, chunk_size: int) -> int:
+    """Первый запуск: штрафы по всей истории выдач, порциями по диапазонам id."""
+    days = days_between(func.coalesce(BorrowedBook.return_date, now), BorrowedBook.due_date)
+    max_id = db.query(func.max(BorrowedBook.id)).scalar() or 0
+    inserted = 0
+    for low in range(0, max_id, chunk_size):
+        query = select(*_fine_columns(now, days)).where(
+            BorrowedBook.id > low,
+            BorrowedBook.id <= low + chunk_size,
+            BorrowedBook.due_date <= cutoff,
+            or_(
+                BorrowedBook.return_date.is_(None),
+                days_between(BorrowedBook.return_date, BorrowedBook.due_date) >= 1,
+            ),
+            ~exists().where(Fine.borrowed_book_id == BorrowedBook.id),
+        )
+        inserted += db.execute(insert(Fine).from_select(_FINE_INSERT_TARGETS, query)).rowcount
+        db.commit()
+    return inserted
+
+
+def accrue_fines(
+    db: Session,
+    now: Optional[datetime] = None,
+    backfill_chunk: int = settings.FINES_BACKFILL_CHUNK,
+) -> Dict[str, int]:
+    """Начисляет штрафы по активным просроченным выдачам.
+
+    Штраф появляется, когда выдача просрочена хотя бы на сутки. Отметка
+    времени предыдущего запуска хранится в job_states, поэтому новые
+    штрафы ищутся только среди выдач, ставших просроченными после него.
+    Начисленные суммы обновляются одним UPDATE и только там, где сменилось
+    число дней. Повторный запуск с тем же now ничего не меняет.
+    Штрафы по возвращенным книгам фиксирует settle_fine при возврате.
+    """
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(days=1)
+    now_param = bindparam("now", now, type_=DateTime(timezone=True))
+    watermark = _get_watermark(db)
+    if watermark is not None:
+        watermark = _naive_utc(watermark)
+        if cutoff <= watermark:
+            cutoff = watermark
+    
+    if watermark is None:
+        inserted = _backfill(db, now_param, cutoff, backfill_chunk)
+    else:
+        days = days_between(now_param, BorrowedBook.due_date)
+        query = select(*_fine_columns(now_param, days)).where(
+            BorrowedBook.return_date.is_(None),
+            BorrowedBook.due_date > watermark,
+            BorrowedBook.due_date <= cutoff,
+            ~exists().where(Fine.borrowed_book_id == BorrowedBook.id),
+        )
+        inserted = db.execute(insert(Fine).from_select(_FINE_INSERT_TARGETS, query)).rowcount
+    
+    days = days_between(now_param, BorrowedBook.due_date)
+    updated = db.execute(
+        update(Fine)
+        .where(and_(
+            Fine.borrowed_book_id == BorrowedBook.id,
+            BorrowedBook.return_date.is_(None),
+            BorrowedBook.due_date <= cutoff,
+            Fine.paid.is_(False),
+            Fine.days_overdue != days,
+        ))
+        .values(days_overdue=days, amount=days * literal(settings.FINE_DAILY_RATE, Float))
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    
+    _set_watermark(db, cutoff)
+    db.commit()
+    return {"inserted": inserted, "updated": updated}
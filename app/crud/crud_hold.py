@@ -0,0 +1,151 @@
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud.crud_change import record_change
+from app.crud.crud_copy import claim_copies
+from app.models.book import Book
+from app.models.hold import Hold
+from app.schemas.hold import HoldCreate
+from app.services.availability import availability_hub
+from app.services.catalog import catalog_snapshot
+
+ACTIVE_STATUSES = ("waiting", "ready")
+
+
+def get_hold(db: Session, hold_id: int) -> Optional[Hold]:
+    return db.query(Hold).filter(Hold.id == hold_id).first()
+
+
+def get_active_hold(db: Session, book_id: int, reader_id: int) -> Optional[Hold]:
+    return db.query(Hold).filter(
+        Hold.book_id == book_id,
+        Hold.reader_id == reader_id,
+        Hold.status.in_(ACTIVE_STATUSES),
+    ).first()
+
+
+def get_ready_hold(db: Session, book_id: int, reader_id: int) -> Optional[Hold]:
+    return db.query(Hold).filter(
+        Hold.book_id == book_id,
+        Hold.reader_id == reader_id,
+        Hold.status == "ready",
+    ).first()
+
+
+def get_book_queue(db: Session, book_id: int) -> List[Hold]:
+    return db.query(Hold).filter(
+        Hold.book_id == book_id,
+        Hold.status.in_(ACTIVE_STATUSES),
+    ).order_by(Hold.id).all()
+
+
+def get_active_holds_by_reader(db: Session, reader_id: int) -> List[Hold]:
+    return db.query(Hold).filter(
+        Hold.reader_id == reader_id,
+        Hold.status.in_(ACTIVE_STATUSES),
+    ).order_by(Hold.id).all()
+
+
+def create_hold(db: Session, hold_in: HoldCreate) -> Hold:
+    db_hold = Hold(book_id=hold_in.book_id, reader_id=hold_in.reader_id, status="waiting")
+    db.add(db_hold)
+    db.commit()
+    db.refresh(db_hold)
+    return db_hold
+
+
+def promote_holds(db: Session, db_book: Book, now: Optional[datetime] = None) -> List[Hold]:
+    """Отдает свободные экземпляры первым в очереди.
+
+    Вызывается внутри транзакции, которая увеличила quantity; коммит
+    остается за вызывающим кодом. Под каждую готовую бронь откладывается
+    экземпляр (статус on_hold).
+    """
+    if db_book.quantity <= 0:
+        return []
+    
+    now = now or datetime.utcnow()
+    holds = db.query(Hold).filter(
+        Hold.book_id == db_book.id,
+        Hold.status == "waiting",
+    ).order_by(Hold.id).limit(db_book.quantity).with_for_update(skip_locked=True).all()
+    copies = claim_copies(db, db_book.id, "available", "on_hold", len(holds))
+    holds = holds[:len(copies)]
+    
+    for hold in holds:
+        hold.status = "ready"
+        hold.ready_at = now
+        hold.expires_at = now + timedelta(days=settings.HOLD_PICKUP_DAYS)
+        db.add(hold)
+    
+    db_book.quantity -= len(holds)
+    db.add(db_book)
+    return holds
+
+
+def cancel_hold(db: Session, db_hold: Hold) -> Hold:
+    # Блокируем бронь, чтобы параллельная отмена или истечение не вернули экземпляр дважды
+    db_hold = db.query(Hold).filter(Hold.id == db_hold.id).with_for_update().populate_existing().one()
+    if db_hold.status not in ACTIVE_STATUSES:
+        db.rollback()
+        raise ValueError("Бронь уже не активна")
+    
+    released = db_hold.status == "ready"
+    db_hold.status = "cancelled"
+    db.add(db_hold)
+    
+    db_book = None
+    if released:
+        db_book = db.query(Book).filter(
+            Book.id == db_hold.book_id
+        ).with_for_update().populate_existing().one()
+        claim_copies(db, db_book.id, "on_hold", "available")
+        db_book.quantity += 1
+        promote_holds(db, db_book)
+        record_change(db, "book", db_book.id)
+    
+    db.commit()
+    db.refresh(db_hold)
+    if db_book is not None:
+        catalog_snapshot.upsert(db_book)
+        availability_hub.publish(db_book.id, db_book.quantity)
+    return db_hold
+
+
+def expire_holds(
+    db: Session, now: Optional[datetime] = None, batch_size: int = 1000
+) -> int:
+    """Снимает одну пачку просроченных броней и возвращает ее размер.
+
+    Статусы меняются одним UPDATE, освободившиеся экземпляры сразу
+    передаются следующим в очереди.
+    """
+    now = now or datetime.utcnow()
+    rows = db.query(Hold.id, Hold.book_id).filter(
+        Hold.status == "ready",
+        Hold.expires_at < now,
+    ).order_by(Hold.expires_at).limit(batch_size).with_for_update(skip_locked=True).all()
+    if not rows:
+        return 0
+    
+    db.query(Hold).filter(Hold.id.in_([row.id for row in rows])).update(
+        {Hold.status: "expired"}, synchronize_session=False
+    )
+    
+    released = Counter(row.book_id for row in rows)
+    books = db.query(Book).filter(Book.id.in_(released)).order_by(Book.id).with_for_update().all()
+    for db_book in books:
+        claim_copies(db, db_book.id, "on_hold", "available", released[db_book.id])
+        db_book.quantity += released[db_book.id]
+        promote_holds(db, db_book, now=now)
+        record_change(db, "book", db_book.id)
+    
+    db.commit()
+    for db_book in books:
+        catalog_snapshot.upsert(db_book)
+        availability_hub.publish(db_book.id, db_book.quantity)
+    return len(rows)
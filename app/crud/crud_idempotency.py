@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from sqlalchemy import delete, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.idempotency_key import IdempotencyKey
+
+
+def claim_idempotency_key(
+    db: Session, user_id: int, key: str, fingerprint: str, now: Optional[datetime] = None
+) -> Tuple[IdempotencyKey, bool]:
+    """Занимает ключ; возвращает (запись, занята ли она этим вызовом).
+
+    Уникальный индекс (user_id, key) гарантирует, что из двух
+    одновременных запросов выполнится только один. Истекшая запись
+    заменяется новой. Незавершенная запись, у которой истекла аренда
+    ``locked_until`` (воркер упал между занятием ключа и сохранением
+    ответа), переходит к повтору того же запроса.
+    """
+    now = now or datetime.utcnow()
+    locked_until = now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS)
+    while True:
+        db_key = IdempotencyKey(
+            user_id=user_id,
+            key=key,
+            fingerprint=fingerprint,
+            expires_at=now + timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS),
+            locked_until=locked_until,
+        )
+        db.add(db_key)
+        try:
+            db.commit()
+            db.refresh(db_key)
+            return db_key, True
+        except IntegrityError:
+            db.rollback()
+        
+        existing = db.query(IdempotencyKey).filter(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key == key,
+            IdempotencyKey.expires_at > now,
+        ).first()
+        if existing is not None:
+            if existing.status_code is not None or existing.fingerprint != fingerprint:
+                return existing, False
+            # Условный UPDATE: аренду забирает только один из повторов
+            taken = db.execute(
+                update(IdempotencyKey)
+                .where(
+                    IdempotencyKey.id == existing.id,
+                    IdempotencyKey.status_code.is_(None),
+                    or_(IdempotencyKey.locked_until.is_(None), IdempotencyKey.locked_until <= now),
+                )
+                .values(locked_until=locked_until)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.commit()
+            db.refresh(existing)
+            return existing, bool(taken)
+        db.execute(
+            delete(IdempotencyKey)
+            .where(
+                IdempotencyKey.user_id == user_id,
+                IdempotencyKey.key == key,
+                IdempotencyKey.expires_at <= now,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+
+def complete_idempotency_key(
+    db: Session, key_id: int, status_code: int, body: bytes, media_type: Optional[str]
+) -> None:
+    db.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.id == key_id)
+        .values(status_code=status_code, response_body=body, media_type=media_type)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+def release_idempotency_key(db: Session, key_id: int) -> None:
+    """Освобождает ключ после сбоя, чтобы повтор выполнился заново."""
+    db.execute(
+        delete(IdempotencyKey)
+        .where(IdempotencyKey.id == key_id, IdempotencyKey.status_code.is_(None))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+def purge_expired_idempotency_keys(
+    db: Session, now: Optional[datetime] = None, batch_size: int = 1000
+) -> int:
+    """Удаляет одну пачку истекших ключей и возвращает ее размер."""
+    now = now or datetime.utcnow()
+    ids = [
+        row.id for row in db.query(IdempotencyKey.id)
+        .filter(IdempotencyKey.expires_at < now)
+        .order_by(IdempotencyKey.expires_at)
+        .limit(batch_size)
+    ]
+    if not ids:
+        return 0
+    db.execute(
+        delete(IdempotencyKey)
+        .where(IdempotencyKey.id.in_(ids))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return len(ids)
@@ -2,6 +2,7 @@ from typing import List, Optional
 
 from sqlalchemy.orm import Session
 
+from app.crud.crud_change import record_change
 from app.models.reader import Reader
 from app.schemas.reader import ReaderCreate, ReaderUpdate
 
@@ -21,6 +22,8 @@ def get_readers(db: Session, skip: int = 0, limit: int = 100) -> List[Reader]:
 def create_reader(db: Session, reader: ReaderCreate) -> Reader:
     db_reader = Reader(**reader.dict())
     db.add(db_reader)
+    db.flush()
+    record_change(db, "reader", db_reader.id)
     db.commit()
     db.refresh(db_reader)
     return db_reader
@@ -33,11 +36,13 @@ def update_reader(db: Session, db_reader: Reader, reader_in: ReaderUpdate) -> Re
         setattr(db_reader, field, value)
     
     db.add(db_reader)
+    record_change(db, "reader", db_reader.id)
     db.commit()
     db.refresh(db_reader)
     return db_reader
 
 
 def delete_reader(db: Session, db_reader: Reader) -> None:
+    record_change(db, "reader", db_reader.id, "delete")
     db.delete(db_reader)
     db.commit()
\ No newline at end of file
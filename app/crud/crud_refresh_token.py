@@ -0,0 +1,67 @@
+import hashlib
+import secrets
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.refresh_token import RefreshToken
+
+
+def _hash(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def get_refresh_token(
+    db: Session, token: str, now: Optional[datetime] = None
+) -> Optional[RefreshToken]:
+    """Неистекший refresh-токен (в том числе отозванный) или None."""
+    now = now or datetime.utcnow()
+    return db.query(RefreshToken).filter(
+        RefreshToken.token_hash == _hash(token),
+        RefreshToken.expires_at > now,
+    ).first()
+
+
+def create_refresh_token(db: Session, user_id: int, family: Optional[str] = None) -> str:
+    token = secrets.token_urlsafe(32)
+    db.add(RefreshToken(
+        user_id=user_id,
+        token_hash=_hash(token),
+        family=family or uuid.uuid4().hex,
+        expires_at=datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    ))
+    db.commit()
+    return token
+
+
+def rotate_refresh_token(db: Session, db_token: RefreshToken) -> Optional[str]:
+    """Отзывает токен и выдает следующий в той же цепочке.
+
+    Возвращает None, если токен уже отозван, в том числе параллельным
+    запросом с тем же токеном.
+    """
+    revoked = db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.id == db_token.id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not revoked:
+        db.rollback()
+        return None
+    return create_refresh_token(db, user_id=db_token.user_id, family=db_token.family)
+
+
+def revoke_family(db: Session, family: str) -> int:
+    revoked = db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family == family, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return revoked
@@ -0,0 +1,51 @@
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.revoked_token import RevokedToken
+
+
+def revoke_token(db: Session, jti: str, expires_at: datetime) -> bool:
+    """Отзывает access-токен; False, если он уже был отозван."""
+    db.add(RevokedToken(jti=jti, expires_at=expires_at))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return False
+    return True
+
+
+def get_revoked_tokens(
+    db: Session,
+    after_id: int = 0,
+    ids: Iterable[int] = (),
+    limit: Optional[int] = None,
+) -> List[Tuple[int, str, datetime]]:
+    """Отзывы с id больше ``after_id`` или из ``ids``."""
+    ids = list(ids)
+    condition = RevokedToken.id > after_id
+    if ids:
+        condition = or_(condition, RevokedToken.id.in_(ids))
+    query = (
+        select(RevokedToken.id, RevokedToken.jti, RevokedToken.expires_at)
+        .where(condition)
+        .order_by(RevokedToken.id)
+    )
+    if limit is not None:
+        query = query.limit(limit)
+    return [tuple(row) for row in db.execute(query)]
+
+
+def delete_expired(db: Session, now: Optional[datetime] = None) -> int:
+    now = now or datetime.utcnow()
+    deleted = db.execute(
+        delete(RevokedToken)
+        .where(RevokedToken.expires_at <= now)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return deleted
@@ -1,20 +1,113 @@
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from fastapi import Depends, Header, Request
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 
 from app.core.config import settings
+from app.database.pool import TimedQueuePool
+
+
+def _create_engine(url: str):
+    sqlite = url.startswith("sqlite")
+    options = {}
+    # In-memory SQLite живет в одном соединении, пул ему не нужен
+    if not (sqlite and ":memory:" in url):
+        options["poolclass"] = TimedQueuePool
+    return create_engine(
+        url,
+        connect_args={"check_same_thread": False} if sqlite else {},
+        **options
+    )
 
-engine = create_engine(
-    settings.DATABASE_URL, 
-    connect_args={"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {}
-)
+
+engine = _create_engine(settings.DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Филиалы со своей БД: запросы к экземплярам и выдачам с заголовком
+# X-Branch-Id идут в нее и не делят пул соединений и нагрузку с остальными
+# филиалами
+branch_sessions: Dict[int, sessionmaker] = {
+    branch_id: sessionmaker(autocommit=False, autoflush=False, bind=_create_engine(url))
+    for branch_id, url in settings.BRANCH_DATABASE_URLS.items()
+}
+
 Base = declarative_base()
 
-def get_db():
+
+def branch_of(db: Session) -> Optional[int]:
+    """id филиала, в чью отдельную БД смотрит сессия, или None для основной."""
+    bind = db.get_bind()
+    for branch_id, factory in branch_sessions.items():
+        if factory.kw["bind"] is bind:
+            return branch_id
+    return None
+
+
+def is_branch_session(db: Session) -> bool:
+    """Сессия БД филиала: снимки и индексы в памяти ее не описывают."""
+    return branch_of(db) is not None
+
+
+def other_databases(db: Session) -> List[sessionmaker]:
+    """Фабрики сессий всех остальных БД: основной и филиалов, кроме db."""
+    if not branch_sessions:
+        return []
+    bind = db.get_bind()
+    factories = [factory for factory in branch_sessions.values() if factory.kw["bind"] is not bind]
+    if is_branch_session(db):
+        factories.insert(0, SessionLocal)
+    return factories
+
+
+@contextmanager
+def main_session(db: Session) -> Iterator[Session]:
+    """Сессия основной БД для записей, которые читают только из нее.
+
+    Для сессии основной БД это она сама. Для БД филиала открывается
+    отдельная сессия; фиксировать ее нужно сразу после коммита ``db``.
+    """
+    if not is_branch_session(db):
+        yield db
+        return
+    main_db = SessionLocal()
+    try:
+        yield main_db
+    finally:
+        main_db.close()
+
+
+def get_db(request: Request):
+    # Подзапросы /batch работают в сессии пакета
+    shared = request.scope.get("batch_db")
+    if shared is not None:
+        yield shared
+        return
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+
+def get_branch_db(
+    request: Request,
+    x_branch_id: Optional[int] = Header(None),
+    db: Session = Depends(get_db),
+):
+    """Сессия для экземпляров и выдач: БД филиала из X-Branch-Id или основная.
+
+    Аутентификация, токены, ключи, каталог и лента изменений всегда идут
+    в основную БД через ``get_db``.
+    """
+    factory = branch_sessions.get(x_branch_id)
+    if factory is None or "batch_db" in request.scope:
+        yield db
+        return
+    branch_db = factory()
+    try:
+        yield branch_db
+    finally:
+        branch_db.close()
@@ -0,0 +1,29 @@
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.types import Integer
+
+
+class days_between(FunctionElement):
+    """Число полных суток между двумя моментами времени (end - start)."""
+
+    type = Integer()
+    inherit_cache = True
+    name = "days_between"
+
+
+@compiles(days_between)
+def _days_between_default(element, compiler, **kw):
+    end, start = list(element.clauses)
+    return "CAST(floor(EXTRACT(EPOCH FROM (%s - %s)) / 86400) AS INTEGER)" % (
+        compiler.process(end, **kw),
+        compiler.process(start, **kw),
+    )
+
+
+@compiles(days_between, "sqlite")
+def _days_between_sqlite(element, compiler, **kw):
+    end, start = list(element.clauses)
+    return "CAST(julianday(%s) - julianday(%s) AS INTEGER)" % (
+        compiler.process(end, **kw),
+        compiler.process(start, **kw),
+    )
@@ -0,0 +1,54 @@
+import threading
+import time
+from collections import deque
+from typing import Deque, Tuple
+
+from sqlalchemy.pool import QueuePool
+
+from app.core.config import settings
+
+
+class PoolWaitStats:
+    """Среднее ожидание соединения из пула за последние ``window_seconds``.
+
+    Старые замеры выпадают из окна сами, поэтому после снятия нагрузки
+    среднее возвращается к нулю даже без новых запросов к БД.
+    """
+
+    def __init__(self, window_seconds: float) -> None:
+        self.window_seconds = window_seconds
+        self._lock = threading.Lock()
+        self._samples: Deque[Tuple[float, float]] = deque()
+        self._total = 0.0
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append((time.monotonic(), seconds))
+            self._total += seconds
+            self._trim()
+
+    def average(self) -> float:
+        with self._lock:
+            self._trim()
+            if not self._samples:
+                return 0.0
+            return max(self._total, 0.0) / len(self._samples)
+
+    def _trim(self) -> None:
+        cutoff = time.monotonic() - self.window_seconds
+        while self._samples and self._samples[0][0] < cutoff:
+            self._total -= self._samples.popleft()[1]
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool, замеряющий ожидание свободного соединения."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_wait.observe(time.perf_counter() - started)
+
+
+pool_wait = PoolWaitStats(window_seconds=settings.POOL_WAIT_WINDOW_SECONDS)
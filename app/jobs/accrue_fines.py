@@ -0,0 +1,27 @@
+"""Начисление штрафов за просрочку.
+
+Запуск: python -m app.jobs.accrue_fines (например, раз в час по cron).
+Первый запуск обрабатывает всю историю выдач порциями.
+"""
+import logging
+
+from app.crud.crud_fine import accrue_fines
+from app.database.base import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+def run() -> dict:
+    db = SessionLocal()
+    try:
+        return accrue_fines(db)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    result = run()
+    logger.info(
+        "Новых штрафов: %s, обновлено: %s", result["inserted"], result["updated"]
+    )
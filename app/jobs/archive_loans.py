@@ -0,0 +1,39 @@
+"""Перенос старых возвращенных выдач в borrowed_books_archive.
+
+Запуск: python -m app.jobs.archive_loans [--days 365] (например, раз в сутки по cron).
+"""
+import argparse
+import logging
+from datetime import datetime, timedelta
+
+from app.core.config import settings
+from app.crud.crud_borrowed_book import archive_loans
+from app.database.base import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+def run(
+    days: int = settings.ARCHIVE_AFTER_DAYS, batch_size: int = settings.ARCHIVE_BATCH
+) -> int:
+    before = datetime.utcnow() - timedelta(days=days)
+    total = 0
+    after_id = 0
+    db = SessionLocal()
+    try:
+        while after_id is not None:
+            archived, after_id = archive_loans(
+                db, before=before, batch_size=batch_size, after_id=after_id
+            )
+            total += archived
+    finally:
+        db.close()
+    return total
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=settings.ARCHIVE_AFTER_DAYS)
+    args = parser.parse_args()
+    logger.info("Перенесено в архив выдач: %s", run(days=args.days))
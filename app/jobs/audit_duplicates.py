@@ -0,0 +1,51 @@
+"""Аудит каталога на вероятные дубликаты.
+
+Запуск: python -m app.jobs.audit_duplicates [--csv duplicates.csv] [--threshold 0.7]
+"""
+import argparse
+import csv
+import logging
+import sys
+
+from app.database.base import SessionLocal
+from app.models.book import Book
+from app.services.duplicates import DuplicateIndex
+
+logger = logging.getLogger(__name__)
+
+CSV_FIELDS = ("first_id", "first_title", "first_author", "second_id", "second_title", "second_author", "score")
+
+
+def run(output, threshold: float = None) -> int:
+    db = SessionLocal()
+    try:
+        books = {
+            book_id: (title, author)
+            for book_id, title, author in db.query(Book.id, Book.title, Book.author).yield_per(10000)
+        }
+    finally:
+        db.close()
+    
+    index = DuplicateIndex()
+    index.load((book_id, title, author) for book_id, (title, author) in books.items())
+    pairs = index.pairs(threshold=threshold)
+    
+    writer = csv.writer(output)
+    writer.writerow(CSV_FIELDS)
+    for first, second, score in pairs:
+        writer.writerow((first, *books[first], second, *books[second], f"{score:.3f}"))
+    return len(pairs)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--csv", dest="csv_path")
+    parser.add_argument("--threshold", type=float)
+    args = parser.parse_args()
+    if args.csv_path:
+        with open(args.csv_path, "w", newline="", encoding="utf-8") as f:
+            found = run(f, args.threshold)
+    else:
+        found = run(sys.stdout, args.threshold)
+    logger.info("Найдено пар вероятных дубликатов: %s", found)
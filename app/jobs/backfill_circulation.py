@@ -0,0 +1,37 @@
+"""Построение дневных агрегатов выдач по истории.
+
+Запуск: python -m app.jobs.backfill_circulation [--before YYYY-MM-DD]
+Пересчитываются дни до before (по умолчанию - до сегодняшнего дня),
+события с before и позже учитываются при выдаче и возврате.
+"""
+import argparse
+import logging
+from datetime import date, datetime
+
+from app.crud.crud_analytics import backfill_circulation
+from app.database.base import SessionLocal, branch_sessions
+
+logger = logging.getLogger(__name__)
+
+
+def run(before: date, chunk_days: int = 30) -> int:
+    db = SessionLocal()
+    # Выдачи филиалов с отдельной БД тоже попадают в агрегаты основной
+    branch_dbs = [factory() for factory in branch_sessions.values()]
+    try:
+        return backfill_circulation(
+            db, before=before, chunk_days=chunk_days, branch_dbs=branch_dbs
+        )
+    finally:
+        for branch_db in branch_dbs:
+            branch_db.close()
+        db.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--before", type=date.fromisoformat, default=datetime.utcnow().date())
+    parser.add_argument("--chunk-days", type=int, default=30)
+    args = parser.parse_args()
+    logger.info("Обработано выдач: %s", run(args.before, args.chunk_days))
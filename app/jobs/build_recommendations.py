@@ -0,0 +1,44 @@
+"""Пересборка рекомендаций "с этой книгой также брали".
+
+Запуск: python -m app.jobs.build_recommendations (например, раз в сутки по cron).
+Результат пишется в RECOMMENDATIONS_DIR, API подхватывает новую сборку
+без перезапуска.
+"""
+import logging
+import time
+
+import numpy as np
+
+from app.core.config import settings
+from app.database.base import SessionLocal, branch_sessions
+from app.services.recommendations import build_similar, load_loans, save_similar
+
+logger = logging.getLogger(__name__)
+
+
+def run(top_k: int = settings.RECOMMENDATIONS_TOP_K) -> str:
+    started = time.perf_counter()
+    # Выдачи филиалов с отдельной БД читаются из их БД
+    parts = []
+    for factory in (SessionLocal, *branch_sessions.values()):
+        db = factory()
+        try:
+            parts.append(load_loans(db))
+        finally:
+            db.close()
+    reader_ids = np.concatenate([reader_part for reader_part, _ in parts])
+    book_ids = np.concatenate([book_part for _, book_part in parts])
+    loaded = time.perf_counter()
+    
+    arrays = build_similar(reader_ids, book_ids, top_k=top_k)
+    path = save_similar(settings.RECOMMENDATIONS_DIR, arrays)
+    logger.info(
+        "Выдач: %s, книг: %s, загрузка %.1f с, расчет %.1f с",
+        len(book_ids), len(arrays[0]), loaded - started, time.perf_counter() - loaded,
+    )
+    return path
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    logger.info("Сборка сохранена в %s", run())
@@ -0,0 +1,32 @@
+"""Снятие просроченных броней.
+
+Запуск: python -m app.jobs.expire_holds (например, раз в несколько минут по cron).
+"""
+import logging
+from datetime import datetime
+
+from app.core.config import settings
+from app.crud.crud_hold import expire_holds
+from app.database.base import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+def run(batch_size: int = settings.HOLD_EXPIRY_BATCH) -> int:
+    now = datetime.utcnow()
+    total = 0
+    db = SessionLocal()
+    try:
+        while True:
+            expired = expire_holds(db, now=now, batch_size=batch_size)
+            total += expired
+            if expired < batch_size:
+                break
+    finally:
+        db.close()
+    return total
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    logger.info("Снято просроченных броней: %s", run())
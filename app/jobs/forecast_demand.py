@@ -0,0 +1,38 @@
+"""Прогноз спроса и рекомендуемого числа экземпляров по всему фонду.
+
+Запуск: python -m app.jobs.forecast_demand [--csv demand.csv]
+Результат сохраняется в book_demand_forecasts (его отдает
+/api/v1/analytics/demand) и, при указании --csv, в CSV-файл.
+"""
+import argparse
+import logging
+
+from app.crud.crud_analytics import save_demand_forecasts
+from app.database.base import SessionLocal
+from app.services.demand import forecast_demand, iter_demand_csv
+
+logger = logging.getLogger(__name__)
+
+
+def run(csv_path: str = None) -> int:
+    db = SessionLocal()
+    try:
+        rows = forecast_demand(db)
+        save_demand_forecasts(db, rows)
+    finally:
+        db.close()
+    
+    if csv_path:
+        rows.sort(key=lambda row: (-row["copies_delta"], row["book_id"]))
+        with open(csv_path, "w", newline="", encoding="utf-8") as f:
+            for chunk in iter_demand_csv(rows):
+                f.write(chunk)
+    return len(rows)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--csv", dest="csv_path")
+    args = parser.parse_args()
+    logger.info("Прогноз посчитан для книг: %s", run(args.csv_path))
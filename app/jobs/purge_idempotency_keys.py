@@ -0,0 +1,32 @@
+"""Удаление истекших Idempotency-Key.
+
+Запуск: python -m app.jobs.purge_idempotency_keys (например, раз в час по cron).
+"""
+import logging
+from datetime import datetime
+
+from app.core.config import settings
+from app.crud.crud_idempotency import purge_expired_idempotency_keys
+from app.database.base import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+def run(batch_size: int = settings.IDEMPOTENCY_PURGE_BATCH) -> int:
+    now = datetime.utcnow()
+    total = 0
+    db = SessionLocal()
+    try:
+        while True:
+            purged = purge_expired_idempotency_keys(db, now=now, batch_size=batch_size)
+            total += purged
+            if purged < batch_size:
+                break
+    finally:
+        db.close()
+    return total
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    logger.info("Удалено истекших ключей идемпотентности: %s", run())
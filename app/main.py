@@ -1,15 +1,59 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.v1.api import api_router
 from app.core.config import settings
+from app.database.base import SessionLocal, branch_sessions
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.rate_limit import RateLimitMiddleware, bucket_store, load_shedder
+from app.services.audit import audit_dispatcher
+from app.services.autocomplete import autocomplete_changes, load_autocomplete_index
+from app.services.availability import availability_hub
+from app.services.catalog import catalog_snapshot
+from app.services.duplicates import load_duplicate_index
+from app.services.revocation import revocation_list
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    db = SessionLocal()
+    try:
+        load_autocomplete_index(db)
+        catalog_snapshot.load(db)
+        load_duplicate_index(db)
+        revocation_list.load(db)
+    finally:
+        db.close()
+    availability_hub.start()
+    revocation_list.start(SessionLocal)
+    autocomplete_changes.start(SessionLocal)
+    audit_dispatcher.start([SessionLocal, *branch_sessions.values()])
+    yield
+    audit_dispatcher.stop()
+    autocomplete_changes.stop()
+    revocation_list.stop()
+    availability_hub.stop()
+
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     debug=settings.DEBUG,
+    lifespan=lifespan,
 )
 
+# Добавлен раньше CORS, чтобы ответы 429/503 шли с CORS-заголовками
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(
+        RateLimitMiddleware,
+        limits=settings.RATE_LIMITS,
+        store=bucket_store,
+        shedder=load_shedder,
+        untracked_prefixes=[f"{settings.API_V1_STR}/events"],
+    )
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  
@@ -18,6 +62,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    large_size=settings.COMPRESSION_LARGE_SIZE,
+    gzip_level=settings.GZIP_LEVEL,
+    brotli_quality=settings.BROTLI_QUALITY,
+)
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
 
@@ -0,0 +1,128 @@
+import gzip
+from typing import List, Optional, Sequence
+
+import brotli
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Уже сжатые или бинарные форматы, где gzip почти ничего не дает
+_COMPRESSIBLE_PREFIXES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "application/msgpack",
+    "application/cbor",
+)
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """br, если клиент его принимает, иначе gzip; None - без сжатия."""
+    if not accept_encoding:
+        return None
+    accepted = set()
+    for part in accept_encoding.split(","):
+        coding, *params = [piece.strip() for piece in part.split(";")]
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            accepted.add(coding.lower())
+    if "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str, level: int) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=level)
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+class CompressionMiddleware:
+    """Сжатие ответов br/gzip с учетом размера тела.
+
+    Маленькие ответы не сжимаются: заголовки и CPU стоят дороже
+    выигрыша. Для больших ответов берется более быстрый уровень.
+    Потоковые ответы (SSE) пропускаются как есть.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        large_size: int = 256 * 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 5,
+        compressible_types: Sequence[str] = _COMPRESSIBLE_PREFIXES,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.large_size = large_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.compressible_types = tuple(compressible_types)
+
+    def level(self, encoding: str, size: int) -> int:
+        if encoding == "br":
+            return 1 if size >= self.large_size else self.brotli_quality
+        return 1 if size >= self.large_size else self.gzip_level
+
+    def _compressible(self, headers: Headers) -> bool:
+        if "content-encoding" in headers:
+            return False
+        media_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        return media_type.startswith(self.compressible_types)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: List[Message] = []
+        passthrough = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal passthrough
+            if message["type"] == "http.response.start":
+                start.append(message)
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+            if not start:
+                await send(message)
+                return
+            start_message = start.pop()
+            headers = MutableHeaders(scope=start_message)
+            body = message.get("body", b"")
+            if message.get("more_body", False):
+                # Потоковый ответ: сжатие по кускам ломает SSE-доставку
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+            if len(body) >= self.minimum_size and self._compressible(headers):
+                body = compress(body, encoding, self.level(encoding, len(body)))
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(body))
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    headers["ETag"] = f"W/{etag}"
+            if self._compressible(headers) or "content-encoding" in headers:
+                headers.add_vary_header("Accept-Encoding")
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body, "more_body": False})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,243 @@
+import logging
+import threading
+import time
+from typing import Dict, Optional, Sequence, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+from app.database.pool import PoolWaitStats, pool_wait
+from app.security.api_keys import api_key_cache, hash_secret, split_api_key
+from app.security.jwt import decode_token
+
+logger = logging.getLogger(__name__)
+
+_READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+# Через сколько обращений чистить ведра, простаивающие дольше полного
+# восстановления: такое ведро ничем не отличается от отсутствующего
+_SWEEP_EVERY = 10000
+
+
+def route_class(method: str, path: str) -> str:
+    if path.startswith(f"{settings.API_V1_STR}/auth"):
+        return "auth"
+    return "read" if method in _READ_METHODS else "write"
+
+
+def client_key(scope: Scope) -> str:
+    """Кого ограничивать: API-ключ, пользователь из JWT или IP.
+
+    Ключ и токен проверяются только по кешам в памяти; непроверенный
+    клиент считается по IP, чтобы чужим key_id нельзя было исчерпать
+    чужой лимит.
+    """
+    headers = Headers(scope=scope)
+    api_key = headers.get("x-api-key")
+    if api_key is not None:
+        parts = split_api_key(api_key)
+        if parts is not None:
+            entry = api_key_cache.get(parts[0])
+            if entry is not None and entry.key_hash == hash_secret(parts[1]):
+                return f"key:{entry.key_id}"
+    
+    authorization = headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        token_data = decode_token(authorization[7:])
+        if token_data is not None:
+            return f"user:{token_data.sub}"
+    
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+class MemoryBucketStore:
+    """Token bucket в памяти процесса: лимит действует на воркер."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._calls = 0
+
+    async def take(self, key: str, rate: float, capacity: float) -> Tuple[bool, float]:
+        """Забирает токен; возвращает (разрешено, через сколько секунд повторить)."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            self._calls += 1
+            if self._calls % _SWEEP_EVERY == 0:
+                self._sweep(now)
+        return allowed, 0.0 if allowed else (1 - tokens) / rate
+
+    def _sweep(self, now: float) -> None:
+        self._buckets = {
+            key: (tokens, updated) for key, (tokens, updated) in self._buckets.items()
+            if now - updated < 3600
+        }
+
+
+class RedisBucketStore:
+    """Token bucket в Redis: общий лимит для всех воркеров.
+
+    Ведро обновляется атомарно Lua-скриптом. При недоступности Redis
+    запрос пропускается, чтобы сбой лимитера не останавливал выдачу.
+    """
+
+    _script = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+    local tokens = tonumber(state[1]) or capacity
+    local updated = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+    local allowed = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+        allowed = 1
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+    return {allowed, tostring(tokens)}
+    """
+
+    def __init__(self, url: str) -> None:
+        try:
+            import redis.asyncio
+        except ImportError:
+            raise RuntimeError(
+                "RATE_LIMIT_BACKEND=redis требует пакет redis (pip install redis)"
+            ) from None
+
+        self._redis = redis.asyncio.from_url(url)
+        self._take = self._redis.register_script(self._script)
+
+    async def take(self, key: str, rate: float, capacity: float) -> Tuple[bool, float]:
+        try:
+            allowed, tokens = await self._take(
+                keys=[f"rate_limit:{key}"], args=[capacity, rate, time.time()]
+            )
+        except Exception:
+            logger.exception("Лимитер недоступен, запрос пропущен")
+            return True, 0.0
+        if allowed:
+            return True, 0.0
+        return False, (1 - float(tokens)) / rate
+
+
+class LoadShedder:
+    """Решает, принимать ли запрос при перегрузке.
+
+    Смотрит на число запросов в работе и среднее ожидание соединения из
+    пула. Чтения режутся уже при достижении порогов, запись и вход -
+    только при двукратном превышении, чтобы выдача и возврат книг
+    продолжали работать.
+    """
+
+    def __init__(self, max_in_flight: int, max_pool_wait: float, wait_stats: PoolWaitStats) -> None:
+        self.max_in_flight = max_in_flight
+        self.max_pool_wait = max_pool_wait
+        self.wait_stats = wait_stats
+        self.in_flight = 0
+
+    def admit(self, route: str) -> bool:
+        factor = 1 if route == "read" else 2
+        return (
+            self.in_flight < self.max_in_flight * factor
+            and self.wait_stats.average() < self.max_pool_wait * factor
+        )
+
+
+class RateLimitMiddleware:
+    """ASGI-middleware: лимиты по клиенту и сброс нагрузки.
+
+    Обрабатываются только запросы к API; ``untracked_prefixes`` (потоки
+    событий) лимитируются, но не считаются запросами в работе.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        limits: Dict[str, Tuple[float, float]],
+        store=None,
+        shedder: Optional[LoadShedder] = None,
+        untracked_prefixes: Sequence[str] = (),
+    ) -> None:
+        self.app = app
+        self.limits = {
+            route: (per_minute / 60, burst) for route, (per_minute, burst) in limits.items()
+        }
+        self.store = store or MemoryBucketStore()
+        self.shedder = shedder
+        self.untracked_prefixes = tuple(untracked_prefixes)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        path = scope.get("path", "")
+        if scope["type"] != "http" or not path.startswith(settings.API_V1_STR):
+            await self.app(scope, receive, send)
+            return
+        
+        route = route_class(scope["method"], path)
+        tracked = self.shedder is not None and not path.startswith(self.untracked_prefixes)
+        if tracked and not self.shedder.admit(route):
+            await JSONResponse(
+                {"detail": "Сервис перегружен, повторите запрос позже"},
+                status_code=503,
+                headers={"Retry-After": "1"},
+            )(scope, receive, send)
+            return
+        
+        if route in self.limits:
+            rate, capacity = self.limits[route]
+            allowed, retry_after = await self.store.take(
+                f"{route}:{client_key(scope)}", rate, capacity
+            )
+            if not allowed:
+                await JSONResponse(
+                    {"detail": "Слишком много запросов"},
+                    status_code=429,
+                    headers={"Retry-After": str(max(1, int(retry_after + 0.999)))},
+                )(scope, receive, send)
+                return
+        
+        if not tracked:
+            await self.app(scope, receive, send)
+            return
+        self.shedder.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.shedder.in_flight -= 1
+
+
+def _make_store():
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        return RedisBucketStore(settings.RATE_LIMIT_REDIS_URL)
+    return MemoryBucketStore()
+
+
+bucket_store = _make_store()
+
+
+async def take_token(scope: Scope, method: str, path: str) -> Tuple[bool, float]:
+    """Списывает токен за подзапрос пакета из того же ведра, что и middleware.
+
+    Подзапросы ``/batch`` идут мимо middleware, поэтому без этого один
+    пакет считался бы одним запросом.
+    """
+    route = route_class(method, path)
+    if not settings.RATE_LIMIT_ENABLED or route not in settings.RATE_LIMITS:
+        return True, 0.0
+    per_minute, burst = settings.RATE_LIMITS[route]
+    return await bucket_store.take(f"{route}:{client_key(scope)}", per_minute / 60, burst)
+load_shedder = LoadShedder(
+    max_in_flight=settings.LOAD_SHED_MAX_IN_FLIGHT,
+    max_pool_wait=settings.LOAD_SHED_MAX_POOL_WAIT_MS / 1000,
+    wait_stats=pool_wait,
+)
@@ -1,5 +1,19 @@
 from app.database.base import Base
 from app.models.user import User
+from app.models.branch import Branch
 from app.models.book import Book
+from app.models.book_copy import BookCopy
 from app.models.reader import Reader
-from app.models.borrowed_book import BorrowedBook 
\ No newline at end of file
+from app.models.borrowed_book import BorrowedBook
+from app.models.change import Change
+from app.models.hold import Hold
+from app.models.fine import Fine
+from app.models.job_state import JobState
+from app.models.circulation import BookCirculationDaily, ReaderCirculationDaily
+from app.models.demand_forecast import BookDemandForecast
+from app.models.borrowed_book_archive import ArchivedBorrowedBook
+from app.models.refresh_token import RefreshToken
+from app.models.revoked_token import RevokedToken
+from app.models.api_key import ApiKey, ApiKeyNonce
+from app.models.idempotency_key import IdempotencyKey
+from app.models.audit import AuditOutbox, AuditLog
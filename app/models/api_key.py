@@ -0,0 +1,38 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+
+from app.database.base import Base
+
+
+class ApiKey(Base):
+    __tablename__ = "api_keys"
+    __table_args__ = (
+        Index("ix_api_keys_user_id", "user_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    # Открытая часть ключа, по ней ключ ищется
+    key_id = Column(String, nullable=False, unique=True)
+    # HMAC-SHA256 секретной части на SECRET_KEY
+    key_hash = Column(String, nullable=False)
+    name = Column(String, nullable=False)
+    # Через пробел: "books:read borrowed-books", "*" - все ресурсы
+    scopes = Column(String, nullable=False, default="*")
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    revoked_at = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    user = relationship("User")
+
+
+class ApiKeyNonce(Base):
+    """Nonce подписанных запросов за окно допуска по времени: повтор - 401."""
+    __tablename__ = "api_key_nonces"
+    __table_args__ = (
+        Index("ix_api_key_nonces_created_at", "created_at"),
+    )
+
+    key_id = Column(String, primary_key=True)
+    nonce = Column(String, primary_key=True)
+    created_at = Column(DateTime(timezone=True), nullable=False)
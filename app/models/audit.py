@@ -0,0 +1,41 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
+from sqlalchemy.sql import func
+
+from app.database.base import Base
+
+
+class AuditOutbox(Base):
+    """Событие выдачи или учета фонда, еще не перенесенное в журнал.
+
+    Пишется в той же транзакции, что и само изменение.
+    """
+    __tablename__ = "audit_outbox"
+    # id не должны переиспользоваться после удаления: по ним журнал
+    # отбрасывает повторные доставки
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id = Column(Integer, primary_key=True, index=True)
+    event_type = Column(String, nullable=False)
+    entity = Column(String, nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    # JSON с подробностями события
+    payload = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class AuditLog(Base):
+    """Журнал аудита: записи только добавляются."""
+    __tablename__ = "audit_log"
+    __table_args__ = (
+        Index("ix_audit_log_entity", "entity", "entity_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    # id из outbox: повторная доставка того же события не дублирует запись
+    outbox_id = Column(Integer, nullable=False, unique=True)
+    event_type = Column(String, nullable=False)
+    entity = Column(String, nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    payload = Column(Text, nullable=False)
+    occurred_at = Column(DateTime(timezone=True), nullable=False)
+    recorded_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+
+from app.database.base import Base
+
+
+class BookCopy(Base):
+    __tablename__ = "book_copies"
+    __table_args__ = (
+        # Поиск свободного экземпляра книги при выдаче и постановке брони
+        Index("ix_book_copies_claim", "book_id", "status", "id"),
+        # То же в пределах филиала и списки фонда филиала
+        Index("ix_book_copies_branch_claim", "branch_id", "book_id", "status", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    book_id = Column(Integer, ForeignKey("books.id", ondelete="CASCADE"), nullable=False)
+    barcode = Column(String, nullable=False, unique=True, index=True)
+    # available | on_hold (отложен под готовую бронь) | borrowed | withdrawn
+    status = Column(String, nullable=False, default="available")
+    branch_id = Column(Integer, ForeignKey("branches.id"), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    book = relationship("Book", back_populates="copies")
+    branch = relationship("Branch")
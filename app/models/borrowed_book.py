@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Index, text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
@@ -7,12 +7,35 @@ from app.database.base import Base
 
 class BorrowedBook(Base):
     __tablename__ = "borrowed_books"
+    __table_args__ = (
+        # Только активные выдачи: по нему задача штрафов находит просрочку
+        Index(
+            "ix_borrowed_books_active_due_date",
+            "due_date",
+            postgresql_where=text("return_date IS NULL"),
+            sqlite_where=text("return_date IS NULL"),
+        ),
+        Index("ix_borrowed_books_branch_id", "branch_id", "id"),
+        Index(
+            "ix_borrowed_books_branch_active_reader",
+            "branch_id",
+            "reader_id",
+            postgresql_where=text("return_date IS NULL"),
+            sqlite_where=text("return_date IS NULL"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     book_id = Column(Integer, ForeignKey("books.id"), nullable=False)
     reader_id = Column(Integer, ForeignKey("readers.id"), nullable=False)
+    copy_id = Column(Integer, ForeignKey("book_copies.id"), nullable=True)
+    branch_id = Column(Integer, ForeignKey("branches.id"), nullable=True)
     borrow_date = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    due_date = Column(DateTime(timezone=True))
     return_date = Column(DateTime(timezone=True))
     
     book = relationship("Book")
-    reader = relationship("Reader") 
\ No newline at end of file
+    reader = relationship("Reader")
+    copy = relationship("BookCopy")
+    branch = relationship("Branch")
+    fine = relationship("Fine", back_populates="borrowed_book", uselist=False)
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Index
+from sqlalchemy.sql import func
+
+from app.database.base import Base
+
+
+class ArchivedBorrowedBook(Base):
+    """Возвращенные выдачи, перенесенные из borrowed_books задачей архивации."""
+
+    __tablename__ = "borrowed_books_archive"
+    __table_args__ = (
+        Index("ix_borrowed_books_archive_reader_id", "reader_id", "borrow_date"),
+        Index("ix_borrowed_books_archive_branch_id", "branch_id", "reader_id", "borrow_date"),
+    )
+
+    # id совпадает с id выдачи в borrowed_books
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    book_id = Column(Integer, ForeignKey("books.id"), nullable=False)
+    reader_id = Column(Integer, ForeignKey("readers.id"), nullable=False)
+    copy_id = Column(Integer)
+    branch_id = Column(Integer)
+    borrow_date = Column(DateTime(timezone=True), nullable=False)
+    due_date = Column(DateTime(timezone=True))
+    return_date = Column(DateTime(timezone=True), nullable=False)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, Date, ForeignKey
+
+from app.database.base import Base
+
+
+class BookCirculationDaily(Base):
+    __tablename__ = "book_circulation_daily"
+
+    day = Column(Date, primary_key=True)
+    book_id = Column(Integer, ForeignKey("books.id"), primary_key=True)
+    borrows = Column(Integer, nullable=False, default=0)
+    returns = Column(Integer, nullable=False, default=0)
+
+
+class ReaderCirculationDaily(Base):
+    __tablename__ = "reader_circulation_daily"
+
+    day = Column(Date, primary_key=True)
+    reader_id = Column(Integer, ForeignKey("readers.id"), primary_key=True)
+    borrows = Column(Integer, nullable=False, default=0)
+    returns = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime, Index
+
+from app.database.base import Base
+
+
+class BookDemandForecast(Base):
+    __tablename__ = "book_demand_forecasts"
+    __table_args__ = (
+        Index("ix_book_demand_forecasts_copies_delta", "copies_delta"),
+    )
+
+    book_id = Column(Integer, ForeignKey("books.id"), primary_key=True)
+    computed_at = Column(DateTime(timezone=True), nullable=False)
+    daily_demand = Column(Float, nullable=False)
+    avg_loan_days = Column(Float, nullable=False)
+    stockout_days = Column(Integer, nullable=False)
+    current_copies = Column(Integer, nullable=False)
+    recommended_copies = Column(Integer, nullable=False)
+    # recommended_copies - current_copies: > 0 - докупить, < 0 - лишние
+    copies_delta = Column(Integer, nullable=False)
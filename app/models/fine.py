@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, Float, Boolean, ForeignKey, DateTime, Index
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+
+from app.database.base import Base
+
+
+class Fine(Base):
+    __tablename__ = "fines"
+    __table_args__ = (
+        Index("ix_fines_reader_id", "reader_id", "id"),
+        Index("ix_fines_created_at", "created_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    borrowed_book_id = Column(Integer, ForeignKey("borrowed_books.id"), nullable=False, unique=True)
+    # Копия из выдачи, чтобы штрафы читателя читались без join
+    reader_id = Column(Integer, ForeignKey("readers.id"), nullable=False)
+    days_overdue = Column(Integer, nullable=False)
+    amount = Column(Float, nullable=False)
+    paid = Column(Boolean, default=False, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    paid_at = Column(DateTime(timezone=True), nullable=True)
+    
+    borrowed_book = relationship("BorrowedBook", back_populates="fine")
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+
+from app.database.base import Base
+
+
+class Hold(Base):
+    __tablename__ = "holds"
+    __table_args__ = (
+        Index("ix_holds_queue", "book_id", "status", "id"),
+        Index("ix_holds_status_expires_at", "status", "expires_at"),
+        Index("ix_holds_reader_id", "reader_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    book_id = Column(Integer, ForeignKey("books.id"), nullable=False)
+    reader_id = Column(Integer, ForeignKey("readers.id"), nullable=False)
+    # waiting -> ready -> fulfilled | expired, cancelled из waiting/ready
+    status = Column(String, nullable=False, default="waiting")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    ready_at = Column(DateTime(timezone=True))
+    expires_at = Column(DateTime(timezone=True))
+    
+    book = relationship("Book")
+    reader = relationship("Reader")
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, LargeBinary, Index, UniqueConstraint
+from sqlalchemy.sql import func
+
+from app.database.base import Base
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        UniqueConstraint("user_id", "key", name="uq_idempotency_keys_user_key"),
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    key = Column(String(255), nullable=False)
+    # SHA-256 от метода, пути и тела: тот же ключ с другим запросом - ошибка
+    fingerprint = Column(String, nullable=False)
+    # NULL, пока первый запрос выполняется
+    status_code = Column(Integer)
+    response_body = Column(LargeBinary)
+    media_type = Column(String)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    # Аренда незавершенного запроса: после нее повтор может занять ключ заново
+    locked_until = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
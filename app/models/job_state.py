@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String, DateTime
+from sqlalchemy.sql import func
+
+from app.database.base import Base
+
+
+class JobState(Base):
+    __tablename__ = "job_states"
+
+    name = Column(String, primary_key=True)
+    watermark = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
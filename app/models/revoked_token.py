@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, DateTime, Index
+from sqlalchemy.sql import func
+
+from app.database.base import Base
+
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+    __table_args__ = (
+        Index("ix_revoked_tokens_expires_at", "expires_at"),
+    )
+
+    # Возрастающий id служит курсором для догрузки в воркерах
+    id = Column(Integer, primary_key=True, index=True)
+    jti = Column(String, nullable=False, unique=True)
+    # exp отозванного токена: после него запись не нужна
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,45 @@
+from typing import List
+from datetime import date, datetime
+from pydantic import BaseModel
+
+
+class TopBook(BaseModel):
+    """Схема книги в рейтинге выдач"""
+    book_id: int
+    title: str
+    author: str
+    borrows: int
+
+
+class TopReader(BaseModel):
+    """Схема читателя в рейтинге выдач"""
+    reader_id: int
+    name: str
+    borrows: int
+
+
+class ReaderActivity(BaseModel):
+    """Схема активности читателей за период"""
+    active_readers: int
+    top_readers: List[TopReader]
+
+
+class CirculationDay(BaseModel):
+    """Схема выдач и возвратов за день"""
+    day: date
+    borrows: int
+    returns: int
+
+
+class DemandForecast(BaseModel):
+    """Схема прогноза спроса на книгу"""
+    book_id: int
+    title: str
+    author: str
+    computed_at: datetime
+    daily_demand: float
+    avg_loan_days: float
+    stockout_days: int
+    current_copies: int
+    recommended_copies: int
+    copies_delta: int
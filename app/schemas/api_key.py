@@ -0,0 +1,26 @@
+from typing import Optional
+from datetime import datetime
+from pydantic import BaseModel, Field
+
+
+class ApiKeyCreate(BaseModel):
+    """Схема для создания API-ключа"""
+    name: str = Field(..., min_length=1, max_length=100)
+    scopes: str = Field("*", min_length=1)
+
+
+class ApiKey(ApiKeyCreate):
+    """Схема API-ключа без секрета"""
+    id: int
+    key_id: str
+    created_at: Optional[datetime] = None
+    revoked_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+
+class ApiKeyCreated(ApiKey):
+    """Схема только что созданного API-ключа: секреты показываются один раз"""
+    api_key: str
+    signing_secret: str
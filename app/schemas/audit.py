@@ -0,0 +1,14 @@
+from typing import Any, Dict
+from datetime import datetime
+from pydantic import BaseModel
+
+
+class AuditEntry(BaseModel):
+    """Схема записи журнала аудита"""
+    id: int
+    event_type: str
+    entity: str
+    entity_id: int
+    payload: Dict[str, Any]
+    occurred_at: datetime
+    recorded_at: datetime
@@ -4,4 +4,9 @@ from pydantic import BaseModel, EmailStr, Field
 class Login(BaseModel):
     """Схема для входа пользователя"""
     email: EmailStr
-    password: str = Field(..., min_length=8)
\ No newline at end of file
+    password: str = Field(..., min_length=8)
+
+
+class RefreshRequest(BaseModel):
+    """Схема для обновления и отзыва refresh-токена"""
+    refresh_token: str
@@ -0,0 +1,28 @@
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field
+
+from app.core.config import settings
+
+
+class BatchItem(BaseModel):
+    """Схема подзапроса в пакете: путь указывается без префикса /api/v1"""
+    method: str = Field("GET", pattern="^(GET|POST|PUT|PATCH|DELETE)$")
+    path: str = Field(..., pattern="^/")
+    body: Optional[Any] = None
+    headers: Dict[str, str] = {}
+
+
+class BatchRequest(BaseModel):
+    """Схема пакетного запроса"""
+    requests: List[BatchItem] = Field(..., min_length=1, max_length=settings.BATCH_MAX_REQUESTS)
+
+
+class BatchResponseItem(BaseModel):
+    """Схема ответа на подзапрос"""
+    status: int
+    body: Optional[Any] = None
+
+
+class BatchResponse(BaseModel):
+    """Схема ответа на пакетный запрос"""
+    responses: List[BatchResponseItem]
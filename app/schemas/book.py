@@ -1,7 +1,16 @@
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, Field
 
 
+BOOK_FIELDS = (
+    "id", "title", "author", "publication_year", "isbn", "quantity", "description"
+)
+BOOK_LIST_DEFAULT_FIELDS = tuple(
+    field for field in BOOK_FIELDS if field != "description"
+)
+BOOK_SORT_FIELDS = ("id", "title", "author")
+
+
 class BookBase(BaseModel):
     """Базовая схема книги"""
     title: str
@@ -14,7 +23,8 @@ class BookBase(BaseModel):
 
 class BookCreate(BookBase):
     """Схема для создания книги"""
-    pass
+    # Филиал, где заводятся экземпляры; по умолчанию основной
+    branch_id: Optional[int] = None
 
 
 class BookUpdate(BaseModel):
@@ -37,4 +47,51 @@ class BookInDBBase(BookBase):
 
 class Book(BookInDBBase):
     """Схема для возвращаемой книги"""
-    pass 
\ No newline at end of file
+    pass
+
+
+class BookFields(BaseModel):
+    """Схема для книги с выборочным набором полей"""
+    id: int
+    title: Optional[str] = None
+    author: Optional[str] = None
+    publication_year: Optional[int] = None
+    isbn: Optional[str] = None
+    quantity: Optional[int] = None
+    description: Optional[str] = None
+
+
+class SimilarBook(BaseModel):
+    """Схема похожей книги"""
+    id: int
+    title: str
+    author: str
+    score: float
+
+
+class BookDuplicate(BaseModel):
+    """Схема вероятного дубликата книги"""
+    id: int
+    title: str
+    author: str
+    score: float
+
+
+class BookDuplicateQuery(BaseModel):
+    """Схема книги для проверки на дубликаты перед импортом"""
+    title: str
+    author: str
+
+
+class BookDuplicateCheck(BaseModel):
+    """Схема результата проверки одной книги из пакета"""
+    position: int
+    duplicates: List[BookDuplicate]
+    batch_duplicates: List[int]
+
+
+class BookSuggestion(BaseModel):
+    """Схема подсказки автодополнения"""
+    text: str
+    field: str
+    book_id: Optional[int] = None
@@ -9,7 +9,7 @@ class BorrowedBookBase(BaseModel):
 
 
 class BorrowBookCreate(BorrowedBookBase):
-    pass
+    branch_id: Optional[int] = None
 
 
 class ReturnBook(BaseModel):
@@ -18,7 +18,10 @@ class ReturnBook(BaseModel):
 
 class BorrowedBookInDBBase(BorrowedBookBase):
     id: int
+    copy_id: Optional[int] = None
+    branch_id: Optional[int] = None
     borrow_date: datetime
+    due_date: Optional[datetime] = None
     return_date: Optional[datetime] = None
 
     class Config:
@@ -0,0 +1,18 @@
+from typing import Optional
+from datetime import datetime
+from pydantic import BaseModel, Field
+
+
+class BranchCreate(BaseModel):
+    """Схема для создания филиала"""
+    code: str = Field(..., min_length=1, max_length=32)
+    name: str
+
+
+class Branch(BranchCreate):
+    """Схема филиала"""
+    id: int
+    created_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
@@ -0,0 +1,12 @@
+from typing import Optional
+from pydantic import BaseModel
+
+
+class CatalogBook(BaseModel):
+    """Схема книги в публичном каталоге"""
+    id: int
+    title: str
+    author: str
+    publication_year: Optional[int] = None
+    isbn: Optional[str] = None
+    available: bool
@@ -0,0 +1,19 @@
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel
+
+
+class ChangeEntry(BaseModel):
+    """Схема записи ленты изменений"""
+    seq: int
+    entity: str
+    entity_id: int
+    operation: str
+    branch_id: Optional[int] = None
+    data: Optional[Dict[str, Any]] = None
+
+
+class ChangeFeed(BaseModel):
+    """Схема страницы ленты изменений"""
+    changes: List[ChangeEntry]
+    next_since: int
+    has_more: bool
@@ -0,0 +1,23 @@
+from typing import Optional
+from datetime import datetime
+from pydantic import BaseModel, Field
+
+
+class BookCopyCreate(BaseModel):
+    """Схема для добавления экземпляра книги"""
+    book_id: int
+    barcode: str = Field(..., min_length=1, max_length=64)
+    branch_id: Optional[int] = None
+
+
+class BookCopy(BaseModel):
+    """Схема для возвращаемого экземпляра книги"""
+    id: int
+    book_id: int
+    barcode: str
+    status: str
+    branch_id: int
+    created_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
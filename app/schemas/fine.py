@@ -0,0 +1,28 @@
+from typing import Optional
+from datetime import datetime
+from pydantic import BaseModel
+
+
+class Fine(BaseModel):
+    """Схема штрафа за просрочку"""
+    id: int
+    borrowed_book_id: int
+    reader_id: int
+    days_overdue: int
+    amount: float
+    paid: bool
+    created_at: Optional[datetime] = None
+    paid_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+
+class FineReport(BaseModel):
+    """Схема отчета по штрафам за период"""
+    date_from: datetime
+    date_to: datetime
+    fines_count: int
+    total_amount: float
+    paid_amount: float
+    unpaid_amount: float
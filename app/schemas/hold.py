@@ -0,0 +1,23 @@
+from typing import Optional
+from datetime import datetime
+from pydantic import BaseModel
+
+
+class HoldCreate(BaseModel):
+    """Схема для постановки читателя в очередь на книгу"""
+    book_id: int
+    reader_id: int
+
+
+class Hold(BaseModel):
+    """Схема брони"""
+    id: int
+    book_id: int
+    reader_id: int
+    status: str
+    created_at: Optional[datetime] = None
+    ready_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
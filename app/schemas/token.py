@@ -5,8 +5,11 @@ from pydantic import BaseModel
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
 
 
 class TokenPayload(BaseModel):
     sub: Optional[str] = None
-    exp: int
\ No newline at end of file
+    exp: int
+    email: Optional[str] = None
+    jti: Optional[str] = None
\ No newline at end of file
@@ -0,0 +1,110 @@
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from app.core.config import settings
+
+API_KEY_PREFIX = "lib"
+_READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+def _keyed_hash(message: str) -> str:
+    return hmac.new(settings.SECRET_KEY.encode(), message.encode(), hashlib.sha256).hexdigest()
+
+
+def hash_secret(secret: str) -> str:
+    """Быстрый keyed hash вместо bcrypt: секрет случайный, подбирать нечего."""
+    return _keyed_hash(secret)
+
+
+def signing_secret(key_id: str) -> str:
+    """Секрет для подписи запросов выводится из SECRET_KEY и не хранится в БД."""
+    return _keyed_hash(f"sign:{key_id}")
+
+
+def generate_api_key() -> Tuple[str, str, str]:
+    key_id = secrets.token_hex(6)
+    secret = secrets.token_urlsafe(32)
+    return key_id, secret, f"{API_KEY_PREFIX}_{key_id}_{secret}"
+
+
+def split_api_key(api_key: str) -> Optional[Tuple[str, str]]:
+    prefix, _, rest = api_key.partition("_")
+    key_id, _, secret = rest.partition("_")
+    if prefix != API_KEY_PREFIX or not key_id or not secret:
+        return None
+    return key_id, secret
+
+
+def sign_request(
+    secret: str, method: str, path: str, timestamp: str, nonce: str, body: bytes
+) -> str:
+    """Подпись запроса: HMAC-SHA256 от метода, пути с query, времени, nonce и SHA-256 тела."""
+    message = "\n".join((method.upper(), path, timestamp, nonce, hashlib.sha256(body).hexdigest()))
+    return hmac.new(secret.encode(), message.encode(), hashlib.sha256).hexdigest()
+
+
+def scope_allows(scopes: Tuple[str, ...], method: str, path: str) -> bool:
+    """Разрешает ли набор scope запрос.
+
+    Scope - ресурс (первый сегмент пути после префикса API) или ``*``,
+    с суффиксом ``:read`` - только чтение. ``/batch`` доступен любому
+    ключу: это только контейнер, каждый подзапрос проверяется отдельно.
+    """
+    if path.startswith(settings.API_V1_STR):
+        path = path[len(settings.API_V1_STR):]
+    resource = path.strip("/").split("/", 1)[0]
+    if resource == "batch":
+        return True
+    for scope in scopes:
+        name, _, access = scope.partition(":")
+        if name not in ("*", resource):
+            continue
+        if not access or (access == "read" and method.upper() in _READ_METHODS):
+            return True
+    return False
+
+
+class ApiKeyEntry(NamedTuple):
+    key_id: str
+    key_hash: str
+    user_id: int
+    email: str
+    scopes: Tuple[str, ...]
+
+
+class ApiKeyCache:
+    """Активные ключи в памяти процесса: key_id -> ApiKeyEntry.
+
+    Запись живет ``ttl_seconds``, поэтому отзыв ключа или деактивация
+    владельца в другом воркере вступают в силу не позже чем через TTL.
+    """
+
+    def __init__(self, ttl_seconds: float) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[float, ApiKeyEntry]] = {}
+
+    def get(self, key_id: str) -> Optional[ApiKeyEntry]:
+        cached = self._entries.get(key_id)
+        if cached is None or cached[0] <= time.monotonic():
+            return None
+        return cached[1]
+
+    def put(self, entry: ApiKeyEntry) -> None:
+        with self._lock:
+            self._entries[entry.key_id] = (time.monotonic() + self.ttl_seconds, entry)
+
+    def discard(self, key_id: str) -> None:
+        with self._lock:
+            self._entries.pop(key_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+api_key_cache = ApiKeyCache(ttl_seconds=settings.API_KEY_CACHE_SECONDS)
@@ -1,19 +1,134 @@
+import hmac
+import time
 from typing import Optional
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
+from app.crud.crud_api_key import get_api_key_by_key_id, use_nonce
 from app.crud.crud_user import get_user_by_id
 from app.database.base import get_db
 from app.models.user import User
+from app.security.api_keys import (
+    ApiKeyEntry, api_key_cache, hash_secret, scope_allows, sign_request, signing_secret,
+    split_api_key,
+)
 from app.security.jwt import decode_token
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login", auto_error=False)
+
+
+def _load_api_key(db: Session, key_id: str) -> Optional[ApiKeyEntry]:
+    entry = api_key_cache.get(key_id)
+    if entry is not None:
+        return entry
+    db_api_key = get_api_key_by_key_id(db, key_id=key_id)
+    if db_api_key is None or db_api_key.revoked_at is not None or not db_api_key.user.is_active:
+        return None
+    entry = ApiKeyEntry(
+        key_id=db_api_key.key_id,
+        key_hash=db_api_key.key_hash,
+        user_id=db_api_key.user_id,
+        email=db_api_key.user.email,
+        scopes=tuple(db_api_key.scopes.split()),
+    )
+    api_key_cache.put(entry)
+    return entry
+
+
+async def _get_api_key(db: Session, key_id: str) -> Optional[ApiKeyEntry]:
+    # Промах кеша читает БД синхронно, поэтому уходит в пул потоков
+    entry = api_key_cache.get(key_id)
+    if entry is not None:
+        return entry
+    return await run_in_threadpool(_load_api_key, db, key_id)
+
+
+async def get_api_key_user(
+    request: Request,
+    db: Session = Depends(get_db),
+    x_api_key: Optional[str] = Header(None),
+    x_api_key_id: Optional[str] = Header(None),
+    x_timestamp: Optional[str] = Header(None),
+    x_nonce: Optional[str] = Header(None, max_length=128),
+    x_signature: Optional[str] = Header(None),
+) -> Optional[User]:
+    """Пользователь по API-ключу или None, если ключ не передан.
+
+    Ключ передается целиком в ``X-API-Key`` либо запрос подписывается:
+    ``X-API-Key-Id``, ``X-Timestamp``, ``X-Nonce`` и ``X-Signature``.
+    Зависимость асинхронная, чтобы прочитать тело для подписи; обращения
+    к БД идут в пул потоков. Ни bcrypt, ни чтения пользователя из БД на
+    каждый запрос нет.
+    """
+    if x_api_key is None and x_api_key_id is None:
+        return None
+    
+    invalid_key = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Недействительный API-ключ",
+    )
+    if x_api_key is not None:
+        parts = split_api_key(x_api_key)
+        if parts is None:
+            raise invalid_key
+        key_id, secret = parts
+        entry = await _get_api_key(db, key_id)
+        if entry is None or not hmac.compare_digest(entry.key_hash, hash_secret(secret)):
+            raise invalid_key
+    else:
+        if x_timestamp is None or x_nonce is None or x_signature is None:
+            raise invalid_key
+        try:
+            skew = abs(time.time() - int(x_timestamp))
+        except ValueError:
+            raise invalid_key
+        if skew > settings.API_KEY_SIGNATURE_TOLERANCE_SECONDS:
+            raise invalid_key
+        entry = await _get_api_key(db, x_api_key_id)
+        if entry is None:
+            raise invalid_key
+        path = request.url.path
+        if request.url.query:
+            path = f"{path}?{request.url.query}"
+        expected = sign_request(
+            signing_secret(entry.key_id), request.method, path, x_timestamp, x_nonce,
+            await request.body(),
+        )
+        if not hmac.compare_digest(expected, x_signature):
+            raise invalid_key
+        # Перехваченный подписанный запрос нельзя повторить в окне допуска
+        fresh = await run_in_threadpool(
+            use_nonce, db, entry.key_id, x_nonce, settings.API_KEY_SIGNATURE_TOLERANCE_SECONDS
+        )
+        if not fresh:
+            raise invalid_key
+    
+    if not scope_allows(entry.scopes, request.method, request.url.path):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Недостаточно прав у API-ключа",
+        )
+    # Права ключа нужны /batch для подзапросов и выпуску новых ключей
+    request.scope["api_key_scopes"] = entry.scopes
+    return User(id=entry.user_id, email=entry.email, is_active=True)
+
+
+async def get_known_user(
+    request: Request, api_key_user: Optional[User] = Depends(get_api_key_user)
+) -> Optional[User]:
+    """Пользователь, определенный без JWT: подзапрос /batch или API-ключ."""
+    return request.scope.get("batch_user") or api_key_user
 
 
 def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
+    db: Session = Depends(get_db),
+    token: Optional[str] = Depends(optional_oauth2_scheme),
+    known_user: Optional[User] = Depends(get_known_user),
 ) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -21,10 +136,19 @@ def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
+    if known_user is not None:
+        return known_user
+    if token is None:
+        raise credentials_exception
+    
     token_data = decode_token(token)
     if token_data is None:
         raise credentials_exception
     
+    # Токен выдан только активному пользователю, БД не нужна
+    if settings.AUTH_MODE == "stateless" and token_data.email is not None:
+        return User(id=int(token_data.sub), email=token_data.email, is_active=True)
+    
     user = get_user_by_id(db, user_id=int(token_data.sub))
     if user is None:
         raise credentials_exception
@@ -44,4 +168,4 @@ def get_current_active_user(current_user: User = Depends(get_current_user)) -> U
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Пользователь неактивен",
         )
-    return current_user
\ No newline at end of file
+    return current_user
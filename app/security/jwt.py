@@ -1,15 +1,23 @@
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Any, Optional, Union
+from typing import Any, Dict, Optional, Union
 
 from jose import jwt
 from pydantic import ValidationError
 
 from app.core.config import settings
 from app.schemas.token import TokenPayload
+from app.services.revocation import revocation_list
 
 
 def create_access_token(
-    subject: Union[str, Any], expires_delta: Optional[timedelta] = None
+    subject: Union[str, Any],
+    expires_delta: Optional[timedelta] = None,
+    claims: Optional[Dict[str, Any]] = None,
 ) -> str:
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -18,14 +26,79 @@ def create_access_token(
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
     
-    to_encode = {"exp": expire, "sub": str(subject)}
+    to_encode = {
+        **(claims or {}), "exp": expire, "sub": str(subject), "jti": uuid.uuid4().hex,
+    }
     encoded_jwt = jwt.encode(
         to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM
     )
     return encoded_jwt
 
 
-def decode_token(token: str) -> Optional[TokenPayload]:
+def create_user_access_token(user: Any) -> str:
+    """Access-токен пользователя.
+
+    В режиме stateless токен короткий и несет email, чтобы зависимости
+    не читали пользователя из БД; is_active проверяется при обновлении
+    токена.
+    """
+    if settings.AUTH_MODE == "stateless":
+        return create_access_token(
+            subject=user.id,
+            expires_delta=timedelta(minutes=settings.STATELESS_ACCESS_TOKEN_EXPIRE_MINUTES),
+            claims={"email": user.email},
+        )
+    return create_access_token(
+        subject=user.id,
+        expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+    )
+
+
+class VerifiedTokenCache:
+    """LRU проверенных токенов: SHA-256 токена -> payload.
+
+    Запись живет до ``exp`` токена. Кешируются только успешно
+    проверенные токены, поэтому мусорные токены не вытесняют рабочие.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[bytes, TokenPayload]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: bytes) -> Optional[TokenPayload]:
+        with self._lock:
+            token_data = self._entries.get(key)
+            if token_data is None:
+                return None
+            if token_data.exp <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return token_data
+
+    def put(self, key: bytes, token_data: TokenPayload) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = token_data
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+verified_tokens = VerifiedTokenCache(maxsize=settings.JWT_CACHE_SIZE)
+
+
+def verify_token(token: str) -> Optional[TokenPayload]:
+    """Проверка подписи и срока токена без кеша и списка отзыва."""
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
@@ -37,4 +110,20 @@ def decode_token(token: str) -> Optional[TokenPayload]:
         
         return token_data
     except (jwt.JWTError, ValidationError):
-        return None
\ No newline at end of file
+        return None
+
+
+def decode_token(token: str) -> Optional[TokenPayload]:
+    key = hashlib.sha256(token.encode()).digest()
+    token_data = verified_tokens.get(key)
+    if token_data is None:
+        token_data = verify_token(token)
+        if token_data is None:
+            return None
+        verified_tokens.put(key, token_data)
+    
+    # Отзыв проверяется и для закешированных токенов, по списку в памяти
+    if token_data.jti is not None and revocation_list.is_revoked(token_data.jti):
+        return None
+    
+    return token_data
\ No newline at end of file
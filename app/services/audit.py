@@ -0,0 +1,223 @@
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud.crud_audit import append_audit_log, get_outbox_events, get_outbox_stats
+from app.models.audit import AuditOutbox
+
+logger = logging.getLogger(__name__)
+
+AuditSink = Callable[[List[Dict[str, Any]]], None]
+
+
+def _timestamp(value: datetime) -> float:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _record(event: AuditOutbox) -> Dict[str, Any]:
+    return {
+        "id": event.id,
+        "event_type": event.event_type,
+        "entity": event.entity,
+        "entity_id": event.entity_id,
+        "payload": json.loads(event.payload),
+        "occurred_at": event.created_at.isoformat() if event.created_at else None,
+    }
+
+
+class RotatingFileSink:
+    """Дописывает события JSON-строками в локальный файл с ротацией.
+
+    Каждый процесс пишет в свой файл (к имени добавляется pid), поэтому
+    воркеры не переименовывают файл друг у друга. При превышении
+    ``max_bytes`` файл переименовывается в ``.1``, старые копии
+    сдвигаются, хранится не больше ``backup_count``. Ошибки записи не
+    глотаются: пачка останется в outbox.
+    """
+
+    def __init__(self, path: str, max_bytes: int, backup_count: int) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._size = 0
+
+    def current_path(self) -> str:
+        root, ext = os.path.splitext(self.path)
+        return f"{root}.{os.getpid()}{ext}"
+
+    def __call__(self, records: List[Dict[str, Any]]) -> None:
+        data = "".join(
+            json.dumps(record, ensure_ascii=False) + "\n" for record in records
+        ).encode("utf-8")
+        with self._lock:
+            path = self.current_path()
+            if self._pid != os.getpid():
+                # Первая запись или процесс порожден fork после импорта
+                self._pid = os.getpid()
+                self._size = os.path.getsize(path) if os.path.exists(path) else 0
+            if self._size and self._size + len(data) > self.max_bytes:
+                self._rotate(path)
+            with open(path, "ab") as stream:
+                stream.write(data)
+                stream.flush()
+                os.fsync(stream.fileno())
+            self._size += len(data)
+
+    def _rotate(self, path: str) -> None:
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{path}.{index + 1}")
+        if self.backup_count > 0:
+            os.replace(path, f"{path}.1")
+        else:
+            os.remove(path)
+        self._size = 0
+
+
+class AuditDispatcher:
+    """Переносит события из outbox в журнал аудита и во внешние приемники.
+
+    Изменения пишут событие в ``audit_outbox`` в своей транзакции, а
+    фоновый поток пачками до ``batch_size`` сначала отдает их приемникам,
+    потом переносит в ``audit_log`` и удаляет из outbox одним коммитом.
+    Доставка - не менее одного раза: после сбоя между этими шагами пачка
+    уйдет приемникам повторно, поэтому у каждого события есть ``id``.
+    Ошибка приемника оставляет пачку в outbox до следующей попытки.
+    """
+
+    def __init__(self, interval_seconds: float, batch_size: int, max_lag_seconds: float) -> None:
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.max_lag_seconds = max_lag_seconds
+        self._sinks: List[AuditSink] = []
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._delivered = 0
+        self._duplicates = 0
+        self._failures = 0
+        # Очередь и отставание по каждой БД: у филиалов свой outbox
+        self._databases: Dict[str, Dict[str, Any]] = {}
+
+    def add_sink(self, sink: AuditSink) -> None:
+        self._sinks.append(sink)
+
+    def remove_sink(self, sink: AuditSink) -> None:
+        self._sinks.remove(sink)
+
+    def notify(self) -> None:
+        """Будит поток после коммита, чтобы событие не ждало интервала."""
+        self._wakeup.set()
+
+    def drain(self, db: Session) -> int:
+        """Переносит все накопившиеся события; возвращает их число."""
+        drained = 0
+        with self._lock:
+            while True:
+                events = get_outbox_events(db, limit=self.batch_size)
+                if not events:
+                    break
+                records = [_record(event) for event in events]
+                try:
+                    for sink in self._sinks:
+                        sink(records)
+                    appended = append_audit_log(db, events)
+                except IntegrityError:
+                    # Ту же пачку одновременно перенес другой воркер
+                    db.rollback()
+                    continue
+                except Exception:
+                    db.rollback()
+                    self._failures += 1
+                    logger.exception("Не удалось доставить события аудита")
+                    break
+                self._delivered += appended
+                self._duplicates += len(events) - appended
+                drained += len(events)
+                if len(events) < self.batch_size:
+                    break
+            self._observe(db)
+        return drained
+
+    def _observe(self, db: Session) -> None:
+        database = db.get_bind().url.render_as_string(hide_password=True)
+        pending, oldest = get_outbox_stats(db)
+        db.rollback()
+        lag = max(0.0, time.time() - _timestamp(oldest)) if oldest else 0.0
+        previous = self._databases.get(database, {})
+        self._databases[database] = {
+            "pending": pending,
+            "lag_seconds": round(lag, 3),
+            "max_lag_seconds": round(max(previous.get("max_lag_seconds", 0.0), lag), 3),
+            "lag_exceeded": lag > self.max_lag_seconds,
+            "last_drain_at": time.time(),
+        }
+        if lag > self.max_lag_seconds:
+            logger.warning(
+                "Отставание журнала аудита в %s %.1f с, в очереди %d событий",
+                database, lag, pending,
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "delivered": self._delivered,
+            "duplicates": self._duplicates,
+            "failures": self._failures,
+            "lag_exceeded": any(stats["lag_exceeded"] for stats in self._databases.values()),
+            "databases": dict(self._databases),
+        }
+
+    def start(self, session_factories: Sequence[Callable[[], Session]]) -> None:
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(list(session_factories),), name="audit-dispatcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self, session_factories: List[Callable[[], Session]]) -> None:
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.interval_seconds)
+            self._wakeup.clear()
+            # Филиалы со своей БД пишут outbox в нее
+            for session_factory in session_factories:
+                db = session_factory()
+                try:
+                    self.drain(db)
+                except SQLAlchemyError:
+                    logger.exception("Не удалось прочитать outbox аудита")
+                finally:
+                    db.close()
+
+
+audit_dispatcher = AuditDispatcher(
+    interval_seconds=settings.AUDIT_DISPATCH_SECONDS,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    max_lag_seconds=settings.AUDIT_MAX_LAG_SECONDS,
+)
+if settings.AUDIT_LOG_FILE:
+    audit_dispatcher.add_sink(RotatingFileSink(
+        settings.AUDIT_LOG_FILE,
+        max_bytes=settings.AUDIT_LOG_FILE_MAX_BYTES,
+        backup_count=settings.AUDIT_LOG_FILE_BACKUPS,
+    ))
@@ -0,0 +1,293 @@
+import heapq
+import re
+import threading
+import unicodedata
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import func, select, union_all
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.book import Book
+from app.models.borrowed_book import BorrowedBook
+from app.models.borrowed_book_archive import ArchivedBorrowedBook
+from app.services.change_feed import ChangeFollower
+
+_NON_WORD = re.compile(r"[^\w]+")
+_PREFIX_END = chr(0x10FFFF)
+
+
+def normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text).casefold().replace("ё", "е")
+    return _NON_WORD.sub(" ", text).strip()
+
+
+class PrefixIndex:
+    """Индекс префиксов названий и авторов для автодополнения.
+
+    Нормализованные ключи хранятся в отсортированном списке, поиск по
+    префиксу - это два bisect. Для коротких префиксов (до ``depth``
+    символов) заранее поддерживаются списки ``top_k`` самых популярных
+    записей; более длинный префикс получает такой список после первого
+    запроса, если его диапазон длиннее ``scan_limit``. Записи названий
+    ссылаются на книгу (ref > 0), записи авторов - на автора (ref < 0).
+
+    Списки хранят еще ``spare`` записей сверх ``top_k`` и всегда содержат
+    самые популярные записи диапазона, поэтому удаление или понижение
+    записи правит только списки, где она есть; диапазон префикса
+    пересматривается, лишь когда запас списка кончился.
+    """
+
+    def __init__(
+        self,
+        depth: int = 3,
+        top_k: int = 10,
+        scan_limit: int = 256,
+        max_cached_prefixes: int = 200_000,
+        spare: Optional[int] = None,
+    ) -> None:
+        self.depth = depth
+        self.top_k = top_k
+        self.capacity = top_k + (top_k if spare is None else spare)
+        self.scan_limit = scan_limit
+        self.max_cached_prefixes = max_cached_prefixes
+        self._lock = threading.RLock()
+        self._clear()
+
+    def _clear(self) -> None:
+        self._keys: List[str] = []
+        self._refs = array("q")
+        self._scores: Dict[int, int] = {}
+        self._top: Dict[str, List[int]] = {}
+        self._titles: Dict[int, str] = {}
+        self._book_authors: Dict[int, int] = {}
+        self._author_ids: Dict[str, int] = {}
+        self._author_names: Dict[int, str] = {}
+        self._author_books: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def load(self, books: Iterable[Tuple[int, str, str, int]]) -> None:
+        with self._lock:
+            self._clear()
+            entries = []
+            for book_id, title, author, popularity in books:
+                self._titles[book_id] = title
+                self._scores[book_id] = popularity
+                entries.append((normalize(title), book_id))
+                author_ref, is_new = self._author_ref(author)
+                self._book_authors[book_id] = author_ref
+                self._scores[author_ref] += popularity
+                if is_new:
+                    entries.append((normalize(author), author_ref))
+            entries.sort()
+            self._keys = [key for key, _ in entries]
+            self._refs = array("q", (ref for _, ref in entries))
+
+            ranked = sorted(entries, key=lambda entry: -self._scores[entry[1]])
+            for key, ref in ranked:
+                for prefix in self._prefixes(key[:self.depth]):
+                    top = self._top.setdefault(prefix, [])
+                    if len(top) < self.capacity:
+                        top.append(ref)
+
+    def add_book(self, book_id: int, title: str, author: str, popularity: int = 0) -> None:
+        with self._lock:
+            self.remove_book(book_id)
+            self._titles[book_id] = title
+            self._scores[book_id] = popularity
+            self._insert(normalize(title), book_id)
+            author_ref, is_new = self._author_ref(author)
+            self._book_authors[book_id] = author_ref
+            self._scores[author_ref] += popularity
+            if is_new:
+                self._insert(normalize(author), author_ref)
+            elif popularity:
+                self._promote(normalize(self._author_names[author_ref]), author_ref)
+
+    def remove_book(self, book_id: int) -> None:
+        with self._lock:
+            if book_id not in self._titles:
+                return
+            self._delete(normalize(self._titles.pop(book_id)), book_id)
+            popularity = self._scores.pop(book_id)
+            author_ref = self._book_authors.pop(book_id)
+            author_key = normalize(self._author_names[author_ref])
+            self._author_books[author_ref] -= 1
+            self._scores[author_ref] -= popularity
+            if self._author_books[author_ref] == 0:
+                self._delete(author_key, author_ref)
+                del self._author_ids[author_key]
+                del self._author_names[author_ref]
+                del self._author_books[author_ref]
+                del self._scores[author_ref]
+            elif popularity:
+                self._demote(author_key, author_ref, removed=False)
+
+    def update_book(self, book_id: int, title: str, author: str) -> None:
+        with self._lock:
+            popularity = self._scores.get(book_id, 0)
+            self.remove_book(book_id)
+            self.add_book(book_id, title, author, popularity)
+
+    def sync_book(self, book_id: int, title: str, author: str) -> None:
+        """Обновляет книгу, только если название или автор изменились."""
+        with self._lock:
+            if (
+                self._titles.get(book_id) == title
+                and normalize(self._author_names[self._book_authors[book_id]]) == normalize(author)
+            ):
+                return
+            self.update_book(book_id, title, author)
+
+    def bump(self, book_id: int, delta: int = 1) -> None:
+        with self._lock:
+            if book_id not in self._titles:
+                return
+            author_ref = self._book_authors[book_id]
+            self._scores[book_id] += delta
+            self._scores[author_ref] += delta
+            self._promote(normalize(self._titles[book_id]), book_id)
+            self._promote(normalize(self._author_names[author_ref]), author_ref)
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[Tuple[str, str, Optional[int]]]:
+        key = normalize(prefix)
+        if not key:
+            return []
+        limit = min(limit, self.top_k)
+        with self._lock:
+            refs = self._top.get(key)
+            if refs is None and len(key) > self.depth:
+                refs = self._scan(key, self.capacity)
+                if len(self._top) < self.max_cached_prefixes:
+                    if self._range_size(key) > self.scan_limit:
+                        self._top[key] = refs
+            return [self._suggestion(ref) for ref in (refs or [])[:limit]]
+
+    def _suggestion(self, ref: int) -> Tuple[str, str, Optional[int]]:
+        if ref > 0:
+            return self._titles[ref], "title", ref
+        return self._author_names[ref], "author", None
+
+    def _author_ref(self, author: str) -> Tuple[int, bool]:
+        key = normalize(author)
+        author_ref = self._author_ids.get(key)
+        is_new = author_ref is None
+        if is_new:
+            author_ref = -(len(self._author_names) + 1)
+            while author_ref in self._author_names:
+                author_ref -= 1
+            self._author_ids[key] = author_ref
+            self._author_names[author_ref] = author
+            self._author_books[author_ref] = 0
+            self._scores[author_ref] = 0
+        self._author_books[author_ref] += 1
+        return author_ref, is_new
+
+    def _prefixes(self, key: str) -> List[str]:
+        return [
+            key[:size] for size in range(1, len(key) + 1)
+            if size <= self.depth or key[:size] in self._top
+        ]
+
+    def _range(self, key: str) -> Tuple[int, int]:
+        low = bisect_left(self._keys, key)
+        return low, bisect_right(self._keys, key + _PREFIX_END, lo=low)
+
+    def _range_size(self, key: str) -> int:
+        low, high = self._range(key)
+        return high - low
+
+    def _scan(self, key: str, limit: int) -> List[int]:
+        low, high = self._range(key)
+        candidates = (self._refs[position] for position in range(low, high))
+        return heapq.nlargest(limit, candidates, key=self._scores.__getitem__)
+
+    def _insert(self, key: str, ref: int) -> None:
+        position = bisect_right(self._keys, key)
+        self._keys.insert(position, key)
+        self._refs.insert(position, ref)
+        self._promote(key, ref)
+
+    def _delete(self, key: str, ref: int) -> None:
+        low = bisect_left(self._keys, key)
+        high = bisect_right(self._keys, key, lo=low)
+        for position in range(low, high):
+            if self._refs[position] == ref:
+                del self._keys[position]
+                del self._refs[position]
+                break
+        self._demote(key, ref, removed=True)
+
+    def _promote(self, key: str, ref: int) -> None:
+        score = self._scores[ref]
+        for prefix in self._prefixes(key):
+            top = self._top.setdefault(prefix, [])
+            if ref in top:
+                top.remove(ref)
+            elif top and self._scores[top[-1]] >= score and (
+                len(top) >= self.capacity or self._range_size(prefix) > len(top) + 1
+            ):
+                # Вне списка могут быть записи популярнее этой
+                continue
+            position = len(top)
+            while position > 0 and self._scores[top[position - 1]] < score:
+                position -= 1
+            top.insert(position, ref)
+            del top[self.capacity:]
+
+    def _demote(self, key: str, ref: int, removed: bool) -> None:
+        """Убирает запись из списков или опускает после уменьшения счета."""
+        score = self._scores[ref]
+        for prefix in self._prefixes(key):
+            top = self._top.get(prefix)
+            if not top or ref not in top:
+                continue
+            top.remove(ref)
+            if not removed and (not top or self._scores[top[-1]] <= score):
+                position = len(top)
+                while position > 0 and self._scores[top[position - 1]] < score:
+                    position -= 1
+                top.insert(position, ref)
+            if len(top) < self.top_k and self._range_size(prefix) > len(top):
+                top = self._scan(prefix, self.capacity)
+            if top:
+                self._top[prefix] = top
+            else:
+                del self._top[prefix]
+
+
+autocomplete_index = PrefixIndex()
+
+
+def _apply_book_changes(db: Session, changed_ids: Set[int]) -> None:
+    rows = db.query(Book.id, Book.title, Book.author).filter(Book.id.in_(changed_ids)).all()
+    for book_id, title, author in rows:
+        autocomplete_index.sync_book(book_id, title, author)
+    for book_id in changed_ids.difference(row.id for row in rows):
+        autocomplete_index.remove_book(book_id)
+
+
+# Книги, созданные и переименованные другими воркерами, приходят из ленты
+# изменений фоновым потоком, чтобы подсказки не ходили в БД
+autocomplete_changes = ChangeFollower("book", settings.INDEX_REFRESH_SECONDS, _apply_book_changes)
+
+
+def load_autocomplete_index(db: Session) -> None:
+    def load_books() -> None:
+        loans = union_all(
+            select(BorrowedBook.book_id), select(ArchivedBorrowedBook.book_id)
+        ).subquery()
+        popularity = dict(
+            db.execute(select(loans.c.book_id, func.count()).group_by(loans.c.book_id)).all()
+        )
+        books = db.query(Book.id, Book.title, Book.author).yield_per(10000)
+        autocomplete_index.load(
+            (book_id, title, author, popularity.get(book_id, 0))
+            for book_id, title, author in books
+        )
+    
+    autocomplete_changes.load(db, load_books)
@@ -0,0 +1,228 @@
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from typing import Callable, Dict, FrozenSet, Optional, Set
+
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+Deliver = Callable[[int, int], None]
+
+# Пауза перед переподключением слушателя растет до этого предела
+_MAX_RECONNECT_SECONDS = 30
+
+
+class LocalBackend:
+    """Рассылка внутри одного процесса."""
+
+    def __init__(self) -> None:
+        self._deliver: Optional[Deliver] = None
+
+    def start(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+
+    def stop(self) -> None:
+        self._deliver = None
+
+    def publish(self, book_id: int, quantity: int) -> None:
+        if self._deliver is not None:
+            self._deliver(book_id, quantity)
+
+
+class PostgresBackend:
+    """Рассылка между воркерами через LISTEN/NOTIFY PostgreSQL.
+
+    Событие публикуется через NOTIFY и доставляется всем процессам,
+    включая отправителя, из отдельного потока-слушателя. Оборванное
+    соединение публикации открывается заново при следующем событии,
+    слушатель переподключается сам; события, отправленные, пока он был
+    отключен, теряются - клиенты получат следующее состояние книги.
+    """
+
+    channel = "book_availability"
+
+    def __init__(self, database_url: str) -> None:
+        url = make_url(database_url).set(drivername="postgresql")
+        self._dsn = url.render_as_string(hide_password=False)
+        self._publish_lock = threading.Lock()
+        self._publisher = None
+        self._listener: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def _connect(self):
+        import psycopg2
+
+        connection = psycopg2.connect(self._dsn)
+        connection.autocommit = True
+        return connection
+
+    def start(self, deliver: Deliver) -> None:
+        self._stopped.clear()
+        self._listener = threading.Thread(
+            target=self._listen, args=(deliver,), name="availability-listener", daemon=True
+        )
+        self._listener.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._listener is not None:
+            self._listener.join(timeout=5)
+        with self._publish_lock:
+            if self._publisher is not None:
+                self._publisher.close()
+                self._publisher = None
+
+    def publish(self, book_id: int, quantity: int) -> None:
+        payload = json.dumps({"book_id": book_id, "quantity": quantity})
+        with self._publish_lock:
+            if self._publisher is None or self._publisher.closed:
+                self._publisher = self._connect()
+            try:
+                with self._publisher.cursor() as cursor:
+                    cursor.execute("SELECT pg_notify(%s, %s)", (self.channel, payload))
+            except Exception:
+                # Следующая публикация откроет новое соединение
+                self._publisher.close()
+                self._publisher = None
+                raise
+
+    def _listen(self, deliver: Deliver) -> None:
+        delay = 1.0
+        while not self._stopped.is_set():
+            started = time.monotonic()
+            try:
+                self._listen_once(deliver)
+                return
+            except Exception:
+                if time.monotonic() - started > _MAX_RECONNECT_SECONDS:
+                    # Соединение успело поработать: начинаем паузы сначала
+                    delay = 1.0
+                logger.exception("Слушатель событий доступности отключился, повтор через %.0f с", delay)
+            if self._stopped.wait(delay):
+                return
+            delay = min(delay * 2, _MAX_RECONNECT_SECONDS)
+
+    def _listen_once(self, deliver: Deliver) -> None:
+        connection = self._connect()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(f"LISTEN {self.channel}")
+            while not self._stopped.is_set():
+                if select.select([connection], [], [], 1.0) == ([], [], []):
+                    continue
+                connection.poll()
+                while connection.notifies:
+                    event = json.loads(connection.notifies.pop(0).payload)
+                    deliver(event["book_id"], event["quantity"])
+        finally:
+            connection.close()
+
+
+class AvailabilitySubscription:
+    """Подписка одного клиента.
+
+    Изменения копятся в словаре по id книги, поэтому серия событий по
+    одной книге схлопывается в последнее значение. Подписчик, у которого
+    накопилось больше ``max_pending`` книг, считается медленным и
+    отключается.
+    """
+
+    def __init__(
+        self,
+        book_ids: Optional[FrozenSet[int]],
+        loop: asyncio.AbstractEventLoop,
+        max_pending: int,
+    ) -> None:
+        self.book_ids = book_ids
+        self.loop = loop
+        self.max_pending = max_pending
+        self.dropped = False
+        self._pending: Dict[int, int] = {}
+        self._ready = asyncio.Event()
+
+    def offer(self, book_id: int, quantity: int) -> None:
+        if self.dropped:
+            return
+        if self.book_ids is not None and book_id not in self.book_ids:
+            return
+        self._pending[book_id] = quantity
+        if len(self._pending) > self.max_pending:
+            self.dropped = True
+            self._pending.clear()
+        self._ready.set()
+
+    async def next_batch(self, timeout: float, coalesce_seconds: float) -> Dict[int, int]:
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return {}
+        if coalesce_seconds:
+            await asyncio.sleep(coalesce_seconds)
+        batch, self._pending = self._pending, {}
+        self._ready.clear()
+        return batch
+
+
+class AvailabilityHub:
+    def __init__(self, backend, max_pending: int) -> None:
+        self.backend = backend
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._subscriptions: Set[AvailabilitySubscription] = set()
+
+    def start(self) -> None:
+        self.backend.start(self.dispatch)
+
+    def stop(self) -> None:
+        self.backend.stop()
+
+    def publish(self, book_id: int, quantity: int) -> None:
+        """Вызывается после коммита выдачи или возврата.
+
+        Ошибка рассылки не должна превращать уже зафиксированную выдачу
+        в ответ 500, поэтому она только логируется.
+        """
+        try:
+            self.backend.publish(book_id, quantity)
+        except Exception:
+            logger.exception("Не удалось опубликовать доступность книги %s", book_id)
+
+    def dispatch(self, book_id: int, quantity: int) -> None:
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, book_id, quantity)
+            except RuntimeError:
+                self.unsubscribe(subscription)
+
+    def subscribe(self, book_ids: Optional[FrozenSet[int]] = None) -> AvailabilitySubscription:
+        subscription = AvailabilitySubscription(
+            book_ids, asyncio.get_running_loop(), self.max_pending
+        )
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: AvailabilitySubscription) -> None:
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscriptions)
+
+
+def _make_backend():
+    if settings.EVENTS_BACKEND == "postgres":
+        return PostgresBackend(settings.DATABASE_URL)
+    return LocalBackend()
+
+
+availability_hub = AvailabilityHub(_make_backend(), max_pending=settings.EVENTS_MAX_PENDING)
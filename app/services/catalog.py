@@ -0,0 +1,99 @@
+import threading
+from bisect import bisect_left, insort
+from itertools import islice
+from typing import Any, Dict, List, Optional, Set
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.book import Book
+from app.services.change_feed import ChangeFollower
+
+_COLUMNS = (
+    Book.id, Book.title, Book.author, Book.publication_year, Book.isbn,
+    Book.quantity,
+)
+
+
+def _public_fields(book: Any) -> Dict[str, Any]:
+    return {
+        "id": book.id,
+        "title": book.title,
+        "author": book.author,
+        "publication_year": book.publication_year,
+        "isbn": book.isbn,
+        "available": book.quantity > 0,
+    }
+
+
+class CatalogSnapshot:
+    """Снимок публичного каталога в памяти процесса.
+
+    Записи из этого процесса применяются сразу через ``upsert``/``remove``,
+    изменения других воркеров подтягиваются ``refresh`` из ленты
+    изменений через ``ChangeFollower``.
+    """
+
+    def __init__(self, refresh_seconds: int) -> None:
+        self._lock = threading.Lock()
+        self._books: Dict[int, Dict[str, Any]] = {}
+        self._ids: List[int] = []
+        self._changes = ChangeFollower("book", refresh_seconds, self._apply_changes)
+
+    @property
+    def refresh_seconds(self) -> float:
+        return self._changes.refresh_seconds
+
+    @refresh_seconds.setter
+    def refresh_seconds(self, value: float) -> None:
+        self._changes.refresh_seconds = value
+
+    def load(self, db: Session) -> None:
+        def load_books() -> None:
+            rows = db.query(*_COLUMNS).order_by(Book.id).all()
+            with self._lock:
+                self._books = {row.id: _public_fields(row) for row in rows}
+                self._ids = [row.id for row in rows]
+        
+        self._changes.load(db, load_books)
+
+    def refresh(self, db: Session) -> None:
+        self._changes.refresh(db)
+
+    def _apply_changes(self, db: Session, changed_ids: Set[int]) -> None:
+        rows = db.query(*_COLUMNS).filter(Book.id.in_(changed_ids)).all()
+        for row in rows:
+            self.upsert(row)
+        for book_id in changed_ids.difference(row.id for row in rows):
+            self.remove(book_id)
+
+    def upsert(self, book: Any) -> None:
+        fields = _public_fields(book)
+        with self._lock:
+            if self._books.get(book.id) == fields:
+                return
+            if book.id not in self._books:
+                insort(self._ids, book.id)
+            self._books[book.id] = fields
+
+    def remove(self, book_id: int) -> None:
+        with self._lock:
+            if self._books.pop(book_id, None) is None:
+                return
+            del self._ids[bisect_left(self._ids, book_id)]
+
+    def get(self, book_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._books.get(book_id)
+
+    def page(
+        self, skip: int = 0, limit: int = 100, available_only: bool = False
+    ) -> List[Dict[str, Any]]:
+        with self._lock:
+            books = (self._books[book_id] for book_id in self._ids)
+            if available_only:
+                books = (book for book in books if book["available"])
+            return list(islice(books, skip, skip + limit))
+
+
+catalog_snapshot = CatalogSnapshot(refresh_seconds=settings.CATALOG_REFRESH_SECONDS)
@@ -0,0 +1,196 @@
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud.crud_change import (
+    get_change_ids,
+    get_changes,
+    get_last_change_id,
+    get_transaction_horizon,
+)
+
+logger = logging.getLogger(__name__)
+
+# Как в RevocationList: больше пропусков не отслеживаем
+_MAX_GAPS = 10000
+# При первом чтении пропуски ищутся только среди последних номеров:
+# незафиксированные транзакции всегда в конце последовательности
+_INITIAL_SCAN = 1000
+_REFRESH_BATCH = 5000
+
+
+class ChangeWatermark:
+    """Номер записи ленты изменений, до которого лента уже не пополнится.
+
+    id записи выдается при flush, а транзакции фиксируются в любом
+    порядке: запись с меньшим id может стать видна позже записи с
+    большим, и лента отдается только до первого пропущенного id. В
+    PostgreSQL пропуск снимается, когда завершились все транзакции,
+    начатые до того, как его заметили: id так и не появился, значит
+    транзакцию откатили. Иначе, и если транзакция висит дольше
+    ``gap_seconds``, пропуск считается откаченным по времени; такие id
+    считаются в ``skipped`` и пишутся в лог - если транзакция все же
+    зафиксируется, ее записи читатели ленты не увидят.
+    """
+
+    def __init__(self, gap_seconds: float) -> None:
+        self.gap_seconds = gap_seconds
+        self.skipped = 0
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self._last_id = 0
+        # id -> (когда заметили по часам процесса, по часам БД)
+        self._gaps: Dict[int, Tuple[float, Optional[float]]] = {}
+        self._started = False
+
+    def advance(self, db: Session) -> int:
+        with self._lock:
+            last_id = get_last_change_id(db)
+            if last_id < self._last_id:
+                # Таблицу пересоздали или восстановили из копии
+                self.reset()
+            if not self._started:
+                self._last_id = max(0, last_id - _INITIAL_SCAN)
+                self._started = True
+            
+            ids = get_change_ids(db, after_id=self._last_id, ids=self._gaps)
+            # Читается после id: транзакция, занявшая пропущенный id, к
+            # этому моменту либо еще открыта, либо ее запись уже видна
+            horizon = get_transaction_horizon(db) if self._gaps or ids else None
+            db_now, oldest = horizon if horizon else (None, None)
+            seen = set(ids)
+            now = time.monotonic()
+            top = max([self._last_id] + ids)
+            for row_id in range(self._last_id + 1, top):
+                if len(self._gaps) >= _MAX_GAPS:
+                    break
+                if row_id not in seen:
+                    self._gaps[row_id] = (now, db_now)
+            self._last_id = top
+            
+            gaps = {}
+            expired = []
+            for row_id, (seen_at, db_seen_at) in self._gaps.items():
+                if row_id in seen:
+                    continue
+                if db_seen_at is not None and (oldest is None or oldest > db_seen_at):
+                    # Все транзакции, которые могли взять этот id, завершились:
+                    # зафиксированную запись увидит следующее чтение ленты
+                    continue
+                if now - seen_at >= self.gap_seconds:
+                    expired.append(row_id)
+                    continue
+                gaps[row_id] = (seen_at, db_seen_at)
+            self._gaps = gaps
+            if expired:
+                self.skipped += len(expired)
+                logger.warning(
+                    "Пропуски ленты изменений не заполнились за %.0f с и пропущены: %s",
+                    self.gap_seconds, expired[:20],
+                )
+            return min(self._gaps) - 1 if self._gaps else self._last_id
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"pending_gaps": len(self._gaps), "skipped": self.skipped}
+
+
+change_watermark = ChangeWatermark(gap_seconds=settings.CHANGES_GAP_SECONDS)
+
+
+class ChangeFollower:
+    """Догоняет по ленте изменений данные в памяти процесса.
+
+    Записи своего процесса применяются сразу, изменения других воркеров
+    подтягивает ``refresh`` не чаще раза в ``refresh_seconds``: читаются
+    только записи ``entity`` после последнего примененного номера и не
+    дальше ``change_watermark``, чтобы не перескочить еще не
+    зафиксированную запись. ``apply`` получает сессию и множество id
+    измененных сущностей. Если горячему пути чтения не по пути ходить в
+    БД, ``start`` подтягивает изменения фоновым потоком раз в
+    ``refresh_seconds``.
+    """
+
+    def __init__(
+        self,
+        entity: str,
+        refresh_seconds: float,
+        apply: Callable[[Session, Set[int]], None],
+    ) -> None:
+        self.entity = entity
+        self.refresh_seconds = refresh_seconds
+        self._apply = apply
+        self._lock = threading.Lock()
+        self._last_change_id = 0
+        self._refreshed_at = 0.0
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def load(self, db: Session, load: Callable[[], None]) -> None:
+        """Полная загрузка: лента читается после номера, взятого до нее."""
+        with self._lock:
+            last_change_id = change_watermark.advance(db)
+            load()
+            self._last_change_id = last_change_id
+            self._refreshed_at = time.monotonic()
+
+    def refresh(self, db: Session) -> None:
+        if time.monotonic() - self._refreshed_at < self.refresh_seconds:
+            return
+        self._catch_up(db, blocking=False)
+
+    def _catch_up(self, db: Session, blocking: bool) -> None:
+        if not self._lock.acquire(blocking=blocking):
+            return
+        try:
+            until = change_watermark.advance(db)
+            while True:
+                changes = get_changes(
+                    db,
+                    since=self._last_change_id,
+                    limit=_REFRESH_BATCH,
+                    entities=[self.entity],
+                    until=until,
+                )
+                if not changes:
+                    break
+                # Записи о БД филиалов не меняют данные основной
+                changed_ids = {change.entity_id for change in changes if change.branch_id is None}
+                if changed_ids:
+                    self._apply(db, changed_ids)
+                self._last_change_id = changes[-1].id
+                if len(changes) < _REFRESH_BATCH:
+                    break
+            self._refreshed_at = time.monotonic()
+        finally:
+            self._lock.release()
+
+    def start(self, session_factory: Callable[[], Session]) -> None:
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(session_factory,), name=f"{self.entity}-changes", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self, session_factory: Callable[[], Session]) -> None:
+        while not self._stopped.wait(self.refresh_seconds):
+            db = session_factory()
+            try:
+                self._catch_up(db, blocking=True)
+            except SQLAlchemyError:
+                logger.exception("Не удалось догнать ленту изменений (%s)", self.entity)
+            finally:
+                db.close()
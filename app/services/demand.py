@@ -0,0 +1,171 @@
+import csv
+import io
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.book import Book
+from app.models.borrowed_book import BorrowedBook
+from app.models.hold import Hold
+
+CSV_FIELDS = (
+    "book_id", "title", "author", "current_copies", "recommended_copies",
+    "copies_delta", "daily_demand", "avg_loan_days", "stockout_days",
+)
+
+
+def _day_index(moments: List[datetime], start: datetime) -> np.ndarray:
+    if not moments:
+        return np.empty(0, dtype=np.int64)
+    values = np.array(
+        [
+            moment.astimezone(timezone.utc).replace(tzinfo=None) if moment.tzinfo else moment
+            for moment in moments
+        ],
+        dtype="datetime64[s]",
+    )
+    return ((values - np.datetime64(start, "s")) // np.timedelta64(1, "D")).astype(np.int64)
+
+
+def _stockout_days(
+    book_index: np.ndarray, days: np.ndarray, deltas: np.ndarray, copies: np.ndarray, window: int
+) -> np.ndarray:
+    """Число дней окна, когда все экземпляры книги были на руках.
+
+    События выдачи (+1) и возврата (-1) сортируются по книге и дню,
+    накопленная сумма внутри каждой книги дает число выданных экземпляров
+    до следующего события.
+    """
+    n_books = len(copies)
+    result = np.where(copies <= 0, window, 0).astype(np.int64)
+    if not len(book_index):
+        return result
+    
+    order = np.lexsort((deltas, days, book_index))
+    book_index, days, deltas = book_index[order], days[order], deltas[order]
+    on_loan = np.cumsum(deltas)
+    first = np.flatnonzero(np.r_[True, book_index[1:] != book_index[:-1]])
+    offsets = on_loan[first] - deltas[first]
+    on_loan -= np.repeat(offsets, np.diff(np.r_[first, len(book_index)]))
+    
+    next_day = np.r_[days[1:], window]
+    last = np.r_[book_index[1:] != book_index[:-1], True]
+    next_day[last] = window
+    lengths = next_day - days
+    empty = (on_loan >= copies[book_index]) & (copies[book_index] > 0)
+    result += np.bincount(book_index, weights=lengths * empty, minlength=n_books).astype(np.int64)
+    return np.minimum(result, window)
+
+
+def forecast_demand(db: Session, now: Optional[datetime] = None) -> List[Dict]:
+    """Оценка спроса и рекомендуемого числа экземпляров по всему фонду.
+
+    Данные читаются несколькими запросами на весь каталог, дальше все
+    считается векторно. Спрос - экспоненциально взвешенное среднее выдач
+    и постановок в очередь в день (половина веса за DEMAND_HALF_LIFE_DAYS).
+    Нужное число экземпляров по закону Литтла: спрос * средний срок
+    выдачи плюс запас DEMAND_SERVICE_Z * sqrt(...) на колебания спроса.
+    """
+    now = now or datetime.utcnow()
+    window = settings.DEMAND_WINDOW_DAYS
+    start = now - timedelta(days=window)
+    
+    books = db.execute(select(Book.id, Book.title, Book.author, Book.quantity).order_by(Book.id)).all()
+    if not books:
+        return []
+    book_ids = np.array([row.id for row in books], dtype=np.int64)
+    quantity = np.array([row.quantity for row in books], dtype=np.int64)
+    n_books = len(book_ids)
+    
+    loans = db.execute(
+        select(BorrowedBook.book_id, BorrowedBook.borrow_date, BorrowedBook.return_date).where(
+            or_(
+                BorrowedBook.return_date.is_(None),
+                BorrowedBook.return_date >= start,
+                BorrowedBook.borrow_date >= start,
+            )
+        )
+    ).all()
+    loan_book = np.searchsorted(book_ids, np.array([row.book_id for row in loans], dtype=np.int64))
+    borrow_day = _day_index([row.borrow_date for row in loans], start)
+    returned = np.array([row.return_date is not None for row in loans], dtype=bool)
+    return_day = np.full(len(loans), window, dtype=np.int64)
+    return_day[returned] = _day_index([row.return_date for row in loans if row.return_date], start)
+    
+    holds = db.execute(select(Hold.book_id, Hold.created_at).where(Hold.created_at >= start)).all()
+    hold_book = np.searchsorted(book_ids, np.array([row.book_id for row in holds], dtype=np.int64))
+    hold_day = _day_index([row.created_at for row in holds], start)
+    
+    ready_holds = db.query(Hold.book_id, func.count(Hold.id)).filter(
+        Hold.status == "ready"
+    ).group_by(Hold.book_id).all()
+    reserved = np.zeros(n_books, dtype=np.int64)
+    if ready_holds:
+        held_books, held_counts = np.array(ready_holds, dtype=np.int64).T
+        reserved[np.searchsorted(book_ids, held_books)] = held_counts
+    
+    active = np.bincount(loan_book[~returned], minlength=n_books)
+    copies = quantity + active + reserved
+    
+    weights = 0.5 ** ((window - 1 - np.arange(window)) / settings.DEMAND_HALF_LIFE_DAYS)
+    in_window = (borrow_day >= 0) & (borrow_day < window)
+    hold_in_window = (hold_day >= 0) & (hold_day < window)
+    demand = (
+        np.bincount(loan_book[in_window], weights=weights[borrow_day[in_window]], minlength=n_books)
+        + np.bincount(hold_book[hold_in_window], weights=weights[hold_day[hold_in_window]], minlength=n_books)
+    ) / weights.sum()
+    
+    finished = returned & (return_day < window)
+    durations = np.maximum(return_day[finished] - borrow_day[finished], 1)
+    loan_count = np.bincount(loan_book[finished], minlength=n_books)
+    loan_days = np.full(n_books, float(settings.LOAN_PERIOD_DAYS))
+    has_loans = loan_count > 0
+    loan_days[has_loans] = (
+        np.bincount(loan_book[finished], weights=durations, minlength=n_books)[has_loans]
+        / loan_count[has_loans]
+    )
+    
+    stockout = _stockout_days(
+        np.r_[loan_book, loan_book[finished]],
+        np.r_[np.clip(borrow_day, 0, window), return_day[finished]],
+        np.r_[np.ones(len(loan_book), dtype=np.int64), -np.ones(int(finished.sum()), dtype=np.int64)],
+        copies,
+        window,
+    )
+    
+    load = demand * loan_days
+    recommended = np.maximum(np.ceil(load + settings.DEMAND_SERVICE_Z * np.sqrt(load)), 1).astype(np.int64)
+    
+    return [
+        {
+            "book_id": int(book_ids[i]),
+            "title": books[i].title,
+            "author": books[i].author,
+            "computed_at": now,
+            "daily_demand": round(float(demand[i]), 4),
+            "avg_loan_days": round(float(loan_days[i]), 2),
+            "stockout_days": int(stockout[i]),
+            "current_copies": int(copies[i]),
+            "recommended_copies": int(recommended[i]),
+            "copies_delta": int(recommended[i] - copies[i]),
+        }
+        for i in range(n_books)
+    ]
+
+
+def iter_demand_csv(rows: Iterable[Dict], chunk_size: int = 64 * 1024) -> Iterator[str]:
+    """CSV-отчет по прогнозу кусками примерно по chunk_size символов."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
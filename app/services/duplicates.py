@@ -0,0 +1,319 @@
+import re
+import threading
+import zlib
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.book import Book
+from app.services.autocomplete import normalize
+from app.services.change_feed import ChangeFollower
+
+_PRIME = np.uint64((1 << 61) - 1)
+_NUMBER = re.compile(r"\d+")
+_AUTHOR_TOKENS = 4
+_LOAD_BATCH = 2000
+
+
+def shingles(title: str, size: int = 3) -> Set[str]:
+    text = f" {normalize(title)} "
+    return {text[i:i + size] for i in range(max(len(text) - size + 1, 1))}
+
+
+def match_key(title: str, author: str) -> np.ndarray:
+    """Хеш чисел из названия и до четырех хешей слов автора.
+
+    Инициалы не учитываются: "Толстой Л. Н." и "Лев Толстой" - один автор.
+    """
+    numbers = " ".join(sorted(_NUMBER.findall(normalize(title))))
+    tokens = sorted({zlib.crc32(token.encode()) for token in normalize(author).split() if len(token) > 1})
+    key = np.zeros(1 + _AUTHOR_TOKENS, dtype=np.uint32)
+    key[0] = zlib.crc32(numbers.encode())
+    key[1:1 + len(tokens[:_AUTHOR_TOKENS])] = tokens[:_AUTHOR_TOKENS]
+    return key
+
+
+def _same_work(first: np.ndarray, second: np.ndarray) -> bool:
+    if first[0] != second[0]:
+        return False
+    first_authors, second_authors = first[1:], second[1:]
+    if not first_authors.any() or not second_authors.any():
+        return True
+    return bool(np.isin(first_authors[first_authors > 0], second_authors).any())
+
+
+class DuplicateIndex:
+    """MinHash/LSH-индекс для поиска почти одинаковых книг.
+
+    Для каждой книги хранится MinHash-подпись символьных триграмм
+    нормализованного названия. Подпись делится на ``bands`` полос; книги
+    с совпадающей полосой попадают в одну корзину и становятся
+    кандидатами, поэтому поиск не сравнивает книгу со всем каталогом.
+    Кандидат считается дубликатом, если доля совпавших значений подписи
+    (оценка коэффициента Жаккара) не ниже порога, у авторов есть общее
+    слово и числа в названии (тома, части) совпадают.
+
+    Книги, загруженные через ``load``, лежат в отсортированных массивах
+    NumPy (около 350 байт на книгу); добавленные и измененные после
+    загрузки - в словарях, удаленные из массивов помечаются в ``_removed``.
+    """
+
+    def __init__(self, num_perm: int = 96, bands: int = 16, seed: int = 1) -> None:
+        if num_perm % bands:
+            raise ValueError("num_perm должно делиться на bands")
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._a = rng.integers(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._band_mult = rng.integers(1, 1 << 63, size=self.rows, dtype=np.uint64) | np.uint64(1)
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._ids = np.empty(0, dtype=np.int64)
+        self._static_signatures = np.empty((0, self.num_perm), dtype=np.uint16)
+        self._static_matches = np.empty((0, 1 + _AUTHOR_TOKENS), dtype=np.uint32)
+        self._static_keys = [np.empty(0, dtype=np.uint32) for _ in range(self.bands)]
+        self._static_positions = [np.empty(0, dtype=np.int32) for _ in range(self.bands)]
+        self._removed: Set[int] = set()
+        self._signatures: Dict[int, np.ndarray] = {}
+        self._matches: Dict[int, np.ndarray] = {}
+        self._buckets: List[Dict[int, List[int]]] = [defaultdict(list) for _ in range(self.bands)]
+
+    def __len__(self) -> int:
+        return len(self._ids) - len(self._removed) + len(self._signatures)
+
+    def signatures(self, titles: List[str]) -> np.ndarray:
+        """Подписи сразу для пачки названий, массив (len(titles), num_perm)."""
+        hashes = []
+        lengths = []
+        for title in titles:
+            title_shingles = shingles(title)
+            hashes.extend(zlib.crc32(shingle.encode()) for shingle in title_shingles)
+            lengths.append(len(title_shingles))
+        hashes = np.array(hashes, dtype=np.uint64)
+        values = (self._a[:, None] * hashes[None, :] + self._b[:, None]) % _PRIME
+        starts = np.r_[0, np.cumsum(lengths)[:-1]]
+        # Младших 16 бит достаточно для оценки доли совпадений
+        return np.minimum.reduceat(values, starts, axis=1).T.astype(np.uint16)
+
+    def band_keys(self, signatures: np.ndarray) -> np.ndarray:
+        """Ключи корзин LSH: по одному uint32 на полосу подписи."""
+        bands = signatures.reshape(len(signatures), self.bands, self.rows).astype(np.uint64)
+        return (bands * self._band_mult).sum(axis=2, dtype=np.uint64).astype(np.uint32)
+
+    def load(self, books: Iterable[Tuple[int, str, str]]) -> None:
+        ids, signatures, matches = [], [], []
+        batch = []
+        for book in books:
+            batch.append(book)
+            if len(batch) == _LOAD_BATCH:
+                signatures.append(self.signatures([title for _, title, _ in batch]))
+                ids.extend(book_id for book_id, _, _ in batch)
+                matches.extend(match_key(title, author) for _, title, author in batch)
+                batch = []
+        if batch:
+            signatures.append(self.signatures([title for _, title, _ in batch]))
+            ids.extend(book_id for book_id, _, _ in batch)
+            matches.extend(match_key(title, author) for _, title, author in batch)
+
+        ids = np.array(ids, dtype=np.int64)
+        order = np.argsort(ids, kind="stable")
+        signatures = np.concatenate(signatures)[order] if signatures else self._static_signatures[:0]
+        matches = np.array(matches, dtype=np.uint32).reshape(-1, 1 + _AUTHOR_TOKENS)[order]
+        keys = self.band_keys(signatures)
+        static_keys, static_positions = [], []
+        for band in range(self.bands):
+            positions = np.argsort(keys[:, band], kind="stable").astype(np.int32)
+            static_keys.append(keys[positions, band])
+            static_positions.append(positions)
+
+        with self._lock:
+            self._reset()
+            self._ids = ids[order]
+            self._static_signatures = signatures
+            self._static_matches = matches
+            self._static_keys = static_keys
+            self._static_positions = static_positions
+
+    def add_book(self, book_id: int, title: str, author: str) -> None:
+        signature = self.signatures([title])[0]
+        keys = self.band_keys(signature[None, :])[0].tolist()
+        with self._lock:
+            self._remove(book_id)
+            self._signatures[book_id] = signature
+            self._matches[book_id] = match_key(title, author)
+            for buckets, key in zip(self._buckets, keys):
+                buckets[key].append(book_id)
+
+    def remove_book(self, book_id: int) -> None:
+        with self._lock:
+            self._remove(book_id)
+
+    def _static_position(self, book_id: int) -> Optional[int]:
+        position = int(np.searchsorted(self._ids, book_id))
+        if position < len(self._ids) and self._ids[position] == book_id:
+            return position
+        return None
+
+    def _remove(self, book_id: int) -> None:
+        signature = self._signatures.pop(book_id, None)
+        if signature is not None:
+            self._matches.pop(book_id, None)
+            keys = self.band_keys(signature[None, :])[0].tolist()
+            for buckets, key in zip(self._buckets, keys):
+                bucket = buckets.get(key)
+                if bucket is None:
+                    continue
+                bucket.remove(book_id)
+                if not bucket:
+                    del buckets[key]
+        if self._static_position(book_id) is not None:
+            self._removed.add(book_id)
+
+    def _entry(self, book_id: int) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+        if book_id in self._signatures:
+            return self._signatures[book_id], self._matches[book_id]
+        if book_id in self._removed:
+            return None, None
+        position = self._static_position(book_id)
+        if position is None:
+            return None, None
+        return self._static_signatures[position], self._static_matches[position]
+
+    def _candidates(self, keys: List[int]) -> Set[int]:
+        candidates = set()
+        for band, key in enumerate(keys):
+            band_keys = self._static_keys[band]
+            low = np.searchsorted(band_keys, key, side="left")
+            high = np.searchsorted(band_keys, key, side="right")
+            if high > low:
+                candidates.update(self._ids[self._static_positions[band][low:high]].tolist())
+            candidates.update(self._buckets[band].get(key, ()))
+        return candidates
+
+    def find(
+        self,
+        title: str,
+        author: str,
+        exclude: Optional[int] = None,
+        threshold: Optional[float] = None,
+        limit: int = 10,
+    ) -> List[Tuple[int, float]]:
+        """Похожие книги в порядке убывания оценки сходства."""
+        threshold = settings.DUPLICATE_THRESHOLD if threshold is None else threshold
+        signature = self.signatures([title])[0]
+        keys = self.band_keys(signature[None, :])[0].tolist()
+        key = match_key(title, author)
+        with self._lock:
+            candidates = self._candidates(keys)
+            candidates.discard(exclude)
+            ids, signatures, matches = self._gather(candidates)
+        scores = (signatures == signature).mean(axis=1)
+        scored = [
+            (int(ids[i]), float(scores[i]))
+            for i in np.flatnonzero(scores >= threshold)
+            if _same_work(matches[i], key)
+        ]
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return scored[:limit]
+
+    def pairs(self, threshold: Optional[float] = None) -> List[Tuple[int, int, float]]:
+        """Все пары вероятных дубликатов в каталоге (для аудита).
+
+        Пара проверяется только в первой полосе, где совпали подписи,
+        поэтому множество уже просмотренных пар не хранится.
+        """
+        threshold = settings.DUPLICATE_THRESHOLD if threshold is None else threshold
+        result = []
+        prefix = 0
+        with self._lock:
+            for band in range(self.bands):
+                for bucket in self._band_groups(band):
+                    ids, signatures, matches = self._gather(bucket)
+                    for i in range(len(ids) - 1):
+                        equal = signatures[i + 1:] == signatures[i]
+                        keep = equal.mean(axis=1) >= threshold
+                        if prefix:
+                            earlier = equal[:, :prefix].reshape(len(equal), band, self.rows)
+                            keep &= ~earlier.all(axis=2).any(axis=1)
+                        for j in np.flatnonzero(keep) + i + 1:
+                            if _same_work(matches[i], matches[j]):
+                                score = float(np.mean(signatures[i] == signatures[j]))
+                                first, second = sorted((int(ids[i]), int(ids[j])))
+                                result.append((first, second, score))
+                prefix += self.rows
+        result.sort(key=lambda item: (-item[2], item[0], item[1]))
+        return result
+
+    def _gather(self, book_ids: Iterable[int]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Идентификаторы, подписи и ключи книг, которые еще есть в индексе."""
+        ids, signatures, matches = [], [], []
+        for book_id in book_ids:
+            signature, match = self._entry(book_id)
+            if signature is not None:
+                ids.append(book_id)
+                signatures.append(signature)
+                matches.append(match)
+        if not ids:
+            return (
+                np.empty(0, dtype=np.int64),
+                self._static_signatures[:0],
+                self._static_matches[:0],
+            )
+        return np.array(ids, dtype=np.int64), np.stack(signatures), np.stack(matches)
+
+    def _band_groups(self, band: int) -> Iterable[List[int]]:
+        """Корзины полосы, в которых больше одной книги."""
+        keys = self._static_keys[band]
+        ids = self._ids[self._static_positions[band]]
+        if self._removed:
+            alive = ~np.isin(ids, np.fromiter(self._removed, dtype=np.int64))
+            keys, ids = keys[alive], ids[alive]
+        dynamic = self._buckets[band]
+        if dynamic:
+            extra_keys = np.fromiter(
+                (key for key, bucket in dynamic.items() for _ in bucket), dtype=np.uint32
+            )
+            extra_ids = np.fromiter(
+                (book_id for bucket in dynamic.values() for book_id in bucket), dtype=np.int64
+            )
+            keys, ids = np.r_[keys, extra_keys], np.r_[ids, extra_ids]
+            order = np.argsort(keys, kind="stable")
+            keys, ids = keys[order], ids[order]
+        if len(keys) < 2:
+            return
+        boundaries = np.flatnonzero(keys[1:] != keys[:-1]) + 1
+        for group in np.split(ids, boundaries):
+            if len(group) > 1:
+                yield group.tolist()
+
+
+duplicate_index = DuplicateIndex()
+
+
+def _apply_book_changes(db: Session, changed_ids: Set[int]) -> None:
+    rows = db.query(Book.id, Book.title, Book.author).filter(Book.id.in_(changed_ids)).all()
+    for book_id, title, author in rows:
+        duplicate_index.add_book(book_id, title, author)
+    for book_id in changed_ids.difference(row.id for row in rows):
+        duplicate_index.remove_book(book_id)
+
+
+# Книги, созданные и измененные другими воркерами, приходят из ленты изменений
+duplicate_changes = ChangeFollower("book", settings.INDEX_REFRESH_SECONDS, _apply_book_changes)
+
+
+def load_duplicate_index(db: Session) -> None:
+    duplicate_changes.load(
+        db, lambda: duplicate_index.load(db.query(Book.id, Book.title, Book.author).yield_per(10000))
+    )
+
+
+def refresh_duplicate_index(db: Session) -> None:
+    duplicate_changes.refresh(db)
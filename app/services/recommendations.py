@@ -0,0 +1,167 @@
+import os
+import shutil
+import threading
+import time
+from itertools import chain
+from typing import List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy import select, union_all
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.borrowed_book import BorrowedBook
+from app.models.borrowed_book_archive import ArchivedBorrowedBook
+
+_ARRAYS = ("book_ids", "indptr", "neighbors", "scores")
+_CURRENT = "CURRENT"
+
+
+def load_loans(db: Session, chunk_size: int = 1_000_000) -> Tuple[np.ndarray, np.ndarray]:
+    """Пары (reader_id, book_id) из истории выдач в виде двух массивов."""
+    loans = union_all(
+        select(BorrowedBook.reader_id, BorrowedBook.book_id),
+        select(ArchivedBorrowedBook.reader_id, ArchivedBorrowedBook.book_id),
+    )
+    result = db.execute(loans.execution_options(yield_per=chunk_size))
+    parts = [
+        np.fromiter(chain.from_iterable(rows), dtype=np.int64, count=2 * len(rows))
+        for rows in result.partitions()
+    ]
+    if not parts:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    pairs = np.concatenate(parts).reshape(-1, 2)
+    return pairs[:, 0], pairs[:, 1]
+
+
+def build_similar(
+    reader_ids: np.ndarray,
+    book_ids: np.ndarray,
+    top_k: int = 20,
+    block_size: int = 4096,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Top-k похожих книг по совместным выдачам.
+
+    Похожесть - косинус между множествами читателей двух книг:
+    common / sqrt(readers_a * readers_b). Матрица совместных выдач
+    считается блоками строк, чтобы память не росла квадратично с
+    числом книг. Возвращает CSR-представление: отсортированные id книг,
+    indptr и массивы id соседей и оценок.
+    """
+    readers, reader_index = np.unique(reader_ids, return_inverse=True)
+    books, book_index = np.unique(book_ids, return_inverse=True)
+    n_books = len(books)
+    
+    matrix = sparse.csr_matrix(
+        (np.ones(len(book_index), dtype=np.float32), (reader_index, book_index)),
+        shape=(len(readers), n_books),
+    )
+    # Повторные выдачи одной книги одному читателю считаем одной
+    matrix.sum_duplicates()
+    matrix.data[:] = 1
+    
+    inv_norm = np.zeros(n_books, dtype=np.float32)
+    counts = np.asarray(matrix.sum(axis=0)).ravel()
+    np.divide(1, np.sqrt(counts), out=inv_norm, where=counts > 0)
+    by_book = matrix.T.tocsr()
+    
+    lengths = np.zeros(n_books, dtype=np.int64)
+    neighbor_parts, score_parts = [], []
+    for start in range(0, n_books, block_size):
+        stop = min(start + block_size, n_books)
+        block = (by_book[start:stop] @ matrix).tocoo()
+        rows, cols = block.row.astype(np.int64), block.col.astype(np.int64)
+        keep = rows + start != cols
+        rows, cols = rows[keep], cols[keep]
+        scores = block.data[keep] * inv_norm[rows + start] * inv_norm[cols]
+        
+        order = np.lexsort((cols, -scores, rows))
+        rows, cols, scores = rows[order], cols[order], scores[order]
+        rank = np.arange(len(rows)) - np.searchsorted(rows, rows)
+        top = rank < top_k
+        rows, cols, scores = rows[top], cols[top], scores[top]
+        
+        lengths[start:stop] = np.bincount(rows, minlength=stop - start)
+        neighbor_parts.append(books[cols])
+        score_parts.append(scores.astype(np.float32))
+    
+    indptr = np.zeros(n_books + 1, dtype=np.int64)
+    np.cumsum(lengths, out=indptr[1:])
+    neighbors = np.concatenate(neighbor_parts) if neighbor_parts else np.empty(0, dtype=np.int64)
+    scores = np.concatenate(score_parts) if score_parts else np.empty(0, dtype=np.float32)
+    return books, indptr, neighbors, scores
+
+
+def save_similar(directory: str, arrays: Tuple[np.ndarray, ...], keep: int = 2) -> str:
+    """Сохраняет сборку в новый каталог и атомарно переключает на нее CURRENT."""
+    os.makedirs(directory, exist_ok=True)
+    name = f"build-{time.strftime('%Y%m%d%H%M%S')}-{os.getpid()}"
+    path = os.path.join(directory, name)
+    os.makedirs(path)
+    for array_name, array in zip(_ARRAYS, arrays):
+        np.save(os.path.join(path, f"{array_name}.npy"), array)
+    
+    pointer = os.path.join(directory, f"{_CURRENT}.tmp")
+    with open(pointer, "w") as f:
+        f.write(name)
+    os.replace(pointer, os.path.join(directory, _CURRENT))
+    
+    builds = sorted(entry for entry in os.listdir(directory) if entry.startswith("build-"))
+    for old in builds[:-keep]:
+        if old != name:
+            shutil.rmtree(os.path.join(directory, old), ignore_errors=True)
+    return path
+
+
+class SimilarBooksIndex:
+    """Похожие книги из последней сборки, массивы отображаются в память."""
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._build: Optional[str] = None
+        self._arrays: Optional[Tuple[np.ndarray, ...]] = None
+
+    def _current_build(self) -> Optional[str]:
+        try:
+            with open(os.path.join(self.directory, _CURRENT)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def refresh(self) -> None:
+        build = self._current_build()
+        if build == self._build:
+            return
+        with self._lock:
+            if build == self._build:
+                return
+            arrays = None
+            if build is not None:
+                path = os.path.join(self.directory, build)
+                arrays = tuple(
+                    np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in _ARRAYS
+                )
+            self._arrays = arrays
+            self._build = build
+
+    def similar(self, book_id: int, limit: int = 10) -> List[Tuple[int, float]]:
+        self.refresh()
+        arrays = self._arrays
+        if arrays is None:
+            return []
+        book_ids, indptr, neighbors, scores = arrays
+        position = int(np.searchsorted(book_ids, book_id))
+        if position == len(book_ids) or book_ids[position] != book_id:
+            return []
+        start = int(indptr[position])
+        stop = min(int(indptr[position + 1]), start + limit)
+        return [
+            (int(neighbor), float(score))
+            for neighbor, score in zip(neighbors[start:stop], scores[start:stop])
+        ]
+
+
+similar_books = SimilarBooksIndex(settings.RECOMMENDATIONS_DIR)
@@ -0,0 +1,132 @@
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud.crud_revoked_token import delete_expired, get_revoked_tokens, revoke_token
+
+logger = logging.getLogger(__name__)
+
+# Больше пропусков не отслеживаем: такой разрыв дают только сбросы
+# последовательности, а не параллельные вставки
+_MAX_GAPS = 10000
+
+
+def _timestamp(value: datetime) -> float:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class RevocationList:
+    """Отозванные access-токены (jti) в памяти процесса.
+
+    ``is_revoked`` - поиск в словаре без обращения к БД. Отзывы из этого
+    процесса применяются сразу, отзывы других воркеров фоновый поток
+    догружает из ``revoked_tokens`` раз в ``refresh_seconds`` по курсору
+    id. Id, пропущенные в прочитанном диапазоне (транзакция с меньшим id
+    могла еще не зафиксироваться), перечитываются в течение
+    ``gap_seconds``. Раз в ``gc_seconds`` истекшие записи удаляются из БД
+    и из памяти.
+    """
+
+    def __init__(self, refresh_seconds: float, gc_seconds: float, gap_seconds: float) -> None:
+        self.refresh_seconds = refresh_seconds
+        self.gc_seconds = gc_seconds
+        self.gap_seconds = gap_seconds
+        self._revoked: Dict[str, float] = {}
+        self._last_id = 0
+        self._gaps: Dict[int, float] = {}
+        self._refresh_lock = threading.Lock()
+        self._collected_at = 0.0
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    def is_revoked(self, jti: str) -> bool:
+        expires_at = self._revoked.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+    def revoke(self, db: Session, jti: str, expires_at: datetime) -> None:
+        revoke_token(db, jti=jti, expires_at=expires_at)
+        self._revoked[jti] = _timestamp(expires_at)
+
+    def load(self, db: Session) -> None:
+        with self._refresh_lock:
+            self._revoked = {}
+            self._gaps = {}
+            self._last_id = 0
+            self._apply(db, track_gaps=False)
+
+    def refresh(self, db: Session) -> None:
+        with self._refresh_lock:
+            self._apply(db, track_gaps=True)
+
+    def _apply(self, db: Session, track_gaps: bool) -> None:
+        rows = get_revoked_tokens(db, after_id=self._last_id, ids=self._gaps)
+        for row_id, jti, expires_at in rows:
+            self._revoked[jti] = _timestamp(expires_at)
+            self._gaps.pop(row_id, None)
+        
+        now = time.monotonic()
+        last_id = max([self._last_id] + [row[0] for row in rows])
+        if track_gaps:
+            seen = {row[0] for row in rows}
+            for row_id in range(self._last_id + 1, last_id):
+                if len(self._gaps) >= _MAX_GAPS:
+                    break
+                if row_id not in seen:
+                    self._gaps[row_id] = now
+        self._last_id = last_id
+        self._gaps = {
+            row_id: seen_at for row_id, seen_at in self._gaps.items()
+            if now - seen_at < self.gap_seconds
+        }
+
+    def collect(self, db: Session) -> int:
+        deleted = delete_expired(db)
+        now = time.time()
+        self._revoked = {
+            jti: expires_at for jti, expires_at in self._revoked.items() if expires_at > now
+        }
+        self._collected_at = time.monotonic()
+        return deleted
+
+    def start(self, session_factory: Callable[[], Session]) -> None:
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(session_factory,), name="revocation-refresh", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self, session_factory: Callable[[], Session]) -> None:
+        while not self._stopped.wait(self.refresh_seconds):
+            db = session_factory()
+            try:
+                self.refresh(db)
+                if time.monotonic() - self._collected_at >= self.gc_seconds:
+                    self.collect(db)
+            except SQLAlchemyError:
+                logger.exception("Не удалось обновить список отозванных токенов")
+            finally:
+                db.close()
+
+
+revocation_list = RevocationList(
+    refresh_seconds=settings.REVOCATION_REFRESH_SECONDS,
+    gc_seconds=settings.REVOCATION_GC_SECONDS,
+    gap_seconds=settings.REVOCATION_GAP_SECONDS,
+)
@@ -0,0 +1,78 @@
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Схлопывает одинаковые одновременные вызовы в один.
+
+    Первый вызов с ключом выполняет функцию, остальные, пришедшие до его
+    завершения, ждут и получают тот же результат или то же исключение.
+    Результат не кешируется: следующий вызов после завершения снова идет
+    в функцию.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.calls = 0
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Возвращает (результат, получен ли он от чужого вызова)."""
+        with self._lock:
+            self.calls += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.coalesced += 1
+        
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+        
+        try:
+            flight.result = fn()
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result, False
+
+    def stats(self) -> Dict[str, int]:
+        return {"calls": self.calls, "coalesced": self.coalesced}
+
+
+flights: Dict[str, SingleFlight] = {
+    name: SingleFlight(name)
+    for name in ("book_response", "book_isbn_response", "reader_response")
+}
+
+
+def render_shared(db: Session, name: str, key: Hashable, render: Callable[[], Optional[bytes]]) -> Optional[bytes]:
+    """Один запрос и одна сериализация ответа на одинаковые одновременные запросы.
+
+    Участники получают только готовые байты, ORM-объекты между сессиями
+    не передаются. Ключ включает engine сессии: филиалы со своей БД не
+    смешиваются. Только для GET: запись должна читать состояние сама.
+    """
+    result, _ = flights[name].do((db.get_bind(), key), render)
+    return result
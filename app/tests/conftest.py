@@ -1,3 +1,11 @@
+import os
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+os.environ["DATABASE_URL"] = SQLALCHEMY_DATABASE_URL
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+# Тесты логинятся десятки раз подряд; middleware проверяется отдельно
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
@@ -7,7 +15,6 @@ from app.database.base import Base, get_db
 from app.main import app
 
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
 )
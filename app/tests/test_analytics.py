@@ -0,0 +1,127 @@
+from datetime import datetime, timedelta
+
+from fastapi import status
+
+from app.crud import crud_analytics, crud_book, crud_reader, crud_borrowed_book
+from app.models.borrowed_book import BorrowedBook
+from app.schemas.book import BookCreate
+from app.schemas.reader import ReaderCreate
+from app.schemas.borrowed_book import BorrowBookCreate
+
+
+def test_circulation_rollups(client, db):
+    from app.schemas.user import UserCreate
+    from app.crud.crud_user import create_user
+    
+    user_data = UserCreate(email="test_analytics@example.com", password="password123")
+    user = create_user(db, user_in=user_data)
+    
+    login_data = {"email": "test_analytics@example.com", "password": "password123"}
+    response = client.post("/api/v1/auth/login", json=login_data)
+    token = response.json()["access_token"]
+    
+    headers = {"Authorization": f"Bearer {token}"}
+    
+    popular = crud_book.create_book(db, book=BookCreate(title="Popular", author="Author", quantity=5))
+    other = crud_book.create_book(db, book=BookCreate(title="Other", author="Author", quantity=5))
+    readers = [
+        crud_reader.create_reader(db, reader=ReaderCreate(name=f"Reader {i}", email=f"analytics{i}@example.com"))
+        for i in range(2)
+    ]
+    for reader in readers:
+        borrow = crud_borrowed_book.borrow_book(db, borrow_data=BorrowBookCreate(book_id=popular.id, reader_id=reader.id))
+    crud_borrowed_book.return_book(db, db_borrow=borrow)
+    crud_borrowed_book.borrow_book(db, borrow_data=BorrowBookCreate(book_id=other.id, reader_id=readers[0].id))
+    
+    # Историческая выдача, которой нет в агрегатах
+    yesterday = datetime.utcnow() - timedelta(days=1)
+    db.add(BorrowedBook(book_id=other.id, reader_id=readers[1].id, borrow_date=yesterday, return_date=yesterday))
+    db.commit()
+    
+    response = client.get("/api/v1/analytics/top-books?days=7", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert [(b["book_id"], b["borrows"]) for b in response.json()] == [(popular.id, 2), (other.id, 1)]
+    
+    crud_analytics.backfill_circulation(db, before=datetime.utcnow().date(), chunk_days=1)
+    crud_analytics.backfill_circulation(db, before=datetime.utcnow().date(), chunk_days=1)
+    
+    response = client.get("/api/v1/analytics/top-books?days=7", headers=headers)
+    assert [(b["book_id"], b["borrows"]) for b in response.json()] == [(popular.id, 2), (other.id, 2)]
+    
+    response = client.get("/api/v1/analytics/readers?days=7", headers=headers)
+    data = response.json()
+    assert data["active_readers"] == 2
+    assert [(r["reader_id"], r["borrows"]) for r in data["top_readers"]] == [
+        (readers[0].id, 2), (readers[1].id, 2)
+    ]
+    
+    response = client.get("/api/v1/analytics/circulation", headers=headers)
+    assert [(d["borrows"], d["returns"]) for d in response.json()] == [(1, 1), (3, 1)]
+    
+    # Сбой посреди пересборки не оставляет аналитику без старых агрегатов
+    class BrokenBranch:
+        def query(self, *args):
+            return db.query(*args)
+        
+        def execute(self, *args):
+            raise RuntimeError("branch down")
+    
+    try:
+        crud_analytics.backfill_circulation(
+            db, before=datetime.utcnow().date(), chunk_days=1, branch_dbs=[BrokenBranch()]
+        )
+    except RuntimeError:
+        db.rollback()
+    response = client.get("/api/v1/analytics/circulation", headers=headers)
+    assert [(d["borrows"], d["returns"]) for d in response.json()] == [(1, 1), (3, 1)]
+
+
+def test_demand_forecast(client, db):
+    from app.schemas.user import UserCreate
+    from app.crud.crud_user import create_user
+    from app.services.demand import forecast_demand
+    
+    user_data = UserCreate(email="test_demand@example.com", password="password123")
+    user = create_user(db, user_in=user_data)
+    
+    login_data = {"email": "test_demand@example.com", "password": "password123"}
+    response = client.post("/api/v1/auth/login", json=login_data)
+    token = response.json()["access_token"]
+    
+    headers = {"Authorization": f"Bearer {token}"}
+    
+    bestseller = crud_book.create_book(db, book=BookCreate(title="Bestseller", author="Author", quantity=0))
+    idle = crud_book.create_book(db, book=BookCreate(title="Idle", author="Author", quantity=5))
+    reader = crud_reader.create_reader(db, reader=ReaderCreate(name="Reader", email="demand@example.com"))
+    
+    # Единственный экземпляр без перерыва на руках последние 80 дней
+    now = datetime.utcnow()
+    for week in range(11):
+        borrow_date = now - timedelta(days=80 - 7 * week)
+        return_date = borrow_date + timedelta(days=7) if week < 10 else None
+        db.add(BorrowedBook(
+            book_id=bestseller.id, reader_id=reader.id,
+            borrow_date=borrow_date, return_date=return_date,
+        ))
+    db.commit()
+    
+    rows = {row["book_id"]: row for row in forecast_demand(db, now=now)}
+    assert rows[bestseller.id]["current_copies"] == 1
+    assert rows[bestseller.id]["avg_loan_days"] == 7
+    assert rows[bestseller.id]["stockout_days"] >= 79
+    assert rows[bestseller.id]["copies_delta"] > 0
+    assert rows[idle.id]["daily_demand"] == 0
+    assert rows[idle.id]["stockout_days"] == 0
+    assert (rows[idle.id]["recommended_copies"], rows[idle.id]["copies_delta"]) == (1, -4)
+    
+    crud_analytics.save_demand_forecasts(db, list(rows.values()))
+    response = client.get("/api/v1/analytics/demand", headers=headers)
+    assert [row["book_id"] for row in response.json()] == [bestseller.id, idle.id]
+    response = client.get("/api/v1/analytics/demand?order=surplus&limit=1", headers=headers)
+    assert [row["title"] for row in response.json()] == ["Idle"]
+    
+    response = client.get("/api/v1/analytics/demand.csv", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    lines = response.text.splitlines()
+    assert lines[0].startswith("book_id,title,author")
+    assert [line.split(",")[1] for line in lines[1:]] == ["Bestseller", "Idle"]
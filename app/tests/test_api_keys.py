@@ -0,0 +1,86 @@
+import json
+import time
+
+from fastapi import status
+
+from app.crud.crud_user import create_user, update_user
+from app.schemas.user import UserCreate, UserUpdate
+from app.security.api_keys import api_key_cache, sign_request
+
+
+def test_api_key_authentication(client, db, monkeypatch):
+    from app.security import dependencies
+    
+    user = create_user(db, user_in=UserCreate(email="kiosk_owner@example.com", password="password123"))
+    response = client.post(
+        "/api/v1/auth/login", json={"email": "kiosk_owner@example.com", "password": "password123"}
+    )
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    
+    response = client.post(
+        "/api/v1/api-keys/", json={"name": "Киоск 1", "scopes": "books:read readers"}, headers=headers
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    created = response.json()
+    assert created["api_key"].startswith(f"lib_{created['key_id']}_")
+    response = client.get("/api/v1/api-keys/", headers=headers)
+    assert [key["key_id"] for key in response.json()] == [created["key_id"]]
+    assert "api_key" not in response.json()[0]
+    
+    key_headers = {"X-API-Key": created["api_key"]}
+    assert client.get("/api/v1/books/", headers=key_headers).status_code == status.HTTP_200_OK
+    
+    # После первого запроса ключ и пользователь берутся из памяти
+    def fail(*args, **kwargs):
+        raise AssertionError("ключ не должен читаться из БД")
+    
+    monkeypatch.setattr(dependencies, "get_api_key_by_key_id", fail)
+    monkeypatch.setattr(dependencies, "get_user_by_id", fail)
+    assert client.get("/api/v1/books/", headers=key_headers).status_code == status.HTTP_200_OK
+    
+    # Scope books:read не дает записи, readers - дает
+    response = client.post("/api/v1/books/", json={"title": "T", "author": "A", "quantity": 1}, headers=key_headers)
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    assert client.get("/api/v1/fines/report", headers=key_headers).status_code == status.HTTP_403_FORBIDDEN
+    
+    body = json.dumps({"name": "Signed", "email": "signed@example.com"}).encode()
+    timestamp = str(int(time.time()))
+    signed_headers = {
+        "X-API-Key-Id": created["key_id"],
+        "X-Timestamp": timestamp,
+        "X-Nonce": "nonce-1",
+        "X-Signature": sign_request(
+            created["signing_secret"], "POST", "/api/v1/readers/", timestamp, "nonce-1", body
+        ),
+        "Content-Type": "application/json",
+    }
+    response = client.post("/api/v1/readers/", content=body, headers=signed_headers)
+    assert response.status_code == status.HTTP_201_CREATED
+    # Повтор перехваченного запроса с тем же nonce отклоняется
+    response = client.post("/api/v1/readers/", content=body, headers=signed_headers)
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    tampered = body.replace(b"Signed", b"Forged")
+    response = client.post("/api/v1/readers/", content=tampered, headers=signed_headers)
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    
+    bad_key = created["api_key"][:-1] + ("A" if created["api_key"][-1] != "A" else "B")
+    response = client.get("/api/v1/books/", headers={"X-API-Key": bad_key})
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    
+    monkeypatch.undo()
+    response = client.delete(f"/api/v1/api-keys/{created['id']}", headers=headers)
+    assert response.json()["revoked_at"] is not None
+    assert client.get("/api/v1/books/", headers=key_headers).status_code == status.HTTP_401_UNAUTHORIZED
+    
+    response = client.post("/api/v1/api-keys/", json={"name": "Киоск 2"}, headers=headers)
+    key_headers = {"X-API-Key": response.json()["api_key"]}
+    # Даже ключ со всеми правами не выпускает новые ключи
+    response = client.post("/api/v1/api-keys/", json={"name": "Киоск 3"}, headers=key_headers)
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    response = client.post("/api/v1/batch/", json={"requests": [
+        {"method": "POST", "path": "/api-keys/", "body": {"name": "Киоск 3"}}
+    ]}, headers=key_headers)
+    assert response.json()["responses"][0]["status"] == status.HTTP_403_FORBIDDEN
+    update_user(db, db_user=user, user_in=UserUpdate(is_active=False))
+    api_key_cache.clear()
+    assert client.get("/api/v1/books/", headers=key_headers).status_code == status.HTTP_401_UNAUTHORIZED
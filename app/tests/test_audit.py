@@ -0,0 +1,75 @@
+import os
+
+from fastapi import status
+from sqlalchemy.orm import Session
+
+from app.crud import crud_book, crud_borrowed_book, crud_reader
+from app.crud.crud_user import create_user
+from app.models.audit import AuditLog, AuditOutbox
+from app.schemas.book import BookCreate, BookUpdate
+from app.schemas.borrowed_book import BorrowBookCreate
+from app.schemas.reader import ReaderCreate
+from app.schemas.user import UserCreate
+from app.services.audit import AuditDispatcher, RotatingFileSink, audit_dispatcher
+
+
+def test_outbox_is_delivered_at_least_once(db: Session, tmp_path):
+    book = crud_book.create_book(db, book=BookCreate(title="Audit", author="Author", quantity=1))
+    reader = crud_reader.create_reader(db, reader=ReaderCreate(name="Audit reader", email="audit@example.com"))
+    borrow = crud_borrowed_book.borrow_book(db, borrow_data=BorrowBookCreate(book_id=book.id, reader_id=reader.id))
+    crud_borrowed_book.return_book(db, db_borrow=borrow)
+    crud_book.update_book(db, db_book=book, book_in=BookUpdate(quantity=3))
+    
+    events = db.query(AuditOutbox.id, AuditOutbox.event_type).order_by(AuditOutbox.id).all()
+    assert [event_type for _, event_type in events] == ["book_create", "borrow", "return", "book_update"]
+    ids = [event_id for event_id, _ in events]
+    
+    delivered = []
+    
+    def failing_sink(records):
+        raise RuntimeError("sink down")
+    
+    dispatcher = AuditDispatcher(interval_seconds=1, batch_size=2, max_lag_seconds=30)
+    dispatcher.add_sink(delivered.extend)
+    dispatcher.add_sink(failing_sink)
+    assert dispatcher.drain(db) == 0
+    assert db.query(AuditOutbox).count() == 4
+    assert dispatcher.stats()["failures"] == 1
+    
+    dispatcher.remove_sink(failing_sink)
+    sink = RotatingFileSink(str(tmp_path / "audit.jsonl"), max_bytes=300, backup_count=2)
+    dispatcher.add_sink(sink)
+    assert dispatcher.drain(db) == 4
+    assert db.query(AuditOutbox).count() == 0
+    # Первая пачка ушла первому приемнику дважды: до и после сбоя второго
+    assert [record["id"] for record in delivered] == ids[:2] + ids
+    assert delivered[-1]["payload"]["changes"] == {"quantity": [1, 3]}
+    
+    log = db.query(AuditLog).order_by(AuditLog.id).all()
+    assert [entry.outbox_id for entry in log] == ids
+    stats = dispatcher.stats()
+    assert [database["pending"] for database in stats["databases"].values()] == [0]
+    assert stats["delivered"] == 4
+    assert sink.current_path().endswith(f"audit.{os.getpid()}.jsonl")
+    assert os.path.exists(f"{sink.current_path()}.1")
+
+
+def test_audit_log_endpoint(client, db: Session):
+    create_user(db, user_in=UserCreate(email="auditor@example.com", password="password123"))
+    response = client.post("/api/v1/auth/login", json={"email": "auditor@example.com", "password": "password123"})
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    book = crud_book.create_book(db, book=BookCreate(title="Audit API", author="Author", quantity=1))
+    reader = crud_reader.create_reader(db, reader=ReaderCreate(name="Audit API", email="audit_api@example.com"))
+    response = client.post(
+        "/api/v1/borrowed-books/borrow", json={"book_id": book.id, "reader_id": reader.id}, headers=headers
+    )
+    borrow_id = response.json()["id"]
+    
+    audit_dispatcher.drain(db)
+    response = client.get(
+        f"/api/v1/audit/?entity=borrowed_book&entity_id={borrow_id}", headers=headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    entries = response.json()
+    assert [entry["event_type"] for entry in entries] == ["borrow"]
+    assert entries[0]["payload"]["reader_id"] == reader.id
@@ -92,4 +92,119 @@ def test_oauth_login(client, db):
         "/api/v1/auth/login/oauth",
         data={"username": "oauth_test@example.com", "password": "wrong_password"}
     )
-    assert response.status_code == status.HTTP_401_UNAUTHORIZED
\ No newline at end of file
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+def test_refresh_token_rotation(client, db):
+    from app.crud.crud_user import update_user
+    from app.schemas.user import UserUpdate
+    
+    user = create_user(db, user_in=UserCreate(email="refresh@example.com", password="password123"))
+    response = client.post(
+        "/api/v1/auth/login", json={"email": "refresh@example.com", "password": "password123"}
+    )
+    first = response.json()["refresh_token"]
+    
+    response = client.post("/api/v1/auth/refresh", json={"refresh_token": first})
+    assert response.status_code == status.HTTP_200_OK
+    second = response.json()["refresh_token"]
+    assert second != first
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    assert client.get("/api/v1/books/", headers=headers).status_code == status.HTTP_200_OK
+    
+    # Повторное использование старого токена отзывает всю цепочку
+    response = client.post("/api/v1/auth/refresh", json={"refresh_token": first})
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    response = client.post("/api/v1/auth/refresh", json={"refresh_token": second})
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    
+    response = client.post(
+        "/api/v1/auth/login", json={"email": "refresh@example.com", "password": "password123"}
+    )
+    third = response.json()["refresh_token"]
+    update_user(db, db_user=user, user_in=UserUpdate(is_active=False))
+    response = client.post("/api/v1/auth/refresh", json={"refresh_token": third})
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    
+    response = client.post("/api/v1/auth/logout", json={"refresh_token": third})
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+
+def test_stateless_auth_mode_skips_database(client, db, monkeypatch):
+    from app.core.config import settings
+    from app.security import dependencies
+    
+    monkeypatch.setattr(settings, "AUTH_MODE", "stateless")
+    create_user(db, user_in=UserCreate(email="stateless@example.com", password="password123"))
+    response = client.post(
+        "/api/v1/auth/login", json={"email": "stateless@example.com", "password": "password123"}
+    )
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    
+    def fail(*args, **kwargs):
+        raise AssertionError("пользователь не должен читаться из БД")
+    
+    monkeypatch.setattr(dependencies, "get_user_by_id", fail)
+    response = client.get("/api/v1/readers/", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_logout_revokes_access_token(client, db):
+    from datetime import datetime, timedelta
+    from app.crud.crud_revoked_token import revoke_token
+    from app.models.revoked_token import RevokedToken
+    from app.security.jwt import create_user_access_token, decode_token
+    from app.services.revocation import revocation_list
+    
+    user = create_user(db, user_in=UserCreate(email="logout@example.com", password="password123"))
+    response = client.post(
+        "/api/v1/auth/login", json={"email": "logout@example.com", "password": "password123"}
+    )
+    tokens = response.json()
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    assert client.get("/api/v1/books/", headers=headers).status_code == status.HTTP_200_OK
+    
+    response = client.post(
+        "/api/v1/auth/logout", json={"refresh_token": tokens["refresh_token"]}, headers=headers
+    )
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    assert client.get("/api/v1/books/", headers=headers).status_code == status.HTTP_401_UNAUTHORIZED
+    
+    # Отзыв из другого воркера виден после догрузки
+    token = create_user_access_token(user)
+    jti = decode_token(token).jti
+    revoke_token(db, jti=jti, expires_at=datetime.utcnow() + timedelta(minutes=5))
+    revocation_list.refresh(db)
+    assert decode_token(token) is None
+    
+    revoke_token(db, jti="expired", expires_at=datetime.utcnow() - timedelta(minutes=1))
+    assert revocation_list.collect(db) == 1
+    assert db.query(RevokedToken).count() == 2
+
+
+def test_decode_token_uses_verification_cache(monkeypatch):
+    import time
+    from app.security import jwt as jwt_module
+    from app.services.revocation import revocation_list
+    
+    monkeypatch.setattr(jwt_module, "verified_tokens", jwt_module.VerifiedTokenCache(maxsize=1))
+    token = jwt_module.create_access_token(subject=1)
+    other = jwt_module.create_access_token(subject=2)
+    assert jwt_module.decode_token(token).sub == "1"
+    
+    def fail(token):
+        raise AssertionError("токен должен браться из кеша")
+    
+    verify = jwt_module.verify_token
+    monkeypatch.setattr(jwt_module, "verify_token", fail)
+    token_data = jwt_module.decode_token(token)
+    assert token_data.sub == "1"
+    
+    # Отзыв действует и на закешированный токен
+    monkeypatch.setitem(revocation_list._revoked, token_data.jti, time.time() + 300)
+    assert jwt_module.decode_token(token) is None
+    
+    monkeypatch.setattr(jwt_module, "verify_token", verify)
+    assert jwt_module.decode_token(other).sub == "2"
+    assert len(jwt_module.verified_tokens) == 1
+    assert jwt_module.decode_token("invalid") is None
+    assert len(jwt_module.verified_tokens) == 1
@@ -0,0 +1,155 @@
+import time
+
+from fastapi import status
+
+from app.crud import crud_book, crud_reader, crud_borrowed_book
+from app.schemas.book import BookCreate, BookUpdate
+from app.schemas.reader import ReaderCreate
+from app.schemas.borrowed_book import BorrowBookCreate
+from app.services.autocomplete import PrefixIndex, normalize
+
+
+def test_normalize():
+    assert normalize("  Война и  Мир! ") == "война и мир"
+    assert normalize("Ёлка") == normalize("елка")
+    assert normalize("Crime & Punishment") == "crime punishment"
+
+
+def test_prefix_index_ranks_by_popularity():
+    index = PrefixIndex(depth=2, top_k=3)
+    index.load([
+        (1, "War and Peace", "Leo Tolstoy", 5),
+        (2, "Warlock", "Wilbur Smith", 9),
+        (3, "Wartime", "Paul Fussell", 1),
+        (4, "Anna Karenina", "Leo Tolstoy", 7),
+    ])
+    
+    assert [text for text, _, _ in index.suggest("war")] == [
+        "Warlock", "War and Peace", "Wartime"
+    ]
+    assert index.suggest("wa", limit=1) == [("Warlock", "title", 2)]
+    assert index.suggest("leo") == [("Leo Tolstoy", "author", None)]
+    assert index.suggest("l") == [("Leo Tolstoy", "author", None)]
+    assert index.suggest("xyz") == []
+    assert index.suggest("   ") == []
+    
+    index.bump(3, delta=10)
+    assert index.suggest("wa", limit=1) == [("Wartime", "title", 3)]
+    assert index.suggest("war", limit=1) == [("Wartime", "title", 3)]
+
+
+def test_prefix_index_incremental_updates():
+    index = PrefixIndex(depth=2, top_k=5)
+    index.load([])
+    
+    index.add_book(1, "Dune", "Frank Herbert")
+    index.add_book(2, "Dune Messiah", "Frank Herbert")
+    assert {text for text, _, _ in index.suggest("du")} == {"Dune", "Dune Messiah"}
+    assert index.suggest("frank") == [("Frank Herbert", "author", None)]
+    
+    index.update_book(2, "Children of Dune", "Frank Herbert")
+    assert index.suggest("du") == [("Dune", "title", 1)]
+    assert index.suggest("chi") == [("Children of Dune", "title", 2)]
+    
+    index.remove_book(1)
+    index.remove_book(2)
+    assert index.suggest("du") == []
+    assert index.suggest("fr") == []
+    assert len(index) == 0
+
+
+def test_prefix_index_removal_uses_spare_entries(monkeypatch):
+    index = PrefixIndex(depth=1, top_k=2, spare=2)
+    index.load([(book_id, f"Book {book_id}", f"Author {book_id}", book_id) for book_id in range(1, 7)])
+    scans = []
+    original_scan = index._scan
+    monkeypatch.setattr(index, "_scan", lambda key, limit: scans.append(key) or original_scan(key, limit))
+    
+    # Удаление самых популярных правит только списки с ними, без обхода диапазона
+    index.remove_book(6)
+    index.remove_book(5)
+    assert scans == []
+    assert [book_id for _, _, book_id in index.suggest("b")] == [4, 3]
+    
+    # Запас кончился: список префикса пересматривается по диапазону
+    index.remove_book(4)
+    assert "b" in scans
+    assert [book_id for _, _, book_id in index.suggest("b")] == [3, 2]
+    
+    # Новая непопулярная книга не попадает в список, пока вне его есть популярнее
+    index.add_book(7, "Book 7", "Author 7")
+    assert [book_id for _, _, book_id in index.suggest("b")] == [3, 2]
+
+
+def test_autocomplete_api(client, db):
+    from app.schemas.user import UserCreate
+    from app.crud.crud_user import create_user
+    
+    user_data = UserCreate(email="test_autocomplete@example.com", password="password123")
+    user = create_user(db, user_in=user_data)
+    
+    login_data = {"email": "test_autocomplete@example.com", "password": "password123"}
+    response = client.post("/api/v1/auth/login", json=login_data)
+    token = response.json()["access_token"]
+    
+    headers = {"Authorization": f"Bearer {token}"}
+    
+    first = crud_book.create_book(db, book=BookCreate(title="Мастер и Маргарита", author="Булгаков"))
+    second = crud_book.create_book(db, book=BookCreate(title="Мастерская", author="Иванов"))
+    reader = crud_reader.create_reader(db, reader=ReaderCreate(name="Reader", email="reader_ac@example.com"))
+    crud_borrowed_book.borrow_book(db, borrow_data=BorrowBookCreate(book_id=second.id, reader_id=reader.id))
+    
+    response = client.get("/api/v1/books/autocomplete?q=мастер", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert [item["book_id"] for item in response.json()] == [second.id, first.id]
+    
+    crud_book.update_book(db, db_book=first, book_in=BookUpdate(title="Белая гвардия"))
+    response = client.get("/api/v1/books/autocomplete?q=бел", headers=headers)
+    assert response.json() == [{"text": "Белая гвардия", "field": "title", "book_id": first.id}]
+    
+    response = client.get("/api/v1/books/autocomplete?q=", headers=headers)
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_autocomplete_follows_other_workers(client, db, monkeypatch):
+    from app.crud.crud_change import record_change
+    from app.models.book import Book
+    from app.schemas.user import UserCreate
+    from app.crud.crud_user import create_user
+    from app.services.autocomplete import autocomplete_changes
+    from app.tests.conftest import TestingSessionLocal
+    
+    create_user(db, user_in=UserCreate(email="worker_autocomplete@example.com", password="password123"))
+    response = client.post(
+        "/api/v1/auth/login", json={"email": "worker_autocomplete@example.com", "password": "password123"}
+    )
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    
+    # Фоновый поток подтягивает ленту, запросы подсказок в БД не ходят
+    autocomplete_changes.stop()
+    monkeypatch.setattr(autocomplete_changes, "refresh_seconds", 0.05)
+    autocomplete_changes.start(TestingSessionLocal)
+    
+    def suggest(q):
+        deadline = time.monotonic() + 5
+        while True:
+            items = client.get(f"/api/v1/books/autocomplete?q={q}", headers=headers).json()
+            if items or time.monotonic() > deadline:
+                return [item["book_id"] for item in items]
+            time.sleep(0.05)
+    
+    # Книгу создал и переименовал другой воркер, минуя индекс этого процесса
+    book = Book(title="Белая гвардия", author="Булгаков", quantity=1)
+    db.add(book)
+    db.flush()
+    record_change(db, "book", book.id)
+    db.commit()
+    
+    assert suggest("бела") == [book.id]
+    
+    book.title = "Дни Турбиных"
+    record_change(db, "book", book.id)
+    db.commit()
+    
+    assert suggest("дни") == [book.id]
+    assert suggest("бела") == []
@@ -0,0 +1,118 @@
+import asyncio
+import threading
+
+from app.services.availability import AvailabilityHub, LocalBackend
+
+
+def test_availability_hub_coalesces_and_filters():
+    hub = AvailabilityHub(LocalBackend(), max_pending=10)
+    hub.start()
+    
+    async def scenario():
+        subscription = hub.subscribe(frozenset({1, 2}))
+        
+        def burst():
+            for quantity in range(5, 0, -1):
+                hub.publish(1, quantity)
+            hub.publish(3, 7)
+            hub.publish(2, 4)
+        
+        thread = threading.Thread(target=burst)
+        thread.start()
+        thread.join()
+        
+        batch = await subscription.next_batch(timeout=1, coalesce_seconds=0.01)
+        empty = await subscription.next_batch(timeout=0.01, coalesce_seconds=0)
+        hub.unsubscribe(subscription)
+        return batch, empty
+    
+    batch, empty = asyncio.run(scenario())
+    hub.stop()
+    assert batch == {1: 1, 2: 4}
+    assert empty == {}
+    assert hub.subscribers == 0
+
+
+def test_availability_hub_drops_slow_consumer():
+    hub = AvailabilityHub(LocalBackend(), max_pending=3)
+    hub.start()
+    
+    async def scenario():
+        slow = hub.subscribe()
+        for book_id in range(1, 6):
+            hub.publish(book_id, 1)
+        await asyncio.sleep(0)
+        return slow
+    
+    slow = asyncio.run(scenario())
+    hub.stop()
+    assert slow.dropped is True
+
+
+def test_failed_publish_does_not_break_hub(caplog):
+    class BrokenBackend(LocalBackend):
+        def publish(self, book_id, quantity):
+            raise ConnectionError("connection closed")
+    
+    hub = AvailabilityHub(BrokenBackend(), max_pending=10)
+    hub.publish(1, 0)
+    assert "Не удалось опубликовать" in caplog.text
+
+
+def test_availability_stream_receives_borrow_and_return(client, db, monkeypatch):
+    import time
+    
+    from app.core.config import settings
+    from app.crud import crud_book, crud_borrowed_book, crud_reader
+    from app.crud.crud_user import create_user
+    from app.schemas.book import BookCreate
+    from app.schemas.borrowed_book import BorrowBookCreate
+    from app.schemas.reader import ReaderCreate
+    from app.schemas.user import UserCreate
+    from app.services.availability import availability_hub
+    from app.tests.conftest import TestingSessionLocal
+    
+    create_user(db, user_in=UserCreate(email="stream@example.com", password="password123"))
+    response = client.post("/api/v1/auth/login", json={"email": "stream@example.com", "password": "password123"})
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    book = crud_book.create_book(db, book=BookCreate(title="Streamed", author="Author", quantity=1))
+    reader = crud_reader.create_reader(db, reader=ReaderCreate(name="Stream", email="stream_reader@example.com"))
+    book_id, reader_id = book.id, reader.id
+    monkeypatch.setattr(settings, "EVENTS_COALESCE_SECONDS", 0)
+    monkeypatch.setattr(availability_hub, "max_pending", 2)
+    known = set(availability_hub._subscriptions)
+    
+    def circulate():
+        deadline = time.monotonic() + 10
+        while not availability_hub._subscriptions - known and time.monotonic() < deadline:
+            time.sleep(0.01)
+        subscription = next(iter(availability_hub._subscriptions - known))
+        session = TestingSessionLocal()
+        try:
+            borrow = crud_borrowed_book.borrow_book(
+                session, borrow_data=BorrowBookCreate(book_id=book_id, reader_id=reader_id)
+            )
+            time.sleep(0.2)
+            crud_borrowed_book.return_book(session, db_borrow=borrow)
+            time.sleep(0.2)
+        finally:
+            session.close()
+        
+        def overflow():
+            for other_id in range(1000, 1005):
+                subscription.offer(other_id, 1)
+        
+        # Переполняем очередь подписчика разом в его цикле событий, чтобы поток закончился
+        subscription.loop.call_soon_threadsafe(overflow)
+    
+    thread = threading.Thread(target=circulate)
+    thread.start()
+    response = client.get("/api/v1/events/availability", headers=headers)
+    thread.join()
+    
+    events = [block for block in response.text.split("\n\n") if block.startswith("event:")]
+    assert events == [
+        f'event: availability\ndata: {{"book_id": {book_id}, "quantity": 0}}',
+        f'event: availability\ndata: {{"book_id": {book_id}, "quantity": 1}}',
+        "event: dropped\ndata: {}",
+    ]
@@ -0,0 +1,109 @@
+from fastapi import Request, status
+
+from app.crud.crud_book import create_book
+from app.crud.crud_reader import create_reader
+from app.crud.crud_user import create_user
+from app.database.base import get_db
+from app.main import app
+from app.schemas.book import BookCreate
+from app.schemas.reader import ReaderCreate
+from app.schemas.user import UserCreate
+
+
+def test_batch_runs_subrequests_with_one_authentication(client, db, monkeypatch):
+    from app.core.config import settings
+    from app.security import dependencies
+    
+    # Как в рабочем get_db: подзапросы получают сессию пакета
+    def override_get_db(request: Request):
+        yield request.scope.get("batch_db") or db
+    
+    app.dependency_overrides[get_db] = override_get_db
+    create_user(db, user_in=UserCreate(email="desk@example.com", password="password123"))
+    response = client.post("/api/v1/auth/login", json={"email": "desk@example.com", "password": "password123"})
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    reader = create_reader(db, reader=ReaderCreate(name="Desk reader", email="desk_reader@example.com"))
+    books = [create_book(db, book=BookCreate(title=f"Desk {i}", author="Author", quantity=1)) for i in range(2)]
+    
+    decoded = []
+    decode_token = dependencies.decode_token
+    monkeypatch.setattr(dependencies, "decode_token", lambda token: decoded.append(token) or decode_token(token))
+    
+    response = client.post("/api/v1/batch/", json={"requests": [
+        {"path": f"/readers/{reader.id}"},
+        {"path": f"/books/{books[0].id}?fields=title"},
+        {"path": f"/books/{books[1].id}"},
+        {"method": "POST", "path": "/borrowed-books/borrow", "body": {"book_id": books[0].id, "reader_id": reader.id}},
+        {"method": "POST", "path": "/borrowed-books/borrow", "body": {"book_id": books[0].id, "reader_id": reader.id}},
+        {"path": f"/borrowed-books/reader/{reader.id}"},
+        {"path": "/books/999999"},
+        {"method": "POST", "path": "/readers/", "body": {"name": "No email"}},
+        {"path": "/events/books"},
+    ]}, headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    results = response.json()["responses"]
+    assert [result["status"] for result in results] == [200, 200, 200, 201, 400, 200, 404, 422, 400]
+    assert results[0]["body"]["email"] == "desk_reader@example.com"
+    assert results[1]["body"] == {"id": books[0].id, "title": "Desk 0"}
+    assert results[4]["body"]["detail"] == "Нет доступных экземпляров книги"
+    assert [loan["book_id"] for loan in results[5]["body"]] == [books[0].id]
+    assert len(decoded) == 1
+    
+    response = client.post(
+        "/api/v1/batch/",
+        json={"requests": [{"path": "/books/"}] * (settings.BATCH_MAX_REQUESTS + 1)},
+        headers=headers,
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    response = client.post("/api/v1/batch/", json={"requests": [{"path": "/books/"}]})
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_batch_applies_api_key_scopes_to_subrequests(client, db):
+    def override_get_db(request: Request):
+        yield request.scope.get("batch_db") or db
+    
+    app.dependency_overrides[get_db] = override_get_db
+    create_user(db, user_in=UserCreate(email="scoped@example.com", password="password123"))
+    response = client.post("/api/v1/auth/login", json={"email": "scoped@example.com", "password": "password123"})
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    response = client.post("/api/v1/api-keys/", json={"name": "Киоск", "scopes": "books:read"}, headers=headers)
+    key_headers = {"X-API-Key": response.json()["api_key"]}
+    create_book(db, book=BookCreate(title="Scoped", author="Author", quantity=1))
+    
+    # Сам /batch доступен любому ключу, подзапросы - только в пределах scope
+    response = client.post("/api/v1/batch/", json={"requests": [
+        {"path": "/books/"},
+        {"method": "POST", "path": "/books/", "body": {"title": "T", "author": "A", "quantity": 1}},
+        {"path": "/fines/report"},
+        {"method": "POST", "path": "/api-keys/", "body": {"name": "Escalated", "scopes": "*"}},
+    ]}, headers=key_headers)
+    assert response.status_code == status.HTTP_200_OK
+    results = response.json()["responses"]
+    assert [result["status"] for result in results] == [200, 403, 403, 403]
+    assert [book["title"] for book in results[0]["body"]] == ["Scoped"]
+    
+    response = client.post("/api/v1/batch/", json={"requests": [
+        {"method": "POST", "path": "/books/", "body": {"title": "T", "author": "A", "quantity": 1}},
+    ]}, headers=headers)
+    assert response.json()["responses"][0]["status"] == 201
+
+
+def test_batch_charges_rate_limit_per_subrequest(client, db, monkeypatch):
+    from app.core.config import settings
+    from app.middleware import rate_limit
+    
+    create_user(db, user_in=UserCreate(email="limited@example.com", password="password123"))
+    response = client.post("/api/v1/auth/login", json={"email": "limited@example.com", "password": "password123"})
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(settings, "RATE_LIMITS", {"read": (60, 2), "write": (60, 2), "auth": (60, 2)})
+    monkeypatch.setattr(rate_limit, "bucket_store", rate_limit.MemoryBucketStore())
+    
+    response = client.post("/api/v1/batch/", json={"requests": [
+        {"method": "POST", "path": "/auth/login", "body": {"email": "limited@example.com", "password": "guess"}},
+        {"path": "/books/"},
+        {"path": "/books/"},
+        {"path": "/books/"},
+    ]}, headers=headers)
+    assert [result["status"] for result in response.json()["responses"]] == [400, 200, 200, 429]
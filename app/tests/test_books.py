@@ -158,4 +158,99 @@ def test_delete_book(client, db):
     assert response.status_code == status.HTTP_404_NOT_FOUND
     
     response = client.delete("/api/v1/books/999", headers=headers)
-    assert response.status_code == status.HTTP_404_NOT_FOUND 
\ No newline at end of file
+    assert response.status_code == status.HTTP_404_NOT_FOUND 
+
+def test_read_books_sparse_fields(client, db):
+    from app.schemas.user import UserCreate
+    from app.crud.crud_user import create_user
+    
+    user_data = UserCreate(email="test_fields_books@example.com", password="password123")
+    user = create_user(db, user_in=user_data)
+    
+    login_data = {"email": "test_fields_books@example.com", "password": "password123"}
+    response = client.post("/api/v1/auth/login", json=login_data)
+    token = response.json()["access_token"]
+    
+    headers = {"Authorization": f"Bearer {token}"}
+    
+    book_data = BookCreate(
+        title="Book with Description",
+        author="Author",
+        publication_year=2020,
+        isbn="1112223334",
+        quantity=2,
+        description="Очень длинное описание"
+    )
+    book = create_book(db, book=book_data)
+    
+    response = client.get("/api/v1/books/", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data[0]["title"] == "Book with Description"
+    assert "description" not in data[0]
+    
+    response = client.get("/api/v1/books/?fields=title,quantity", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == [{"id": book.id, "title": "Book with Description", "quantity": 2}]
+    
+    response = client.get(f"/api/v1/books/{book.id}", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["description"] == "Очень длинное описание"
+    
+    response = client.get(f"/api/v1/books/{book.id}?fields=description", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"id": book.id, "description": "Очень длинное описание"}
+    
+    response = client.get("/api/v1/books/?fields=title,secret", headers=headers)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_read_books_filters_and_cursor(client, db):
+    from app.schemas.user import UserCreate
+    from app.crud.crud_user import create_user
+    
+    user_data = UserCreate(email="test_filter_books@example.com", password="password123")
+    user = create_user(db, user_in=user_data)
+    
+    login_data = {"email": "test_filter_books@example.com", "password": "password123"}
+    response = client.post("/api/v1/auth/login", json=login_data)
+    token = response.json()["access_token"]
+    
+    headers = {"Authorization": f"Bearer {token}"}
+    
+    for i in range(5):
+        book_data = BookCreate(
+            title=f"Book {i}",
+            author="Tolstoy" if i % 2 == 0 else "Chekhov",
+            publication_year=1990 + i,
+            isbn=f"555000000{i}",
+            quantity=i % 3
+        )
+        create_book(db, book=book_data)
+    
+    response = client.get("/api/v1/books/?author=Tolstoy&sort=-title", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert [book["title"] for book in response.json()] == ["Book 4", "Book 2", "Book 0"]
+    
+    response = client.get("/api/v1/books/?year_from=1991&year_to=1993", headers=headers)
+    assert [book["publication_year"] for book in response.json()] == [1991, 1992, 1993]
+    
+    response = client.get("/api/v1/books/?available_only=true", headers=headers)
+    assert all(book["quantity"] > 0 for book in response.json())
+    assert len(response.json()) == 3
+    
+    titles = []
+    url = "/api/v1/books/?sort=title&limit=2&fields=title"
+    while url:
+        response = client.get(url, headers=headers)
+        assert response.status_code == status.HTTP_200_OK
+        titles.extend(book["title"] for book in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        url = f"/api/v1/books/?sort=title&limit=2&fields=title&cursor={cursor}" if cursor else None
+    assert titles == [f"Book {i}" for i in range(5)]
+    
+    response = client.get("/api/v1/books/?sort=isbn", headers=headers)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    
+    response = client.get("/api/v1/books/?sort=title&cursor=broken", headers=headers)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
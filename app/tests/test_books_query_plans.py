@@ -0,0 +1,71 @@
+from typing import List
+
+from sqlalchemy.orm import Query, Session
+
+from app.crud import crud_book
+from app.schemas.book import BOOK_LIST_DEFAULT_FIELDS
+
+
+def explain(db: Session, query: Query) -> List[str]:
+    compiled = query.statement.compile(dialect=db.bind.dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    rows = db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params)
+    return [row[3] for row in rows]
+
+
+def test_author_filter_sorted_by_title_uses_composite_index(db: Session):
+    query = crud_book.query_books(
+        db, fields=BOOK_LIST_DEFAULT_FIELDS, author="Author", sort="title"
+    ).limit(100)
+    plan = explain(db, query)
+    
+    assert any("ix_books_author_title" in step for step in plan)
+    assert not any("TEMP B-TREE" in step for step in plan)
+
+
+def test_available_only_uses_partial_index(db: Session):
+    query = crud_book.query_books(
+        db, fields=BOOK_LIST_DEFAULT_FIELDS, available_only=True, sort="title"
+    ).limit(100)
+    plan = explain(db, query)
+    
+    assert any("ix_books_available_title" in step for step in plan)
+    assert not any("TEMP B-TREE" in step for step in plan)
+    
+    query = crud_book.query_books(
+        db,
+        fields=BOOK_LIST_DEFAULT_FIELDS,
+        available_only=True,
+        sort="title",
+        after=("Title", 10),
+    ).limit(100)
+    plan = explain(db, query)
+    
+    assert any("ix_books_available_title (title>?)" in step for step in plan)
+
+
+def test_year_range_uses_index(db: Session):
+    query = crud_book.query_books(
+        db, fields=BOOK_LIST_DEFAULT_FIELDS, year_from=1990, year_to=2000
+    ).limit(100)
+    plan = explain(db, query)
+    
+    assert any("ix_books_publication_year" in step for step in plan)
+
+
+def test_cursor_by_id_uses_primary_key(db: Session):
+    query = crud_book.query_books(
+        db, fields=BOOK_LIST_DEFAULT_FIELDS, after=(10, 10)
+    ).limit(100)
+    plan = explain(db, query)
+    
+    assert any("PRIMARY KEY (rowid>?)" in step for step in plan)
+
+
+def test_branch_filter_uses_branch_index(db: Session):
+    query = crud_book.query_books(
+        db, fields=BOOK_LIST_DEFAULT_FIELDS, branch_id=1, available_only=True
+    ).limit(100)
+    plan = explain(db, query)
+    
+    assert any("ix_book_copies_branch_claim" in step for step in plan)
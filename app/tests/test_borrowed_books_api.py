@@ -210,4 +210,57 @@ def test_get_all_borrowed_books(client, db):
     response = client.get("/api/v1/borrowed-books/", headers=headers)
     assert response.status_code == status.HTTP_200_OK
     data = response.json()
-    assert len(data) >= 1 
\ No newline at end of file
+    assert len(data) >= 1 
+
+def test_archive_loans_and_reader_history(client, db):
+    from datetime import datetime, timedelta
+    from app.schemas.user import UserCreate
+    from app.crud.crud_user import create_user
+    from app.crud.crud_borrowed_book import archive_loans, get_borrowed_book, return_book
+    
+    create_user(db, user_in=UserCreate(email="test_archive@example.com", password="password123"))
+    response = client.post(
+        "/api/v1/auth/login", json={"email": "test_archive@example.com", "password": "password123"}
+    )
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    
+    book = create_book(db, book=BookCreate(title="Archived Book", author="Author", quantity=3))
+    reader = create_reader(db, reader=ReaderCreate(name="Reader", email="reader_archive@example.com"))
+    loans = [
+        borrow_book(db, borrow_data=BorrowBookCreate(book_id=book.id, reader_id=reader.id))
+        for _ in range(3)
+    ]
+    loans[1].due_date = datetime.utcnow() - timedelta(days=5)
+    db.commit()
+    for loan in loans[:2]:
+        return_book(db, db_borrow=loan)
+    year_ago = datetime.utcnow() - timedelta(days=400)
+    for loan in loans[:2]:
+        loan.borrow_date = year_ago
+        loan.due_date = year_ago + timedelta(days=14)
+        loan.return_date = year_ago + timedelta(days=7)
+    db.commit()
+    ids = [loan.id for loan in loans]
+    
+    before = datetime.utcnow() - timedelta(days=365)
+    assert archive_loans(db, before=before, batch_size=10) == (1, None)
+    assert archive_loans(db, before=before, batch_size=10) == (0, None)
+    # Выдача со штрафом и активная выдача остаются в borrowed_books
+    assert get_borrowed_book(db, borrow_id=ids[0]) is None
+    assert get_borrowed_book(db, borrow_id=ids[1]) is not None
+    
+    response = client.get(f"/api/v1/borrowed-books/reader/{reader.id}/history", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert [loan["id"] for loan in response.json()] == [ids[2], ids[1], ids[0]]
+    assert response.json()[2]["return_date"] is not None
+    
+    # Лента явно сообщает о переносе, а пересборка агрегатов учитывает архив
+    from app.crud.crud_analytics import backfill_circulation
+    from app.models.change import Change
+    from app.models.circulation import BookCirculationDaily
+    
+    archived = db.query(Change).filter(Change.entity == "borrowed_book", Change.entity_id == ids[0])
+    assert [change.operation for change in archived.order_by(Change.id)][-1] == "archive"
+    assert backfill_circulation(db, before=before.date() + timedelta(days=300)) == 3
+    rollup = db.query(BookCirculationDaily).filter(BookCirculationDaily.day == year_ago.date()).one()
+    assert (rollup.borrows, rollup.book_id) == (2, book.id)
@@ -0,0 +1,138 @@
+from datetime import datetime, timedelta
+
+from fastapi import status
+
+from app.crud import crud_book, crud_branch, crud_reader
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+from app.database.base import Base, branch_sessions
+from app.schemas.book import BookCreate
+from app.schemas.branch import BranchCreate
+from app.schemas.reader import ReaderCreate
+
+
+def test_branch_scoped_inventory_and_loans(client, db):
+    from app.schemas.user import UserCreate
+    from app.crud.crud_user import create_user
+    
+    create_user(db, user_in=UserCreate(email="test_branches@example.com", password="password123"))
+    response = client.post(
+        "/api/v1/auth/login", json={"email": "test_branches@example.com", "password": "password123"}
+    )
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    
+    response = client.post("/api/v1/branches/", json={"code": "north", "name": "Северный"}, headers=headers)
+    assert response.status_code == status.HTTP_201_CREATED
+    north = response.json()["id"]
+    response = client.post("/api/v1/branches/", json={"code": "north", "name": "Другой"}, headers=headers)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    south = crud_branch.create_branch(db, branch=BranchCreate(code="south", name="Южный")).id
+    
+    shared = crud_book.create_book(db, book=BookCreate(title="Shared", author="Author", quantity=1, branch_id=north))
+    client.post("/api/v1/copies/", json={"book_id": shared.id, "barcode": "S-1", "branch_id": south}, headers=headers)
+    north_only = crud_book.create_book(db, book=BookCreate(title="North only", author="Author", quantity=1, branch_id=north))
+    readers = [
+        crud_reader.create_reader(db, reader=ReaderCreate(name=f"Reader {i}", email=f"branch{i}@example.com"))
+        for i in range(2)
+    ]
+    
+    response = client.get(f"/api/v1/books/?branch_id={south}", headers=headers)
+    assert [book["id"] for book in response.json()] == [shared.id]
+    response = client.get(f"/api/v1/books/?branch_id={north}&available_only=true", headers=headers)
+    assert [book["id"] for book in response.json()] == [shared.id, north_only.id]
+    
+    borrow_data = {"book_id": shared.id, "reader_id": readers[0].id, "branch_id": south}
+    response = client.post("/api/v1/borrowed-books/borrow", json=borrow_data, headers=headers)
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.json()["branch_id"] == south
+    
+    borrow_data = {"book_id": shared.id, "reader_id": readers[1].id, "branch_id": south}
+    response = client.post("/api/v1/borrowed-books/borrow", json=borrow_data, headers=headers)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["detail"] == "Нет доступных экземпляров книги в этом филиале"
+    
+    response = client.get(f"/api/v1/books/?branch_id={south}&available_only=true", headers=headers)
+    assert response.json() == []
+    response = client.get(f"/api/v1/borrowed-books/?branch_id={south}", headers=headers)
+    assert [loan["reader_id"] for loan in response.json()] == [readers[0].id]
+    response = client.get(f"/api/v1/borrowed-books/?branch_id={north}", headers=headers)
+    assert response.json() == []
+
+
+def test_branch_database_only_for_inventory_and_loans(client, db, tmp_path, monkeypatch):
+    from app.crud.crud_user import create_user
+    from app.models.book import Book
+    from app.models.book_copy import BookCopy
+    from app.models.borrowed_book import BorrowedBook
+    from app.models.branch import Branch
+    from app.crud.crud_analytics import backfill_circulation
+    from app.models.circulation import BookCirculationDaily
+    from app.models.reader import Reader
+    from app.models.revoked_token import RevokedToken
+    from app.schemas.user import UserCreate
+    from app.services.catalog import catalog_snapshot
+    
+    shard_engine = create_engine(f"sqlite:///{tmp_path / 'branch.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=shard_engine)
+    monkeypatch.setitem(branch_sessions, 99, sessionmaker(autocommit=False, autoflush=False, bind=shard_engine))
+    shard = branch_sessions[99]()
+    shard.add_all([
+        Branch(id=1, code="remote", name="Удаленный"),
+        Book(id=1, title="Shard book", author="Author", quantity=2),
+        Reader(id=1, name="Shard reader", email="shard@example.com"),
+    ])
+    shard.flush()
+    shard.add_all([
+        BookCopy(book_id=1, branch_id=1, barcode="R-1", status="available"),
+        BookCopy(book_id=1, branch_id=1, barcode="R-2", status="available"),
+    ])
+    shard.commit()
+    
+    main_book = crud_book.create_book(db, book=BookCreate(title="Main book", author="Author", quantity=1))
+    catalog_snapshot.load(db)
+    create_user(db, user_in=UserCreate(email="shard_user@example.com", password="password123"))
+    branch_header = {"X-Branch-Id": "99"}
+    response = client.post(
+        "/api/v1/auth/login", json={"email": "shard_user@example.com", "password": "password123"}, headers=branch_header
+    )
+    assert response.status_code == status.HTTP_200_OK
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}", **branch_header}
+    
+    # Выдача и экземпляры идут в БД филиала
+    response = client.post("/api/v1/borrowed-books/borrow", json={"book_id": 1, "reader_id": 1}, headers=headers)
+    assert response.status_code == status.HTTP_201_CREATED
+    assert shard.query(BorrowedBook).count() == 1
+    assert db.query(BorrowedBook).count() == 0
+    response = client.get("/api/v1/copies/R-1", headers=headers)
+    assert response.json()["status"] == "borrowed"
+    
+    # Агрегаты и лента изменений пишутся в основную БД с пометкой филиала
+    assert db.query(BookCirculationDaily.borrows).filter(BookCirculationDaily.book_id == 1).scalar() == 1
+    response = client.get("/api/v1/changes/?entities=borrowed_book", headers=headers)
+    entry = response.json()["changes"][-1]
+    assert (entry["branch_id"], entry["entity_id"], entry["data"]["copy_id"]) == (99, 1, 1)
+    
+    # Лимит в 3 книги считается по всем БД
+    db.add(Reader(id=1, name="Shard reader", email="shard@example.com"))
+    db.add_all([BorrowedBook(book_id=main_book.id, reader_id=1, borrow_date=datetime.utcnow()) for _ in range(2)])
+    db.commit()
+    response = client.post("/api/v1/borrowed-books/borrow", json={"book_id": 1, "reader_id": 1}, headers=headers)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "максимальное" in response.json()["detail"]
+    
+    # Пересборка агрегатов учитывает выдачи из БД филиала
+    tomorrow = datetime.utcnow().date() + timedelta(days=1)
+    assert backfill_circulation(db, before=tomorrow, branch_dbs=[shard]) == 3
+    assert db.query(func.sum(BookCirculationDaily.borrows)).scalar() == 3
+    
+    # Каталог и его снимок остаются на основной БД
+    response = client.get("/api/v1/catalog/books", headers=branch_header)
+    assert response.json() == [{**response.json()[0], "id": main_book.id, "title": "Main book", "available": True}]
+    
+    response = client.post("/api/v1/auth/logout", headers=headers)
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    assert db.query(RevokedToken).count() == 1
+    assert shard.query(RevokedToken).count() == 0
+    assert client.get("/api/v1/borrowed-books/", headers=headers).status_code == status.HTTP_401_UNAUTHORIZED
+    shard.close()
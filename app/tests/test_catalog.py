@@ -0,0 +1,80 @@
+from fastapi import status
+
+from app.crud import crud_book, crud_reader, crud_borrowed_book
+from app.crud.crud_change import record_change
+from app.models.book import Book
+from app.schemas.book import BookCreate
+from app.schemas.reader import ReaderCreate
+from app.schemas.borrowed_book import BorrowBookCreate
+from app.services.catalog import catalog_snapshot
+
+
+def test_public_catalog_without_auth(client, db):
+    book = crud_book.create_book(db, book=BookCreate(
+        title="Public Book",
+        author="Author",
+        publication_year=2020,
+        isbn="4445556667",
+        quantity=1,
+        description="Не попадает в каталог"
+    ))
+    
+    response = client.get("/api/v1/catalog/books")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == [{
+        "id": book.id,
+        "title": "Public Book",
+        "author": "Author",
+        "publication_year": 2020,
+        "isbn": "4445556667",
+        "available": True,
+    }]
+    assert "public" in response.headers["Cache-Control"]
+    assert "stale-while-revalidate" in response.headers["Cache-Control"]
+    etag = response.headers["ETag"]
+    
+    response = client.get("/api/v1/catalog/books", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    
+    # ETag зависит только от содержимого: свежий снимок (другой воркер) дает тот же
+    catalog_snapshot.load(db)
+    response = client.get("/api/v1/catalog/books", headers={"If-None-Match": f"W/{etag}"})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    
+    response = client.get(f"/api/v1/catalog/books/{book.id}")
+    assert response.status_code == status.HTTP_200_OK
+    book_etag = response.headers["ETag"]
+    
+    reader = crud_reader.create_reader(db, reader=ReaderCreate(name="Reader", email="reader_catalog@example.com"))
+    crud_borrowed_book.borrow_book(db, borrow_data=BorrowBookCreate(book_id=book.id, reader_id=reader.id))
+    
+    response = client.get(f"/api/v1/catalog/books/{book.id}", headers={"If-None-Match": book_etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["available"] is False
+    
+    response = client.get("/api/v1/catalog/books?available_only=true")
+    assert response.json() == []
+    
+    response = client.get("/api/v1/catalog/books/999")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_catalog_snapshot_incremental_refresh(client, db):
+    removed = crud_book.create_book(db, book=BookCreate(title="Removed elsewhere", author="Author"))
+    catalog_snapshot.load(db)
+    
+    added = Book(title="Written by another worker", author="Author", quantity=2)
+    db.add(added)
+    db.flush()
+    record_change(db, "book", added.id)
+    db.delete(removed)
+    record_change(db, "book", removed.id, "delete")
+    db.commit()
+    
+    refresh_seconds = catalog_snapshot.refresh_seconds
+    catalog_snapshot.refresh_seconds = 0
+    try:
+        response = client.get("/api/v1/catalog/books")
+    finally:
+        catalog_snapshot.refresh_seconds = refresh_seconds
+    assert [book["title"] for book in response.json()] == ["Written by another worker"]
@@ -0,0 +1,129 @@
+from fastapi import status
+
+from app.crud import crud_book, crud_reader, crud_borrowed_book
+from app.models.change import Change
+from app.services.change_feed import change_watermark
+from app.schemas.book import BookCreate, BookUpdate
+from app.schemas.reader import ReaderCreate
+from app.schemas.borrowed_book import BorrowBookCreate
+
+
+def test_change_feed(client, db):
+    from app.schemas.user import UserCreate
+    from app.crud.crud_user import create_user
+    
+    user_data = UserCreate(email="test_changes@example.com", password="password123")
+    user = create_user(db, user_in=user_data)
+    
+    login_data = {"email": "test_changes@example.com", "password": "password123"}
+    response = client.post("/api/v1/auth/login", json=login_data)
+    token = response.json()["access_token"]
+    
+    headers = {"Authorization": f"Bearer {token}"}
+    
+    book = crud_book.create_book(db, book=BookCreate(title="Book", author="Author", quantity=1))
+    reader = crud_reader.create_reader(db, reader=ReaderCreate(name="Reader", email="reader_changes@example.com"))
+    borrow = crud_borrowed_book.borrow_book(db, borrow_data=BorrowBookCreate(book_id=book.id, reader_id=reader.id))
+    crud_borrowed_book.return_book(db, db_borrow=borrow)
+    
+    response = client.get("/api/v1/changes/?limit=3", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert [(c["entity"], c["entity_id"]) for c in data["changes"]] == [
+        ("book", book.id), ("reader", reader.id), ("borrowed_book", borrow.id)
+    ]
+    assert data["changes"][0]["data"]["quantity"] == 1
+    assert data["changes"][2]["data"]["return_date"] is not None
+    assert data["has_more"] is True
+    
+    since = data["next_since"]
+    response = client.get(f"/api/v1/changes/?since={since}", headers=headers)
+    data = response.json()
+    assert [c["entity"] for c in data["changes"]] == ["book", "borrowed_book", "book"]
+    assert data["has_more"] is False
+    
+    since = data["next_since"]
+    response = client.get(f"/api/v1/changes/?since={since}", headers=headers)
+    assert response.json() == {"changes": [], "next_since": since, "has_more": False}
+    
+    crud_book.update_book(db, db_book=book, book_in=BookUpdate(title="Renamed"))
+    other = crud_reader.create_reader(db, reader=ReaderCreate(name="Other", email="other_changes@example.com"))
+    crud_reader.delete_reader(db, db_reader=other)
+    
+    response = client.get(f"/api/v1/changes/?since={since}&entities=reader", headers=headers)
+    data = response.json()
+    assert [(c["entity_id"], c["operation"]) for c in data["changes"]] == [
+        (other.id, "upsert"), (other.id, "delete")
+    ]
+    assert all(c["data"] is None for c in data["changes"])
+    
+    response = client.get(f"/api/v1/changes/?since={since}&entities=book", headers=headers)
+    data = response.json()
+    assert [c["data"]["title"] for c in data["changes"]] == ["Renamed"]
+    
+    response = client.get("/api/v1/changes/?entities=users", headers=headers)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_change_feed_waits_for_uncommitted_ids(client, db):
+    from app.schemas.user import UserCreate
+    from app.crud.crud_user import create_user
+    
+    create_user(db, user_in=UserCreate(email="gaps@example.com", password="password123"))
+    response = client.post("/api/v1/auth/login", json={"email": "gaps@example.com", "password": "password123"})
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    change_watermark.reset()
+    
+    # id 2 выдан транзакции, которая еще не зафиксирована
+    db.add_all([Change(id=1, entity="book", entity_id=1, operation="delete"),
+                Change(id=3, entity="book", entity_id=3, operation="delete")])
+    db.commit()
+    data = client.get("/api/v1/changes/", headers=headers).json()
+    assert [c["seq"] for c in data["changes"]] == [1]
+    assert data["next_since"] == 1
+    
+    db.add(Change(id=2, entity="book", entity_id=2, operation="delete"))
+    db.commit()
+    data = client.get("/api/v1/changes/?since=1", headers=headers).json()
+    assert [c["seq"] for c in data["changes"]] == [2, 3]
+    
+    # Пропуск, не заполнившийся за CHANGES_GAP_SECONDS, - откаченная транзакция
+    db.add(Change(id=5, entity="book", entity_id=5, operation="delete"))
+    db.commit()
+    assert client.get("/api/v1/changes/?since=3", headers=headers).json()["changes"] == []
+    skipped = change_watermark.skipped
+    gap_seconds = change_watermark.gap_seconds
+    change_watermark.gap_seconds = 0
+    try:
+        data = client.get("/api/v1/changes/?since=3", headers=headers).json()
+    finally:
+        change_watermark.gap_seconds = gap_seconds
+        change_watermark.reset()
+    assert [c["seq"] for c in data["changes"]] == [5]
+    assert change_watermark.skipped == skipped + 1
+    metrics = client.get("/api/v1/metrics/", headers=headers).json()
+    assert metrics["changes"]["skipped"] == skipped + 1
+
+
+def test_change_watermark_checks_open_transactions(db, monkeypatch):
+    from app.services import change_feed
+    
+    # Как в PostgreSQL: время БД и начало самой старой открытой транзакции
+    horizon = {"now": 100.0, "oldest": 50.0}
+    monkeypatch.setattr(
+        change_feed, "get_transaction_horizon", lambda db: (horizon["now"], horizon["oldest"])
+    )
+    watermark = change_feed.ChangeWatermark(gap_seconds=3600)
+    db.add_all([Change(id=1, entity="book", entity_id=1, operation="delete"),
+                Change(id=3, entity="book", entity_id=3, operation="delete")])
+    db.commit()
+    assert watermark.advance(db) == 1
+    
+    # Транзакция, начатая до того, как пропуск заметили, еще открыта
+    horizon.update(now=110.0, oldest=90.0)
+    assert watermark.advance(db) == 1
+    
+    # Все такие транзакции завершились, а id 2 так и не появился
+    horizon.update(now=120.0, oldest=105.0)
+    assert watermark.advance(db) == 3
+    assert watermark.skipped == 0
@@ -0,0 +1,74 @@
+from collections import Counter
+
+from fastapi import status
+
+from app.crud import crud_book, crud_branch, crud_reader, crud_borrowed_book, crud_copy, crud_hold
+from app.schemas.book import BookCreate, BookUpdate
+from app.schemas.branch import BranchCreate
+from app.schemas.hold import HoldCreate
+from app.schemas.reader import ReaderCreate
+from app.schemas.borrowed_book import BorrowBookCreate
+
+
+def _statuses(db, book_id):
+    return Counter(copy.status for copy in crud_copy.get_copies_by_book(db, book_id=book_id))
+
+
+def test_copies_follow_quantity(db):
+    book = crud_book.create_book(db, book=BookCreate(title="Book", author="Author", quantity=2))
+    readers = [
+        crud_reader.create_reader(db, reader=ReaderCreate(name=f"Reader {i}", email=f"copy{i}@example.com"))
+        for i in range(2)
+    ]
+    assert _statuses(db, book.id) == {"available": 2}
+    
+    borrow = crud_borrowed_book.borrow_book(db, borrow_data=BorrowBookCreate(book_id=book.id, reader_id=readers[0].id))
+    assert crud_copy.get_copy(db, copy_id=borrow.copy_id).status == "borrowed"
+    other = crud_borrowed_book.borrow_book(db, borrow_data=BorrowBookCreate(book_id=book.id, reader_id=readers[1].id))
+    assert other.copy_id != borrow.copy_id
+    db.refresh(book)
+    assert book.quantity == 0
+    
+    crud_hold.create_hold(db, hold_in=HoldCreate(book_id=book.id, reader_id=readers[0].id))
+    crud_borrowed_book.return_book(db, db_borrow=other)
+    db.refresh(book)
+    assert book.quantity == 0
+    assert _statuses(db, book.id) == {"borrowed": 1, "on_hold": 1}
+    
+    crud_book.update_book(db, db_book=book, book_in=BookUpdate(quantity=3))
+    assert _statuses(db, book.id) == {"borrowed": 1, "on_hold": 1, "available": 3}
+    crud_book.update_book(db, db_book=book, book_in=BookUpdate(quantity=1))
+    assert _statuses(db, book.id) == {"borrowed": 1, "on_hold": 1, "available": 1, "withdrawn": 2}
+    assert book.quantity == 1
+
+
+def test_copy_barcode_api(client, db):
+    from app.schemas.user import UserCreate
+    from app.crud.crud_user import create_user
+    
+    create_user(db, user_in=UserCreate(email="test_copies@example.com", password="password123"))
+    response = client.post(
+        "/api/v1/auth/login", json={"email": "test_copies@example.com", "password": "password123"}
+    )
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    
+    book = crud_book.create_book(db, book=BookCreate(title="Book", author="Author", quantity=0))
+    branch = crud_branch.create_branch(db, branch=BranchCreate(code="north", name="Северный филиал"))
+    copy_data = {"book_id": book.id, "barcode": "LIB-000123", "branch_id": branch.id}
+    response = client.post("/api/v1/copies/", json=copy_data, headers=headers)
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.json()["status"] == "available"
+    
+    response = client.post("/api/v1/copies/", json=copy_data, headers=headers)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    
+    response = client.get("/api/v1/copies/LIB-000123", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["book_id"] == book.id
+    assert response.json()["branch_id"] == branch.id
+    
+    response = client.get(f"/api/v1/books/{book.id}", headers=headers)
+    assert response.json()["quantity"] == 1
+    
+    response = client.get("/api/v1/copies/UNKNOWN", headers=headers)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
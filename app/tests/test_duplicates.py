@@ -0,0 +1,111 @@
+import io
+
+from fastapi import status
+
+from app.crud import crud_book
+from app.schemas.book import BookCreate
+from app.services.duplicates import DuplicateIndex
+
+
+def test_duplicate_index():
+    index = DuplicateIndex()
+    index.load([
+        (1, "Война и мир", "Лев Толстой"),
+        (2, "Война и мир.", "Толстой Л. Н."),
+        (3, "Анна Каренина", "Лев Толстой"),
+        (4, "Война и мир", "Другой Автор"),
+        (5, "Собрание сочинений. Том 1", "Пушкин"),
+        (6, "Собрание сочинений. Том 2", "Пушкин"),
+        (7, "Мастер и Маргарита", "Михаил Булгаков"),
+    ])
+    
+    assert [pair[:2] for pair in index.pairs()] == [(1, 2)]
+    assert [book_id for book_id, _ in index.find("ВОЙНА И МИР", "толстой")] == [1, 2]
+    assert [book_id for book_id, _ in index.find("Мастер и Маргарита: роман", "Булгаков")] == [7]
+    assert index.find("Война и мир", "Толстой", exclude=1)[0][0] == 2
+    
+    index.remove_book(2)
+    assert index.pairs() == []
+    index.add_book(3, "Война и мир", "Лев Толстой")
+    assert [pair[:2] for pair in index.pairs()] == [(1, 3)]
+
+
+def test_create_book_rejects_duplicates(client, db):
+    from app.schemas.user import UserCreate
+    from app.crud.crud_user import create_user
+    from app.jobs.audit_duplicates import run as audit_duplicates
+    
+    user_data = UserCreate(email="test_duplicates@example.com", password="password123")
+    user = create_user(db, user_in=user_data)
+    
+    login_data = {"email": "test_duplicates@example.com", "password": "password123"}
+    response = client.post("/api/v1/auth/login", json=login_data)
+    token = response.json()["access_token"]
+    
+    headers = {"Authorization": f"Bearer {token}"}
+    
+    book = crud_book.create_book(db, book=BookCreate(title="Мастер и Маргарита", author="Михаил Булгаков", quantity=1))
+    
+    book_data = {"title": "Мастер и Маргарита", "author": "М. Булгаков", "quantity": 2}
+    response = client.post("/api/v1/books/?check_duplicates=true", json=book_data, headers=headers)
+    assert response.status_code == status.HTTP_409_CONFLICT
+    assert f"id: {book.id}" in response.json()["detail"]
+    
+    # Без check_duplicates книга создается, как и раньше
+    response = client.post("/api/v1/books/", json=book_data, headers=headers)
+    assert response.status_code == status.HTTP_201_CREATED
+    copy_id = response.json()["id"]
+    
+    batch = [
+        {"title": "Мастер и маргарита", "author": "Булгаков"},
+        {"title": "Белая гвардия", "author": "Булгаков М. А."},
+        {"title": "Белая гвардия", "author": "Михаил Булгаков"},
+    ]
+    response = client.post("/api/v1/books/duplicates", json=batch, headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    checks = response.json()
+    assert [d["id"] for d in checks[0]["duplicates"]] == [book.id, copy_id]
+    assert [c["batch_duplicates"] for c in checks] == [[], [2], [1]]
+    assert checks[1]["duplicates"] == []
+    
+    output = io.StringIO()
+    assert audit_duplicates(output) == 1
+    assert output.getvalue().splitlines()[1].startswith(f"{book.id},Мастер и Маргарита")
+
+
+
+def test_duplicate_index_follows_other_workers(client, db, monkeypatch):
+    from app.crud.crud_change import record_change
+    from app.models.book import Book
+    from app.schemas.user import UserCreate
+    from app.crud.crud_user import create_user
+    from app.services.duplicates import duplicate_changes
+    
+    create_user(db, user_in=UserCreate(email="worker_duplicates@example.com", password="password123"))
+    response = client.post(
+        "/api/v1/auth/login", json={"email": "worker_duplicates@example.com", "password": "password123"}
+    )
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    monkeypatch.setattr(duplicate_changes, "refresh_seconds", 0)
+    
+    # Книгу создал другой воркер: в индекс этого процесса она не попала
+    book = Book(title="Белая гвардия", author="Михаил Булгаков", quantity=1)
+    db.add(book)
+    db.flush()
+    record_change(db, "book", book.id)
+    db.commit()
+    
+    response = client.post("/api/v1/books/?check_duplicates=true", json={
+        "title": "Белая гвардия", "author": "Булгаков М. А.", "quantity": 1
+    }, headers=headers)
+    assert response.status_code == status.HTTP_409_CONFLICT
+    assert f"id: {book.id}" in response.json()["detail"]
+    
+    book.title = "Дни Турбиных"
+    record_change(db, "book", book.id)
+    db.commit()
+    
+    response = client.post(
+        "/api/v1/books/duplicates", json=[{"title": "Белая гвардия", "author": "Булгаков"}], headers=headers
+    )
+    assert response.json()[0]["duplicates"] == []
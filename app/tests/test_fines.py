@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+
+from fastapi import status
+
+from app.core.config import settings
+from app.crud import crud_book, crud_reader, crud_borrowed_book, crud_fine
+from app.schemas.book import BookCreate
+from app.schemas.reader import ReaderCreate
+from app.schemas.borrowed_book import BorrowBookCreate
+
+
+def test_accrue_fines(db):
+    book = crud_book.create_book(db, book=BookCreate(title="Book", author="Author", quantity=5))
+    reader = crud_reader.create_reader(db, reader=ReaderCreate(name="Reader", email="fines@example.com"))
+    loans = [
+        crud_borrowed_book.borrow_book(db, borrow_data=BorrowBookCreate(book_id=book.id, reader_id=reader.id))
+        for _ in range(3)
+    ]
+    now = datetime.utcnow()
+    loans[0].due_date = now - timedelta(days=5, hours=1)
+    loans[1].due_date = now - timedelta(hours=12)
+    db.commit()
+    
+    assert crud_fine.accrue_fines(db, now=now) == {"inserted": 1, "updated": 0}
+    fines = crud_fine.get_fines_by_reader(db, reader_id=reader.id)
+    assert [(f.borrowed_book_id, f.days_overdue, f.amount) for f in fines] == [
+        (loans[0].id, 5, 5 * settings.FINE_DAILY_RATE)
+    ]
+    assert crud_fine.accrue_fines(db, now=now) == {"inserted": 0, "updated": 0}
+    
+    later = now + timedelta(days=1)
+    assert crud_fine.accrue_fines(db, now=later) == {"inserted": 1, "updated": 1}
+    fines = crud_fine.get_fines_by_reader(db, reader_id=reader.id)
+    db.refresh(fines[0])
+    assert [(f.borrowed_book_id, f.days_overdue) for f in fines] == [
+        (loans[0].id, 6), (loans[1].id, 1)
+    ]
+    assert crud_fine.accrue_fines(db, now=later) == {"inserted": 0, "updated": 0}
+
+
+def test_fines_endpoints(client, db):
+    from app.schemas.user import UserCreate
+    from app.crud.crud_user import create_user
+    
+    user_data = UserCreate(email="test_fines@example.com", password="password123")
+    user = create_user(db, user_in=user_data)
+    
+    login_data = {"email": "test_fines@example.com", "password": "password123"}
+    response = client.post("/api/v1/auth/login", json=login_data)
+    token = response.json()["access_token"]
+    
+    headers = {"Authorization": f"Bearer {token}"}
+    
+    book = crud_book.create_book(db, book=BookCreate(title="Book", author="Author", quantity=2))
+    reader = crud_reader.create_reader(db, reader=ReaderCreate(name="Reader", email="fines_api@example.com"))
+    borrow = crud_borrowed_book.borrow_book(db, borrow_data=BorrowBookCreate(book_id=book.id, reader_id=reader.id))
+    on_time = crud_borrowed_book.borrow_book(db, borrow_data=BorrowBookCreate(book_id=book.id, reader_id=reader.id))
+    borrow.due_date = datetime.utcnow() - timedelta(days=3, hours=1)
+    db.commit()
+    
+    response = client.post("/api/v1/borrowed-books/return", json={"borrow_id": borrow.id}, headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    crud_borrowed_book.return_book(db, db_borrow=on_time)
+    
+    response = client.get(f"/api/v1/fines/reader/{reader.id}", headers=headers)
+    fines = response.json()
+    assert [(f["borrowed_book_id"], f["days_overdue"], f["paid"]) for f in fines] == [
+        (borrow.id, 3, False)
+    ]
+    
+    response = client.post(f"/api/v1/fines/{fines[0]['id']}/pay", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["paid"] is True
+    response = client.post(f"/api/v1/fines/{fines[0]['id']}/pay", headers=headers)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    
+    response = client.get("/api/v1/fines/report", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    report = response.json()
+    assert report["fines_count"] == 1
+    assert report["paid_amount"] == 3 * settings.FINE_DAILY_RATE
+    assert report["unpaid_amount"] == 0
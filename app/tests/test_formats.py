@@ -0,0 +1,74 @@
+import cbor2
+import msgpack
+from fastapi import FastAPI, status
+from fastapi.responses import PlainTextResponse
+from fastapi.testclient import TestClient
+
+from app.api.formats import CBOR, JSON, MSGPACK, negotiate
+from app.crud.crud_book import create_book
+from app.crud.crud_reader import create_reader
+from app.crud.crud_user import create_user
+from app.middleware.compression import CompressionMiddleware
+from app.schemas.book import BookCreate
+from app.schemas.reader import ReaderCreate
+from app.schemas.user import UserCreate
+
+
+def _auth_headers(client, db):
+    create_user(db, user_in=UserCreate(email="formats@example.com", password="password123"))
+    response = client.post("/api/v1/auth/login", json={"email": "formats@example.com", "password": "password123"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def test_negotiate_prefers_json_unless_binary_ranks_higher():
+    assert negotiate(None) == JSON
+    assert negotiate("*/*") == JSON
+    assert negotiate("application/msgpack") == MSGPACK
+    assert negotiate("application/x-msgpack, application/json;q=0.5") == MSGPACK
+    assert negotiate("application/cbor;q=0.9, application/json") == JSON
+    assert negotiate("application/cbor, application/msgpack;q=0.5") == CBOR
+
+
+def test_lists_in_binary_formats_match_json(client, db):
+    headers = _auth_headers(client, db)
+    for i in range(3):
+        create_book(db, book=BookCreate(title=f"Binary {i}", author="Author", publication_year=2000 + i, quantity=1))
+    create_reader(db, reader=ReaderCreate(name="Binary reader", email="binary@example.com"))
+    
+    expected = client.get("/api/v1/books/?fields=id,title,publication_year", headers=headers).json()
+    response = client.get(
+        "/api/v1/books/?fields=id,title,publication_year", headers={**headers, "Accept": "application/msgpack"}
+    )
+    assert response.headers["content-type"] == MSGPACK
+    assert "Accept" in response.headers["vary"]
+    assert msgpack.unpackb(response.content) == expected
+    
+    response = client.get("/api/v1/books/?fields=id,title,publication_year", headers={**headers, "Accept": CBOR})
+    assert cbor2.loads(response.content) == expected
+    
+    expected = client.get("/api/v1/readers/", headers=headers).json()
+    response = client.get("/api/v1/readers/", headers={**headers, "Accept": CBOR})
+    assert cbor2.loads(response.content) == expected
+
+
+def test_compression_respects_size_and_accept_encoding():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+    
+    @app.get("/text/{size}")
+    def text(size: int):
+        return PlainTextResponse("a" * size)
+    
+    client = TestClient(app)
+    response = client.get("/text/50", headers={"Accept-Encoding": "gzip, br"})
+    assert "content-encoding" not in response.headers
+    
+    response = client.get("/text/5000", headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["content-encoding"] == "br"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert int(response.headers["content-length"]) < 5000
+    assert response.text == "a" * 5000
+    
+    response = client.get("/text/5000", headers={"Accept-Encoding": "gzip, br;q=0"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.text == "a" * 5000
@@ -0,0 +1,133 @@
+from datetime import datetime, timedelta
+
+from fastapi import status
+
+from app.crud import crud_book, crud_reader, crud_borrowed_book, crud_hold
+from app.schemas.book import BookCreate
+from app.schemas.reader import ReaderCreate
+from app.schemas.borrowed_book import BorrowBookCreate
+
+
+def test_hold_queue(client, db):
+    from app.schemas.user import UserCreate
+    from app.crud.crud_user import create_user
+    
+    user_data = UserCreate(email="test_holds@example.com", password="password123")
+    user = create_user(db, user_in=user_data)
+    
+    login_data = {"email": "test_holds@example.com", "password": "password123"}
+    response = client.post("/api/v1/auth/login", json=login_data)
+    token = response.json()["access_token"]
+    
+    headers = {"Authorization": f"Bearer {token}"}
+    
+    book = crud_book.create_book(db, book=BookCreate(title="Book", author="Author", quantity=1))
+    readers = [
+        crud_reader.create_reader(db, reader=ReaderCreate(name=f"Reader {i}", email=f"hold{i}@example.com"))
+        for i in range(3)
+    ]
+    
+    response = client.post("/api/v1/holds/", json={"book_id": book.id, "reader_id": readers[1].id}, headers=headers)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    
+    borrow = crud_borrowed_book.borrow_book(db, borrow_data=BorrowBookCreate(book_id=book.id, reader_id=readers[0].id))
+    
+    for reader in readers[1:]:
+        response = client.post("/api/v1/holds/", json={"book_id": book.id, "reader_id": reader.id}, headers=headers)
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.json()["status"] == "waiting"
+    
+    response = client.post("/api/v1/holds/", json={"book_id": book.id, "reader_id": readers[1].id}, headers=headers)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    
+    crud_borrowed_book.return_book(db, db_borrow=borrow)
+    db.refresh(book)
+    assert book.quantity == 0
+    
+    response = client.get(f"/api/v1/holds/book/{book.id}", headers=headers)
+    queue = response.json()
+    assert [(h["reader_id"], h["status"]) for h in queue] == [
+        (readers[1].id, "ready"), (readers[2].id, "waiting")
+    ]
+    
+    # Экземпляр зарезервирован: другим читателям выдать нельзя
+    borrow_data = {"book_id": book.id, "reader_id": readers[0].id}
+    response = client.post("/api/v1/borrowed-books/borrow", json=borrow_data, headers=headers)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    
+    # Бронь не забрали вовремя - экземпляр уходит следующему в очереди
+    expired = crud_hold.expire_holds(db, now=datetime.utcnow() + timedelta(days=4))
+    assert expired == 1
+    queue = crud_hold.get_book_queue(db, book_id=book.id)
+    assert [(h.reader_id, h.status) for h in queue] == [(readers[2].id, "ready")]
+    
+    borrow_data = {"book_id": book.id, "reader_id": readers[2].id}
+    response = client.post("/api/v1/borrowed-books/borrow", json=borrow_data, headers=headers)
+    assert response.status_code == status.HTTP_201_CREATED
+    db.refresh(book)
+    assert book.quantity == 0
+    assert crud_hold.get_book_queue(db, book_id=book.id) == []
+
+
+def test_cancel_hold_uses_current_quantity(db):
+    from app.models.book import Book
+    from app.schemas.hold import HoldCreate
+    from app.tests.conftest import TestingSessionLocal
+    
+    book = crud_book.create_book(db, book=BookCreate(title="Book", author="Author", quantity=1))
+    readers = [
+        crud_reader.create_reader(db, reader=ReaderCreate(name=f"Reader {i}", email=f"cancel{i}@example.com"))
+        for i in range(2)
+    ]
+    borrow = crud_borrowed_book.borrow_book(db, borrow_data=BorrowBookCreate(book_id=book.id, reader_id=readers[0].id))
+    hold = crud_hold.create_hold(db, hold_in=HoldCreate(book_id=book.id, reader_id=readers[1].id))
+    crud_borrowed_book.return_book(db, db_borrow=borrow)
+    db.refresh(hold)
+    assert hold.status == "ready"
+    assert book.quantity == 0
+    
+    # Другой воркер успел пополнить фонд, пока у нас в сессии старое значение
+    other = TestingSessionLocal()
+    try:
+        other.query(Book).filter(Book.id == book.id).update({Book.quantity: Book.quantity + 3})
+        other.commit()
+    finally:
+        other.close()
+    
+    crud_hold.cancel_hold(db, db_hold=hold)
+    db.refresh(book)
+    assert book.quantity == 4
+
+
+def test_cancel_race_and_book_delete_with_holds(client, db):
+    from app.models.hold import Hold
+    from app.schemas.hold import HoldCreate
+    from app.schemas.user import UserCreate
+    from app.crud.crud_user import create_user
+    from app.tests.conftest import TestingSessionLocal
+    
+    create_user(db, user_in=UserCreate(email="hold_race@example.com", password="password123"))
+    response = client.post("/api/v1/auth/login", json={"email": "hold_race@example.com", "password": "password123"})
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    
+    book = crud_book.create_book(db, book=BookCreate(title="Book", author="Author", quantity=0))
+    reader = crud_reader.create_reader(db, reader=ReaderCreate(name="Reader", email="hold_race@example.com"))
+    hold = crud_hold.create_hold(db, hold_in=HoldCreate(book_id=book.id, reader_id=reader.id))
+    assert hold.status == "waiting"
+    
+    response = client.delete(f"/api/v1/books/{book.id}", headers=headers)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    
+    # Бронь отменили параллельно, а в сессии роутера она еще активна
+    other = TestingSessionLocal()
+    try:
+        other.query(Hold).filter(Hold.id == hold.id).update({Hold.status: "cancelled"})
+        other.commit()
+    finally:
+        other.close()
+    response = client.post(f"/api/v1/holds/{hold.id}/cancel", headers=headers)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    
+    response = client.delete(f"/api/v1/books/{book.id}", headers=headers)
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    assert db.query(Hold).count() == 0
@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+
+from fastapi import status
+
+from app.crud.crud_book import create_book
+from app.crud.crud_idempotency import claim_idempotency_key, purge_expired_idempotency_keys
+from app.crud.crud_reader import create_reader
+from app.crud.crud_user import create_user
+from app.models.borrowed_book import BorrowedBook
+from app.models.idempotency_key import IdempotencyKey
+from app.schemas.book import BookCreate
+from app.schemas.reader import ReaderCreate
+from app.schemas.user import UserCreate
+
+
+def test_idempotent_borrow_and_return(client, db):
+    create_user(db, user_in=UserCreate(email="kiosk@example.com", password="password123"))
+    response = client.post("/api/v1/auth/login", json={"email": "kiosk@example.com", "password": "password123"})
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    book = create_book(db, book=BookCreate(title="Retry", author="Author", quantity=2))
+    reader = create_reader(db, reader=ReaderCreate(name="Reader", email="retry@example.com"))
+    borrow_data = {"book_id": book.id, "reader_id": reader.id}
+    
+    first = client.post(
+        "/api/v1/borrowed-books/borrow", json=borrow_data, headers={**headers, "Idempotency-Key": "borrow-1"}
+    )
+    assert first.status_code == status.HTTP_201_CREATED
+    replay = client.post(
+        "/api/v1/borrowed-books/borrow", json=borrow_data, headers={**headers, "Idempotency-Key": "borrow-1"}
+    )
+    assert replay.status_code == status.HTTP_201_CREATED
+    assert replay.json() == first.json()
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert db.query(BorrowedBook).count() == 1
+    
+    response = client.post(
+        "/api/v1/borrowed-books/borrow",
+        json={**borrow_data, "reader_id": reader.id + 1},
+        headers={**headers, "Idempotency-Key": "borrow-1"},
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    
+    # Повтор возврата отдает сохраненный ответ, а без ключа возврат уже невозможен
+    loan_id = first.json()["id"]
+    return_headers = {**headers, "Idempotency-Key": "return-1"}
+    response = client.post("/api/v1/borrowed-books/return", json={"borrow_id": loan_id}, headers=return_headers)
+    assert response.status_code == status.HTTP_200_OK
+    response = client.post("/api/v1/borrowed-books/return", json={"borrow_id": loan_id}, headers=return_headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["Idempotent-Replayed"] == "true"
+    response = client.post("/api/v1/borrowed-books/return", json={"borrow_id": loan_id}, headers=headers)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    
+    db.query(IdempotencyKey).filter(IdempotencyKey.key == "borrow-1").update(
+        {IdempotencyKey.expires_at: datetime.utcnow() - timedelta(hours=1)}
+    )
+    db.commit()
+    assert purge_expired_idempotency_keys(db, batch_size=10) == 1
+    assert [row.key for row in db.query(IdempotencyKey)] == ["return-1"]
+
+
+def test_stale_in_flight_key_is_taken_over(db):
+    user = create_user(db, user_in=UserCreate(email="crashed@example.com", password="password123"))
+    now = datetime.utcnow()
+    db_key, claimed = claim_idempotency_key(db, user_id=user.id, key="borrow-2", fingerprint="f", now=now)
+    assert claimed
+    
+    # Первый запрос еще выполняется: повтор ждет
+    _, claimed = claim_idempotency_key(db, user_id=user.id, key="borrow-2", fingerprint="f", now=now)
+    assert not claimed
+    
+    # Воркер упал, не сохранив ответ: после аренды повтор выполняется заново
+    later = now + timedelta(minutes=5)
+    taken, claimed = claim_idempotency_key(db, user_id=user.id, key="borrow-2", fingerprint="f", now=later)
+    assert claimed and taken.id == db_key.id
+    _, claimed = claim_idempotency_key(db, user_id=user.id, key="borrow-2", fingerprint="f", now=later)
+    assert not claimed
+    _, claimed = claim_idempotency_key(
+        db, user_id=user.id, key="borrow-2", fingerprint="other", now=later + timedelta(minutes=5)
+    )
+    assert not claimed
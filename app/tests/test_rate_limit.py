@@ -0,0 +1,76 @@
+import sys
+
+import pytest
+from fastapi import FastAPI, status
+from fastapi.testclient import TestClient
+
+from app.database.pool import PoolWaitStats
+from app.middleware.rate_limit import LoadShedder, RateLimitMiddleware, RedisBucketStore
+from app.security.jwt import create_access_token
+
+
+def _make_app(shedder=None):
+    app = FastAPI()
+    app.add_middleware(
+        RateLimitMiddleware,
+        limits={"auth": (60, 1), "read": (60, 3), "write": (60, 2)},
+        shedder=shedder,
+    )
+
+    @app.get("/api/v1/books/")
+    def read_books():
+        return []
+
+    @app.post("/api/v1/borrowed-books/borrow")
+    def borrow_book():
+        return {}
+
+    @app.post("/api/v1/auth/login")
+    def login():
+        return {}
+
+    return app
+
+
+def test_rate_limit_per_client_and_route_class():
+    client = TestClient(_make_app())
+    
+    responses = [client.get("/api/v1/books/") for _ in range(4)]
+    assert [response.status_code for response in responses] == [200, 200, 200, 429]
+    assert responses[-1].headers["Retry-After"] == "1"
+    
+    # У записи и входа свои бюджеты
+    assert client.post("/api/v1/borrowed-books/borrow").status_code == status.HTTP_200_OK
+    assert client.post("/api/v1/auth/login").status_code == status.HTTP_200_OK
+    assert client.post("/api/v1/auth/login").status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    
+    # Пользователь с токеном считается отдельно от IP
+    headers = {"Authorization": f"Bearer {create_access_token(subject=1)}"}
+    assert client.get("/api/v1/books/", headers=headers).status_code == status.HTTP_200_OK
+
+
+def test_load_shedding_rejects_reads_first():
+    wait_stats = PoolWaitStats(window_seconds=60)
+    shedder = LoadShedder(max_in_flight=10, max_pool_wait=0.1, wait_stats=wait_stats)
+    client = TestClient(_make_app(shedder))
+    
+    wait_stats.observe(0.15)
+    response = client.get("/api/v1/books/")
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert client.post("/api/v1/borrowed-books/borrow").status_code == status.HTTP_200_OK
+    
+    wait_stats.observe(0.5)
+    assert client.post("/api/v1/borrowed-books/borrow").status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    
+    shedder.wait_stats = PoolWaitStats(window_seconds=60)
+    shedder.in_flight = 10
+    assert client.get("/api/v1/books/").status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    shedder.in_flight = 0
+    assert client.get("/api/v1/books/").status_code == status.HTTP_200_OK
+
+
+def test_redis_backend_without_package_fails_clearly(monkeypatch):
+    monkeypatch.setitem(sys.modules, "redis", None)
+    monkeypatch.setitem(sys.modules, "redis.asyncio", None)
+    with pytest.raises(RuntimeError, match="pip install redis"):
+        RedisBucketStore("redis://localhost:6379/0")
@@ -0,0 +1,64 @@
+import numpy as np
+from fastapi import status
+
+from app.crud import crud_book, crud_reader, crud_borrowed_book
+from app.schemas.book import BookCreate
+from app.schemas.reader import ReaderCreate
+from app.schemas.borrowed_book import BorrowBookCreate
+from app.services.recommendations import (
+    SimilarBooksIndex, build_similar, load_loans, save_similar, similar_books
+)
+
+
+def test_build_similar():
+    reader_ids = np.array([1, 1, 1, 2, 2, 3, 3, 3])
+    book_ids = np.array([10, 20, 20, 10, 20, 10, 30, 40])
+    
+    books, indptr, neighbors, scores = build_similar(reader_ids, book_ids, top_k=2, block_size=2)
+    assert books.tolist() == [10, 20, 30, 40]
+    assert indptr.tolist() == [0, 2, 3, 5, 7]
+    assert neighbors[0:2].tolist() == [20, 30]
+    assert np.allclose(scores[0:2], [2 / np.sqrt(3 * 2), 1 / np.sqrt(3)])
+    assert neighbors[2:3].tolist() == [10]
+    assert neighbors[3:5].tolist() == [40, 10]
+
+
+def test_similar_books_endpoint(client, db, tmp_path, monkeypatch):
+    from app.schemas.user import UserCreate
+    from app.crud.crud_user import create_user
+    
+    user_data = UserCreate(email="test_similar@example.com", password="password123")
+    user = create_user(db, user_in=user_data)
+    
+    login_data = {"email": "test_similar@example.com", "password": "password123"}
+    response = client.post("/api/v1/auth/login", json=login_data)
+    token = response.json()["access_token"]
+    
+    headers = {"Authorization": f"Bearer {token}"}
+    
+    books = [
+        crud_book.create_book(db, book=BookCreate(title=f"Book {i}", author="Author", quantity=5))
+        for i in range(3)
+    ]
+    readers = [
+        crud_reader.create_reader(db, reader=ReaderCreate(name=f"Reader {i}", email=f"similar{i}@example.com"))
+        for i in range(2)
+    ]
+    for reader, picked in ((readers[0], books[:2]), (readers[1], books)):
+        for book in picked:
+            crud_borrowed_book.borrow_book(db, borrow_data=BorrowBookCreate(book_id=book.id, reader_id=reader.id))
+    
+    monkeypatch.setattr(similar_books, "directory", str(tmp_path))
+    response = client.get(f"/api/v1/books/{books[0].id}/similar", headers=headers)
+    assert response.json() == []
+    
+    save_similar(str(tmp_path), build_similar(*load_loans(db)))
+    response = client.get(f"/api/v1/books/{books[0].id}/similar", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert [b["id"] for b in response.json()] == [books[1].id, books[2].id]
+    
+    response = client.get(f"/api/v1/books/{books[0].id}/similar?limit=1", headers=headers)
+    assert [b["title"] for b in response.json()] == ["Book 1"]
+    
+    response = client.get("/api/v1/books/999/similar", headers=headers)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
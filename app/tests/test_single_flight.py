@@ -0,0 +1,85 @@
+import threading
+import time
+
+from fastapi import status
+
+from app.crud import crud_reader
+from app.schemas.reader import ReaderCreate
+from app.services.single_flight import flights, render_shared
+from app.tests.conftest import TestingSessionLocal
+
+
+def test_concurrent_reads_share_one_query(client, db):
+    from app.crud.crud_user import create_user
+    from app.schemas.user import UserCreate
+    
+    reader = crud_reader.create_reader(db, reader=ReaderCreate(name="Shared", email="shared@example.com"))
+    flight = flights["reader_response"]
+    coalesced = flight.coalesced
+    release = threading.Event()
+    renders = []
+    results = {}
+    
+    def slow_render(session):
+        renders.append(session)
+        release.wait(5)
+        return crud_reader.get_reader(session, reader_id=reader.id).name.encode()
+    
+    def worker(index):
+        session = TestingSessionLocal()
+        try:
+            results[index] = render_shared(session, "reader_response", reader.id, lambda: slow_render(session))
+        finally:
+            session.close()
+    
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(4)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while flight.coalesced < coalesced + 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+    
+    assert len(renders) == 1
+    assert results == {index: b"Shared" for index in range(4)}
+    assert flight.coalesced == coalesced + 3
+    
+    # Чтение для записи не схлопывается и всегда идет в свою сессию
+    assert crud_reader.get_reader(db, reader_id=reader.id) in db
+    
+    create_user(db, user_in=UserCreate(email="metrics@example.com", password="password123"))
+    response = client.post(
+        "/api/v1/auth/login", json={"email": "metrics@example.com", "password": "password123"}
+    )
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    response = client.get(f"/api/v1/readers/{reader.id}", headers=headers)
+    assert response.json()["email"] == "shared@example.com"
+    response = client.get("/api/v1/metrics/", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["single_flight"]["reader_response"]["calls"] >= 5
+
+
+def test_book_by_isbn_is_coalesced(client, db):
+    from app.crud import crud_book
+    from app.crud.crud_user import create_user
+    from app.schemas.book import BookCreate
+    from app.schemas.user import UserCreate
+    
+    book = crud_book.create_book(
+        db, book=BookCreate(title="By ISBN", author="Author", isbn="978-5-00000-001-1", quantity=1)
+    )
+    create_user(db, user_in=UserCreate(email="isbn_flight@example.com", password="password123"))
+    response = client.post(
+        "/api/v1/auth/login", json={"email": "isbn_flight@example.com", "password": "password123"}
+    )
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    calls = flights["book_isbn_response"].calls
+    
+    response = client.get(f"/api/v1/books/isbn/{book.isbn}", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["id"] == book.id
+    response = client.get("/api/v1/books/isbn/000", headers=headers)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert flights["book_isbn_response"].calls == calls + 2
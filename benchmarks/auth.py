@@ -0,0 +1,54 @@
+"""Бенчмарк проверки access-токена в режимах database и stateless.
+
+Запуск: DATABASE_URL=sqlite:////tmp/bench.db python -m benchmarks.auth --requests 20000
+
+Измеряется то, что делает зависимость get_current_user на каждом
+запросе: новая сессия, разбор токена и (в режиме database) чтение
+пользователя.
+"""
+import argparse
+import time
+
+from app.core.config import settings
+from app.crud.crud_user import create_user, get_user_by_email
+from app.database.base import Base, SessionLocal, engine
+from app.schemas.user import UserCreate
+from app.security.dependencies import get_current_user
+from app.security.jwt import create_user_access_token
+
+EMAIL = "auth-benchmark@example.com"
+
+
+def measure(mode: str, requests: int) -> float:
+    settings.AUTH_MODE = mode
+    db = SessionLocal()
+    try:
+        user = get_user_by_email(db, email=EMAIL) or create_user(
+            db, user_in=UserCreate(email=EMAIL, password="benchmark-password")
+        )
+        token = create_user_access_token(user)
+    finally:
+        db.close()
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        db = SessionLocal()
+        try:
+            get_current_user(db=db, token=token, known_user=None)
+        finally:
+            db.close()
+    return (time.perf_counter() - started) / requests
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    for mode in ("database", "stateless"):
+        print(f"{mode:10} {measure(mode, args.requests) * 1e6:8.1f} us/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Бенчмарк индекса автодополнения: память и задержка на N названий.
+
+Запуск: python -m benchmarks.autocomplete_index --titles 1000000
+"""
+import argparse
+import random
+import string
+import time
+import tracemalloc
+
+from app.services.autocomplete import PrefixIndex
+
+WORDS = [
+    "the", "war", "peace", "night", "garden", "master", "history", "city",
+    "river", "house", "dream", "winter", "secret", "world", "song", "road",
+    "война", "мир", "мастер", "сад", "город", "ночь", "дом", "история",
+]
+
+
+def make_books(count: int, seed: int = 42):
+    rnd = random.Random(seed)
+    authors = [
+        f"{rnd.choice(string.ascii_uppercase)}. {''.join(rnd.choices(string.ascii_lowercase, k=8)).title()}"
+        for _ in range(max(count // 20, 1))
+    ]
+    for book_id in range(1, count + 1):
+        title = " ".join(rnd.choices(WORDS, k=rnd.randint(1, 4)))
+        title = f"{title} {''.join(rnd.choices(string.ascii_lowercase, k=5))}"
+        popularity = int(rnd.paretovariate(1.2))
+        yield book_id, title, rnd.choice(authors), popularity
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--titles", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=20_000)
+    args = parser.parse_args()
+
+    books = list(make_books(args.titles))
+
+    tracemalloc.start()
+    traced = PrefixIndex()
+    traced.load(books)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del traced
+
+    index = PrefixIndex()
+    started = time.perf_counter()
+    index.load(books)
+    build_seconds = time.perf_counter() - started
+
+    rnd = random.Random(7)
+    prefixes = []
+    for _ in range(args.queries):
+        _, title, author, _ = rnd.choice(books)
+        source = title if rnd.random() < 0.8 else author
+        prefixes.append(source[:rnd.randint(1, 8)])
+
+    def measure():
+        timings = []
+        for prefix in prefixes:
+            started = time.perf_counter()
+            index.suggest(prefix, limit=10)
+            timings.append(time.perf_counter() - started)
+        return sorted(timings)
+
+    def percentile(timings, value: float) -> float:
+        return timings[min(int(len(timings) * value), len(timings) - 1)] * 1e6
+
+    cold = measure()
+    warm = measure()
+
+    print(f"titles:            {args.titles}")
+    print(f"index entries:     {len(index)}")
+    print(f"build time:        {build_seconds:.2f} s")
+    print(f"index memory:      {current / 2**20:.1f} MiB ({current / args.titles:.0f} B/title)")
+    print(f"peak during build: {peak / 2**20:.1f} MiB")
+    for name, timings in (("cold", cold), ("warm", warm)):
+        print(
+            f"suggest {name}:      p50 {percentile(timings, 0.50):.1f} us, "
+            f"p99 {percentile(timings, 0.99):.1f} us, "
+            f"max {timings[-1] * 1e6:.1f} us"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Бенчмарк проверки JWT с кешем проверенных токенов и без него.
+
+Запуск: python -m benchmarks.jwt_cache --tokens 2000 --requests 200000
+
+Токены выбираются по закону Ципфа: несколько киосков и активных
+сотрудников шлют один и тот же токен весь день, остальные заходят редко.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.security.jwt import VerifiedTokenCache, create_access_token, decode_token
+from app.security import jwt as jwt_module
+
+
+def make_requests(tokens: int, requests: int, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    ranks = np.minimum(rng.zipf(1.2, size=requests), tokens) - 1
+    pool = [create_access_token(subject=user_id) for user_id in range(1, tokens + 1)]
+    return [pool[rank] for rank in ranks]
+
+
+def measure(requests, cache_size: int):
+    jwt_module.verified_tokens = VerifiedTokenCache(maxsize=cache_size)
+    started = time.perf_counter()
+    for token in requests:
+        decode_token(token)
+    elapsed = time.perf_counter() - started
+    return elapsed / len(requests), len(jwt_module.verified_tokens)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokens", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=200_000)
+    parser.add_argument("--cache-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    requests = make_requests(args.tokens, args.requests)
+    print(f"distinct tokens: {len(set(requests))} of {args.tokens}")
+    for label, cache_size in (("no cache", 0), ("cache", args.cache_size), ("cache 100", 100)):
+        per_request, cached = measure(requests, cache_size)
+        print(f"{label:10} {per_request * 1e6:8.2f} us/request, cached {cached}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Бенчмарк сборки рекомендаций на синтетической истории выдач.
+
+Запуск: python -m benchmarks.recommendations --loans 20000000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.services.recommendations import build_similar
+
+
+def make_loans(loans: int, readers: int, books: int, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    reader_ids = rng.integers(1, readers + 1, size=loans)
+    # Популярность книг по закону Ципфа, как в реальном фонде
+    book_ids = np.minimum(rng.zipf(1.3, size=loans), books)
+    book_ids = rng.permutation(books)[book_ids - 1] + 1
+    return reader_ids, book_ids
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--loans", type=int, default=20_000_000)
+    parser.add_argument("--readers", type=int, default=1_000_000)
+    parser.add_argument("--books", type=int, default=200_000)
+    parser.add_argument("--top-k", type=int, default=20)
+    args = parser.parse_args()
+
+    reader_ids, book_ids = make_loans(args.loans, args.readers, args.books)
+
+    started = time.perf_counter()
+    books, indptr, neighbors, scores = build_similar(reader_ids, book_ids, top_k=args.top_k)
+    build_seconds = time.perf_counter() - started
+
+    stored = sum(array.nbytes for array in (books, indptr, neighbors, scores))
+    print(f"loans:        {args.loans}")
+    print(f"books:        {len(books)}")
+    print(f"neighbors:    {len(neighbors)}")
+    print(f"build time:   {build_seconds:.1f} s")
+    print(f"stored size:  {stored / 2**20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Бенчмарк форматов ответа списка книг: размер и время кодирования.
+
+Запуск: python -m benchmarks.response_formats --rows 1000 --repeat 50
+
+Сравнивает JSON через схему (как в обычном ответе), MessagePack и CBOR
+из app.api.formats, каждый без сжатия и со сжатием gzip/br на уровнях
+из настроек.
+"""
+import argparse
+import time
+from types import SimpleNamespace
+from typing import List
+
+import numpy as np
+from pydantic import TypeAdapter
+
+from app.api.formats import CBOR, MSGPACK, encode_rows
+from app.core.config import settings
+from app.middleware.compression import compress
+from app.schemas.book import BOOK_LIST_DEFAULT_FIELDS, BookFields
+
+
+def make_rows(rows: int, seed: int = 42) -> List[SimpleNamespace]:
+    rng = np.random.default_rng(seed)
+    years = rng.integers(1850, 2025, size=rows)
+    quantities = rng.integers(0, 20, size=rows)
+    return [
+        SimpleNamespace(
+            id=i + 1,
+            title=f"Книга номер {i} о чем-то важном",
+            author=f"Автор {int(rng.integers(1, 500))}",
+            publication_year=int(years[i]),
+            isbn=f"978{i:010d}",
+            quantity=int(quantities[i]),
+        )
+        for i in range(rows)
+    ]
+
+
+def timed(fn, repeat: int):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - started) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    fields = BOOK_LIST_DEFAULT_FIELDS
+    adapter = TypeAdapter(List[BookFields])
+    encoders = {
+        "json": lambda: adapter.dump_json(
+            [BookFields(**{field: getattr(row, field) for field in fields}) for row in rows]
+        ),
+        "msgpack": lambda: encode_rows(rows, fields, MSGPACK),
+        "cbor": lambda: encode_rows(rows, fields, CBOR),
+    }
+    for name, encode in encoders.items():
+        body, seconds = timed(encode, args.repeat)
+        print(f"{name:8} raw  {len(body):9} bytes {seconds * 1e3:8.2f} ms")
+        for encoding, level in (("gzip", settings.GZIP_LEVEL), ("br", settings.BROTLI_QUALITY)):
+            packed, seconds = timed(lambda: compress(body, encoding, level), args.repeat)
+            print(f"{name:8} {encoding:4} {len(packed):9} bytes {seconds * 1e3:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()